@@ -0,0 +1,169 @@
+"""Admin authentication: bcrypt-checked login issuing short-lived signed tokens.
+
+The password is only verified at ``/api/admin/login``.  Every other admin
+request carries ``Authorization: Bearer <token>``, which is verified with an
+HMAC signature check and an expiry comparison, without touching the password
+hash or the database.
+
+Configuration:
+
+- ``ADMIN_USERNAME``
+- ``ADMIN_PASSWORD_HASH``: bcrypt hash of the admin password, checked at
+  startup so a malformed value fails there rather than on login.  When unset,
+  ``ADMIN_PASSWORD`` is hashed once at startup.
+- ``ADMIN_JWT_SECRET``: signing key, identical on every worker and host, and
+  kept across deploys so they don't log admins out.  Required, unless:
+- ``ADMIN_JWT_SECRET_FILE``: a file holding the key, e.g. on a volume every
+  pod mounts.  It is created with a random key (mode 0600) if missing.
+- ``ADMIN_ALLOW_EPHEMERAL_SECRET=true``: for development only, a random key
+  per process, so tokens stop working on restart and on other workers.
+- ``ADMIN_TOKEN_TTL_MINUTES`` (default 60)
+
+Upgrading from the Basic-auth admin: ``ADMIN_JWT_SECRET`` (or one of its
+alternatives) is new and required, so set it before deploying; see
+``backend/.env.example``.
+"""
+import logging
+import os
+import re
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+
+import bcrypt
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+JWT_ALGORITHM = "HS256"
+# $2b$<cost>$ followed by the 22-character salt and 31-character digest
+BCRYPT_HASH = re.compile(r"\$2[abxy]?\$(0[4-9]|[12][0-9]|3[01])\$[./A-Za-z0-9]{53}")
+
+
+@dataclass(frozen=True)
+class AuthSettings:
+    username: str
+    password_hash: bytes
+    jwt_secret: str
+    token_ttl: timedelta
+
+
+def _read_secret(path: Path) -> str:
+    secret = path.read_text().strip()
+    if not secret:
+        raise ValueError(f"{path} is empty; delete it to generate a new admin token key")
+    return secret
+
+
+def load_or_create_secret(path: Path) -> str:
+    """The key stored in ``path``, generating it first if the file doesn't exist.
+
+    The key is written to a private temporary file that is then hard-linked
+    into place, so workers starting together all end up with the same key.
+    """
+    try:
+        return _read_secret(path)
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_urlsafe(32) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp, path)
+            logger.info(f"Generated a new admin token key in {path}")
+        except FileExistsError:
+            pass  # Another worker created it first
+    finally:
+        tmp.unlink(missing_ok=True)
+    return _read_secret(path)
+
+
+def password_hash() -> bytes:
+    """``ADMIN_PASSWORD_HASH``, or ``ADMIN_PASSWORD`` hashed; raises ValueError on a malformed hash."""
+    configured = os.environ.get('ADMIN_PASSWORD_HASH', '').strip()
+    if not configured:
+        password = os.environ.get('ADMIN_PASSWORD', 'TunisiaOlive2024!')
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+    if not BCRYPT_HASH.fullmatch(configured):
+        raise ValueError(
+            "ADMIN_PASSWORD_HASH is not a bcrypt hash (expected $2b$<cost>$ and 53 more characters); "
+            "generate one with: python -c 'import bcrypt; print(bcrypt.hashpw(b\"...\", bcrypt.gensalt()).decode())'"
+        )
+    return configured.encode()
+
+
+def jwt_secret() -> str:
+    """The signing key; raises RuntimeError when none is configured."""
+    secret = os.environ.get('ADMIN_JWT_SECRET')
+    if secret:
+        return secret
+    secret_file = os.environ.get('ADMIN_JWT_SECRET_FILE')
+    if secret_file:
+        return load_or_create_secret(Path(secret_file))
+    if os.environ.get('ADMIN_ALLOW_EPHEMERAL_SECRET', 'false').lower() == 'true':
+        logger.warning("Using a random admin token key: tokens only work on this process until it restarts")
+        return secrets.token_urlsafe(32)
+    raise RuntimeError(
+        "ADMIN_JWT_SECRET is not set.  Set it to the same random value on every host "
+        "(or set ADMIN_JWT_SECRET_FILE; ADMIN_ALLOW_EPHEMERAL_SECRET=true for development)"
+    )
+
+
+@lru_cache(maxsize=None)
+def auth_settings() -> AuthSettings:
+    """Read the admin configuration once, after the .env file has been loaded."""
+    return AuthSettings(
+        username=os.environ.get('ADMIN_USERNAME', 'admin'),
+        password_hash=password_hash(),
+        jwt_secret=jwt_secret(),
+        token_ttl=timedelta(minutes=int(os.environ.get('ADMIN_TOKEN_TTL_MINUTES', '60'))),
+    )
+
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def check_credentials(username: str, password: str) -> bool:
+    settings = auth_settings()
+    correct_username = secrets.compare_digest(username, settings.username)
+    # bcrypt is deliberately slow; keep it off the event loop
+    correct_password = await run_in_threadpool(bcrypt.checkpw, password.encode(), settings.password_hash)
+    return correct_username and correct_password
+
+
+def create_access_token(username: str) -> str:
+    settings = auth_settings()
+    now = datetime.now(timezone.utc)
+    claims = {"sub": username, "iat": now, "exp": now + settings.token_ttl}
+    return jwt.encode(claims, settings.jwt_secret, algorithm=JWT_ALGORITHM)
+
+
+async def verify_admin(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> str:
+    unauthorized = HTTPException(
+        status_code=401,
+        detail="Invalid or expired token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise unauthorized
+    settings = auth_settings()
+    try:
+        claims = jwt.decode(
+            credentials.credentials, settings.jwt_secret,
+            algorithms=[JWT_ALGORITHM], options={"require": ["exp", "sub"]},
+        )
+    except jwt.InvalidTokenError:
+        raise unauthorized
+    if claims["sub"] != settings.username:
+        raise unauthorized
+    return claims["sub"]
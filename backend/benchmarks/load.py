@@ -0,0 +1,316 @@
+"""In-process load test of the API.
+
+Starts ``server.app`` behind ``httpx.ASGITransport`` (no sockets, no uvicorn),
+seeds a catalog and an inbox of configurable size, then drives each scenario
+with a fixed number of concurrent clients and reports throughput and latency
+percentiles as JSON.  Against a real MongoDB (``--mongo-url``) the numbers
+include database round trips; without it an in-memory ``mongomock_motor``
+stand-in is used (``pip install mongomock-motor``), which is good for
+comparing Python-side changes but not for database tuning.
+
+The seeded database is dropped at the end, so point ``--db-name`` at a
+throwaway database.
+
+Run from the backend directory::
+
+    python -m benchmarks.load --products 300 --messages 5000 --concurrency 20 --output after.json
+    python -m benchmarks.load --compare before.json
+
+``--compare`` prints per-scenario deltas against an earlier result and exits
+with status 1 when throughput or p95 latency regressed by more than
+``--threshold`` percent.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# The contact route is rate limited per IP; every benchmark request comes from one
+os.environ.setdefault("CONTACT_IP_BURST", "1000000000")
+os.environ.setdefault("CONTACT_GLOBAL_BURST", "1000000000")
+os.environ.setdefault("CONTACT_DUPLICATE_WINDOW", "0")
+os.environ.setdefault("ADMIN_JWT_SECRET", "benchmark-only-secret-never-use-in-production")
+
+import httpx  # noqa: E402
+
+SEARCH_TERMS = ["olive", "extra vierge", "planche", "board 1", "bois", "5l"]
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: Callable[[int], str]
+    admin: bool = False
+    body: Optional[Callable[[int], dict]] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+def contact_body(i: int) -> dict:
+    return {
+        "name": f"Load test {i}",
+        "email": f"load{i}@example.com",
+        "subject": "Benchmark",
+        "message": f"Benchmark message number {i} asking for a price list.",
+    }
+
+
+SCENARIOS = [
+    Scenario("catalog_olive_oil", "GET", lambda i: "/api/products/olive-oil"),
+    Scenario("catalog_kitchenware_fr", "GET", lambda i: "/api/products/kitchenware?lang=fr"),
+    Scenario("catalog_gzip", "GET", lambda i: "/api/products/kitchenware", headers={"Accept-Encoding": "gzip"}),
+    Scenario("catalog_combined", "GET", lambda i: "/api/catalog?lang=en"),
+    Scenario("search", "GET", lambda i: f"/api/products/search?q={SEARCH_TERMS[i % len(SEARCH_TERMS)]}"),
+    Scenario("settings", "GET", lambda i: "/api/settings"),
+    Scenario("contact", "POST", lambda i: "/api/contact", body=contact_body),
+    Scenario("admin_messages", "GET", lambda i: "/api/admin/messages?limit=50&view=summary", admin=True),
+    Scenario("admin_messages_unread", "GET", lambda i: "/api/admin/messages?limit=50&read=false", admin=True),
+    Scenario("admin_stats", "GET", lambda i: "/api/admin/stats", admin=True),
+    Scenario("admin_olive_oil", "GET", lambda i: "/api/admin/olive-oil", admin=True),
+]
+
+
+def make_products(count: int):
+    from server import KitchenwareProduct, OliveOilProduct
+
+    olive_oil = [
+        OliveOilProduct(
+            sku=f"OO-{i:05d}",
+            name_en=f"Extra virgin olive oil {i}",
+            name_fr=f"Huile d'olive extra vierge {i}",
+            size=("250ml", "500ml", "1L", "5L")[i % 4],
+            description_en="Cold extracted from Chemlali olives, fruity and balanced.",
+            description_fr="Extraite à froid d'olives Chemlali, fruitée et équilibrée.",
+            image=f"https://example.com/olive-oil/{i}.jpg",
+            active=i % 10 != 0,
+            order=i,
+        ).model_dump()
+        for i in range(count)
+    ]
+    kitchenware = [
+        KitchenwareProduct(
+            reference=f"KW-{i:05d}",
+            name_en=f"Olive wood board {i}",
+            name_fr=f"Planche en bois d'olivier {i}",
+            dimensions="20/25/30 CM",
+            description_en="Handcrafted olive wood board with natural grain.",
+            description_fr="Planche artisanale en bois d'olivier au grain naturel.",
+            image=f"https://example.com/kitchenware/{i}.jpg",
+            active=i % 10 != 0,
+            order=i,
+        ).model_dump()
+        for i in range(count)
+    ]
+    return olive_oil, kitchenware
+
+
+def make_messages(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Buyer {i}",
+            "email": f"buyer{i % 500}@example.com",
+            "company": "Example Imports",
+            "subject": "Wholesale enquiry",
+            "message": "We would like to receive your price list for 5L tins. " * 4,
+            "created_at": now - timedelta(minutes=i),
+            "read": i % 3 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+async def seed(db, products: int, messages: int) -> None:
+    olive_oil, kitchenware = make_products(products)
+    for collection, docs in (
+        (db.olive_oil_products, olive_oil),
+        (db.kitchenware_products, kitchenware),
+        (db.contact_messages, make_messages(messages)),
+    ):
+        await collection.delete_many({})
+        for start in range(0, len(docs), 1000):
+            await collection.insert_many(docs[start:start + 1000])
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int,
+                       admin_headers: Dict[str, str], warmup: int) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(warmup + requests))
+
+    async def send(i: int):
+        headers = dict(scenario.headers or {})
+        if scenario.admin:
+            headers.update(admin_headers)
+        body = scenario.body(i) if scenario.body else None
+        return await client.request(scenario.method, scenario.path(i), json=body, headers=headers)
+
+    for i in range(warmup):
+        await send(next(counter))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            response = await send(i)
+            await response.aread()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+
+    import server
+    from auth import auth_settings, create_access_token
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.mongo_url:
+        database = "mongodb"
+    else:
+        try:
+            import mongomock_motor
+        except ImportError:
+            raise SystemExit("Either pass --mongo-url or install mongomock-motor for the in-memory stand-in")
+        # The lifespan only connects when no database has been bound
+        server.db.bind(mongomock_motor.AsyncMongoMockClient(tz_aware=True)[args.db_name])
+        database = "mongomock"
+
+    selected = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    admin_headers = {"Authorization": f"Bearer {create_access_token(auth_settings().username)}"}
+
+    results = {}
+    async with server.app.router.lifespan_context(server.app):
+        await seed(server.db, args.products, args.messages)
+        # The lifespan warmed the caches from the empty database
+        for name in server.CATALOG_COLLECTIONS:
+            await server.catalog_cache.invalidate(name)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for scenario in selected:
+                results[scenario.name] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, admin_headers, args.warmup
+                )
+        if args.mongo_url:
+            await server.db.client.drop_database(args.db_name)
+
+    return {
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": database,
+        "params": {
+            "products": args.products,
+            "messages": args.messages,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print deltas against ``baseline`` and return the regressed scenario names."""
+    regressions = []
+    print(f"{'scenario':28} {'rps':>20} {'p95 ms':>22}", file=sys.stderr)
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        rps_delta = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        p95_before = before["latency_ms"]["p95"]
+        p95_delta = (result["latency_ms"]["p95"] / p95_before - 1) * 100 if p95_before else 0.0
+        regressed = rps_delta < -threshold or p95_delta > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:28} {before['throughput_rps']:>8} -> {result['throughput_rps']:<8} {rps_delta:+6.1f}%"
+            f" {p95_before:>8} -> {result['latency_ms']['p95']:<8} {p95_delta:+6.1f}%"
+            f"{'  REGRESSION' if regressed else ''}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process API load test")
+    parser.add_argument("--mongo-url", default=os.environ.get("BENCHMARK_MONGO_URL"),
+                        help="MongoDB to seed and query (default: in-memory mongomock_motor)")
+    parser.add_argument("--db-name", default="api_benchmark")
+    parser.add_argument("--products", type=int, default=100, help="products per category")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="*", choices=[s.name for s in SCENARIOS])
+    parser.add_argument("--output", help="write the JSON result here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier result to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != result["params"] or baseline.get("database") != result["database"]:
+            print("warning: baseline was recorded with different parameters", file=sys.stderr)
+        if compare(result, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Before/after micro-benchmark of the response encoding path.
+
+Compares, for a synthetic catalog and inbox page:
+
+- ``default``: FastAPI's default path (``jsonable_encoder`` + ``JSONResponse``)
+- ``validated``: the same plus ``response_model`` validation of every item
+- ``orjson``: ``ORJSONResponse`` on the raw documents (what the API now does)
+- ``snapshot``: serving a pre-serialized catalog snapshot (bytes lookup only)
+
+and the payload size uncompressed, gzipped and brotli-compressed.
+
+Run from the backend directory::
+
+    python -m benchmarks.serialization [--products 300] [--messages 500] [--repeat 200]
+"""
+import argparse
+import gzip
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from server import ContactMessageListItem, KitchenwareProduct
+from snapshots import brotli, build_snapshot
+
+
+def make_products(count: int) -> List[dict]:
+    return [
+        KitchenwareProduct(
+            reference=f"R{i:04d}",
+            name_en=f"Olive wood board {i}",
+            name_fr=f"Planche en bois d'olivier {i}",
+            dimensions="20/25/30/35 CM",
+            description_en="Handcrafted olive wood board with natural grain " * 2,
+            description_fr="Planche artisanale en bois d'olivier au grain naturel " * 2,
+            image=f"https://example.com/images/{i}.jpg",
+            order=i,
+        ).model_dump()
+        for i in range(count)
+    ]
+
+
+def make_messages(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Buyer {i}",
+            "email": f"buyer{i}@example.com",
+            "company": "Example Imports",
+            "subject": "Wholesale enquiry",
+            "message": "We would like to receive your price list for 5L tins. " * 8,
+            "created_at": now - timedelta(minutes=i),
+            "read": i % 3 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def bench(fn, repeat: int) -> float:
+    """Median microseconds per call over ``repeat`` runs."""
+    runs = sorted(timeit.repeat(fn, number=1, repeat=repeat))
+    return round(runs[len(runs) // 2] * 1e6, 1)
+
+
+def run(products: int, messages: int, repeat: int) -> dict:
+    catalog = {"products": make_products(products)}
+    inbox = make_messages(messages)
+    inbox_adapter = TypeAdapter(List[ContactMessageListItem])
+    snapshot = build_snapshot(catalog)
+
+    results = {
+        "catalog": {
+            "default": bench(lambda: JSONResponse(jsonable_encoder(catalog)), repeat),
+            "orjson": bench(lambda: ORJSONResponse(catalog), repeat),
+            "snapshot": bench(lambda: snapshot.variant("br, gzip"), repeat),
+        },
+        "messages": {
+            "validated": bench(
+                lambda: JSONResponse(jsonable_encoder(inbox_adapter.dump_python(inbox_adapter.validate_python(inbox)))),
+                repeat,
+            ),
+            "default": bench(lambda: JSONResponse(jsonable_encoder(inbox)), repeat),
+            "orjson": bench(lambda: ORJSONResponse(inbox), repeat),
+        },
+    }
+    sizes = {}
+    for name, payload in (("catalog", catalog), ("messages", inbox)):
+        body = ORJSONResponse(payload).body
+        sizes[name] = {"identity": len(body), "gzip": len(gzip.compress(body, compresslevel=6))}
+        if brotli is not None:
+            sizes[name]["br"] = len(brotli.compress(body, quality=4))
+    return {
+        "unit": "microseconds per response (median)",
+        "params": {"products": products, "messages": messages, "repeat": repeat},
+        "timings": results,
+        "bytes": sizes,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Response encoding micro-benchmark")
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.products, args.messages, args.repeat), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
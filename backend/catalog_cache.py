@@ -0,0 +1,178 @@
+"""In-process cache for the public catalog and site settings.
+
+The public product lists only change when an admin writes to them, so they
+are served from memory and dropped whenever an admin route calls
+``invalidate``.  Every invalidation also bumps a revision counter stored in the
+``catalog_revisions`` collection so that other uvicorn workers can notice the
+change.
+
+Modes (``CATALOG_CACHE_MODE``):
+
+- ``off``: no caching, every request goes to MongoDB.
+- ``local``: cache per process, only invalidated by writes made in this process.
+- ``version`` (default): like ``local``, but cached entries re-check the shared
+  revision counter at most every ``CATALOG_CACHE_POLL_SECONDS``.
+- ``changestream``: a MongoDB change stream on the catalog collections drops
+  entries as soon as any worker writes.  Requires a replica set; falls back to
+  ``version`` if the stream cannot be opened.
+
+``CATALOG_CACHE_MAX_AGE`` additionally reloads entries older than that many
+seconds whatever the revision.  It defaults to 60 when the public reads go to
+secondaries: a load from a lagging secondary would otherwise stay cached until
+the next admin write.
+
+Concurrent requests that miss the same entry (cold start, right after an
+invalidation) share a single load, as do concurrent revision checks, so a
+burst of visitors costs one query rather than one each.
+``CATALOG_LOAD_TIMEOUT`` bounds how long a request waits for that load.  A
+failed revision check keeps serving the cached entry until the next poll.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "local", "version", "changestream")
+REVISIONS_COLLECTION = "catalog_revisions"
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    revision: int
+    loaded_at: float
+    checked_at: float = field(default=0.0)
+    updated_at: Optional[datetime] = None
+    # Derived payloads (e.g. serialized snapshots), rebuilt with the entry
+    snapshots: Dict[str, Any] = field(default_factory=dict)
+
+
+class CatalogCache:
+    def __init__(
+        self,
+        db,
+        mode: str = "version",
+        poll_seconds: float = 2.0,
+        max_age: float = 0.0,
+        load_timeout: Optional[float] = None,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown catalog cache mode: {mode!r}")
+        self.db = db
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self.max_age = max_age
+        self._entries: Dict[str, CacheEntry] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        # Concurrent misses and revision checks for the same entry share one query
+        self._flights = SingleFlight(timeout=load_timeout)
+        # Bumped by invalidate, so a load that started before it isn't stored
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        # Called with the entry name after every local invalidation
+        self.listeners: List[Callable[[str], None]] = []
+
+    async def _read_revision(self, name: str):
+        doc = await self.db[REVISIONS_COLLECTION].find_one({"_id": name})
+        if not doc:
+            return 0, None
+        return doc["revision"], doc.get("updated_at")
+
+    async def _load(self, name: str, loader) -> CacheEntry:
+        self.loads += 1
+        revision, updated_at = await self._read_revision(name)
+        value = await loader()
+        now = time.monotonic()
+        return CacheEntry(value, revision, now, now, updated_at)
+
+    async def get(self, name: str, loader: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        """Return the cached entry for ``name``, calling ``loader`` on a miss."""
+        if self.mode == "off":
+            self.misses += 1
+            return await self._load(name, loader)
+
+        entry = self._entries.get(name)
+        now = time.monotonic()
+        if entry is not None and self.max_age and now - entry.loaded_at >= self.max_age:
+            entry = None
+        if entry is not None and self.mode == "version":
+            if now - entry.checked_at >= self.poll_seconds:
+                try:
+                    revision, _ = await self._flights.do(("revision", name), lambda: self._read_revision(name))
+                except Exception as e:
+                    # Keep serving what we have; retry after the normal interval, not on every request
+                    logger.warning(f"Catalog revision check for {name} failed, serving the cached entry: {e}")
+                    revision = entry.revision
+                if revision != entry.revision:
+                    entry = None
+                else:
+                    entry.checked_at = now
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return await self._flights.do(("load", name), lambda: self._load_and_store(name, loader))
+
+    async def _load_and_store(self, name: str, loader) -> CacheEntry:
+        generation = self._generations.get(name, 0)
+        entry = await self._load(name, loader)
+        if self._generations.get(name, 0) == generation:
+            self._entries[name] = entry
+        return entry
+
+    async def invalidate(self, name: str) -> None:
+        """Drop the local entry and bump the shared revision for ``name``."""
+        self._drop(name)
+        await self.db[REVISIONS_COLLECTION].update_one(
+            {"_id": name},
+            {"$inc": {"revision": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        for listener in self.listeners:
+            listener(name)
+
+    def _drop(self, name: str) -> None:
+        self._entries.pop(name, None)
+        self._generations[name] = self._generations.get(name, 0) + 1
+        # Requests from now on must not join a load that may predate the write
+        self._flights.forget(("load", name))
+        self._flights.forget(("revision", name))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def start(self, collections: Iterable[str]) -> None:
+        """Start the change-stream watcher when running in ``changestream`` mode."""
+        if self.mode == "changestream" and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(list(collections)))
+
+    async def stop(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self, collections) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": collections}}}]
+        try:
+            async with self.db.watch(pipeline) as stream:
+                async for change in stream:
+                    self._drop(change["ns"]["coll"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Catalog change stream unavailable ({e}), falling back to version polling")
+            self.mode = "version"
+            self.clear()
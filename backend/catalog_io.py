@@ -0,0 +1,250 @@
+"""Bulk catalog import and export (CSV or JSON).
+
+Imports are upserts keyed by the category's business key (``sku`` or
+``reference``).  Rows are validated against the category's create model in
+batches of ``batch_size``, and each batch's valid rows are written with one
+unordered ``bulk_write``:
+
+- ``$set`` holds the fields present in the row, so an empty optional cell
+  (``dimensions``, ``image_variants``) keeps the stored value;
+- ``$setOnInsert`` holds a new ``id`` plus the model defaults for the rest.
+
+Invalid rows are reported with their 1-based row number (CSV: data rows after
+the header) and never abort the import.  The same key twice in one file is an
+error on the later row.  A JSON file is either a list of products or an object
+with a ``products`` list (what the export and the public API produce).  The
+``id`` column or field of an export is ignored: rows are matched by key.
+
+Run standalone from the backend directory::
+
+    python catalog_io.py import olive-oil catalog.csv [--dry-run] [--batch-size 500]
+    python catalog_io.py export kitchenware [--format json] [--output kitchenware.json]
+
+When ``STATIC_EXPORT_DIR`` is set, a standalone import also rewrites the
+static export (see static_export.py) before exiting: the debounced export the
+admin routes rely on would never run in this short-lived process.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import sys
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import csv_chunks
+from products import PRODUCT_SORT, PROJECTION
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "json")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "json": "application/json"}
+MAX_REPORTED_ERRORS = 500
+# Stored as JSON inside a single CSV cell
+JSON_FIELDS = ("image_variants",)
+
+
+def detect_format(filename: str = "", content_type: str = "") -> str:
+    if filename.lower().endswith(".json") or "json" in content_type:
+        return "json"
+    return "csv"
+
+
+def parse_rows(data: bytes, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Raw product dicts from an uploaded file; raises ValueError if it can't be parsed at all."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ValueError("File is not UTF-8 encoded") from e
+    if fmt == "json":
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if isinstance(payload, dict):
+            payload = payload.get("products")
+        if not isinstance(payload, list):
+            raise ValueError("Expected a list of products or an object with a 'products' list")
+        yield from payload
+        return
+    for row in csv.DictReader(io.StringIO(text)):
+        # Empty cells are missing values, so they never overwrite stored fields
+        product = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip()}
+        for field in JSON_FIELDS:
+            if field in product:
+                try:
+                    product[field] = json.loads(product[field])
+                except json.JSONDecodeError:
+                    pass  # left as a string, so validation reports it
+        yield product
+
+
+def _describe(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+
+
+def upsert_operation(product: BaseModel, key_field: str) -> UpdateOne:
+    fields = product.model_dump(exclude_unset=True)
+    on_insert = {k: v for k, v in product.model_dump().items() if k not in fields}
+    on_insert["id"] = str(uuid.uuid4())
+    return UpdateOne({key_field: fields[key_field]}, {"$set": fields, "$setOnInsert": on_insert}, upsert=True)
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Any]]]:
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        batch.append((number, row))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def import_products(repo, rows: Iterable[Dict[str, Any]], batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Validate and upsert ``rows`` into ``repo``'s collection; returns the import report."""
+    category = repo.category
+    report = {"received": 0, "valid": 0, "inserted": 0, "updated": 0, "unchanged": 0, "dry_run": dry_run,
+              "errors_total": 0, "errors": []}
+    seen: Dict[str, int] = {}
+
+    def reject(row: int, messages: List[str]) -> None:
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row, "errors": messages})
+        report["errors_total"] += 1
+
+    for batch in _batches(rows, batch_size):
+        report["received"] += len(batch)
+        operations, row_numbers = [], []
+        for number, row in batch:
+            if not isinstance(row, dict):
+                reject(number, ["row: expected an object"])
+                continue
+            try:
+                product = category.create_model.model_validate(row)
+            except ValidationError as e:
+                reject(number, _describe(e))
+                continue
+            key = getattr(product, category.key_field)
+            if key in seen:
+                reject(number, [f"{category.key_field}: duplicate of row {seen[key]}"])
+                continue
+            seen[key] = number
+            operations.append(upsert_operation(product, category.key_field))
+            row_numbers.append(number)
+        report["valid"] += len(operations)
+        if dry_run or not operations:
+            continue
+        try:
+            result = await repo.collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                reject(row_numbers[error["index"]], [error.get("errmsg", "write failed")])
+                report["valid"] -= 1
+        report["inserted"] += details.get("nUpserted", 0)
+        report["updated"] += details.get("nModified", 0)
+        report["unchanged"] += details.get("nMatched", 0) - details.get("nModified", 0)
+
+    if not dry_run and report["valid"]:
+        await repo.invalidate()
+    logger.info(
+        f"Imported {category.slug}: {report['received']} rows, {report['inserted']} inserted, "
+        f"{report['updated']} updated, {report['errors_total']} rejected" + (" (dry run)" if dry_run else "")
+    )
+    return report
+
+
+def export_columns(category) -> List[str]:
+    return ["id", *category.create_model.model_fields]
+
+
+def csv_row(product: dict) -> dict:
+    for field in JSON_FIELDS:
+        if product.get(field) is not None:
+            product[field] = json.dumps(product[field], ensure_ascii=False)
+    return product
+
+
+async def iter_json(cursor) -> AsyncIterator[str]:
+    # {"products": [...]}, which import_products reads back as is
+    separator = "\n"
+    yield '{"products": ['
+    async for product in cursor:
+        yield separator + json.dumps(product, ensure_ascii=False)
+        separator = ",\n"
+    yield "\n]}\n"
+
+
+def iter_export(repo, fmt: str) -> AsyncIterator[str]:
+    """Every product of ``repo``, active or not, in display order, streamed from the cursor."""
+    cursor = repo.collection.find({}, PROJECTION).sort(PRODUCT_SORT).batch_size(500)
+    if fmt == "json":
+        return iter_json(cursor)
+    return csv_chunks.iter_csv(cursor, export_columns(repo.category), csv_row)
+
+
+async def _main(argv) -> int:
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import")
+    importer.add_argument("category")
+    importer.add_argument("file")
+    importer.add_argument("--format", choices=FORMATS)
+    importer.add_argument("--batch-size", type=int, default=500)
+    importer.add_argument("--dry-run", action="store_true")
+    exporter = commands.add_parser("export")
+    exporter.add_argument("category")
+    exporter.add_argument("--format", choices=FORMATS, default="csv")
+    exporter.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    # server.py only connects in its lifespan, so importing it here is cheap
+    import server
+    from database import cli_connection
+
+    repo = server.product_repos.get(args.category)
+    if repo is None:
+        parser.error(f"unknown category {args.category!r}, expected one of {sorted(server.product_repos)}")
+    async with cli_connection(server.db):
+        if args.command == "import":
+            data = Path(args.file).read_bytes()
+            fmt = args.format or detect_format(args.file)
+            try:
+                report = await import_products(repo, parse_rows(data, fmt), args.batch_size, args.dry_run)
+            except ValueError as e:
+                print(f"Cannot read {args.file}: {e}", file=sys.stderr)
+                return 2
+            print(json.dumps(report, indent=2))
+            exporter = server.static_exporter
+            if exporter.enabled and report["valid"] and not args.dry_run:
+                try:
+                    manifest = await exporter.export()
+                except Exception as e:
+                    print(f"Imported, but the static export failed: {e}; "
+                          "run `python static_export.py` to refresh it", file=sys.stderr)
+                    return 1
+                print(f"Static export version {manifest['version']} written to {exporter.output}", file=sys.stderr)
+            return 1 if report["errors_total"] else 0
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            async for chunk in iter_export(repo, args.format):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+        return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,123 @@
+"""MongoDB connection settings.
+
+Read once from the environment (after the .env file is loaded) and turned
+into ``AsyncIOMotorClient`` options by ``client_options``.  Pools are per
+process: with N uvicorn workers the server sees up to N x ``MONGO_MAX_POOL_SIZE``
+connections, so size the pool per worker.
+
+Configuration:
+
+- ``MONGO_URL``, ``DB_NAME``: required when the client is created, not on import.
+- ``MONGO_MAX_POOL_SIZE`` (default 50), ``MONGO_MIN_POOL_SIZE`` (default 2):
+  the minimum is opened at startup so the first requests don't pay for it.
+- ``MONGO_MAX_IDLE_TIME_MS``: close pooled connections idle for longer.
+- ``MONGO_SERVER_SELECTION_TIMEOUT_MS`` (default 5000),
+  ``MONGO_CONNECT_TIMEOUT_MS`` (default 5000), ``MONGO_SOCKET_TIMEOUT_MS``
+  (default 30000), ``MONGO_WAIT_QUEUE_TIMEOUT_MS`` (default 5000): bound how
+  long a request can wait for a server, a connection or a reply, so requests
+  fail instead of hanging when MongoDB is unreachable or the pool is exhausted.
+- ``MONGO_PUBLIC_READ_PREFERENCE`` (default ``primary``): read preference for
+  the public catalog reads, e.g. ``secondaryPreferred`` to keep them off the
+  primary.  ``MONGO_MAX_STALENESS_SECONDS`` (at least 90, checked at startup)
+  excludes lagging secondaries.  Admin reads and all writes always use the primary.
+- ``MONGO_WRITE_CONCERN`` (default ``majority``; a number of members
+  otherwise), ``MONGO_WRITE_CONCERN_JOURNAL``, ``MONGO_WRITE_CONCERN_TIMEOUT_MS``.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Union
+
+from pymongo import read_preferences
+
+READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+# The smallest maxStalenessSeconds MongoDB accepts
+MIN_MAX_STALENESS_SECONDS = 90
+
+
+def _optional_int(name: str, default: Optional[str] = None) -> Optional[int]:
+    value = os.environ.get(name, default)
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    url: str
+    db_name: str
+    max_pool_size: int
+    min_pool_size: int
+    max_idle_time_ms: Optional[int]
+    server_selection_timeout_ms: int
+    connect_timeout_ms: int
+    socket_timeout_ms: Optional[int]
+    wait_queue_timeout_ms: Optional[int]
+    public_read_preference: str
+    max_staleness_seconds: Optional[int]
+    write_concern_w: Union[int, str]
+    write_concern_journal: Optional[bool]
+    write_concern_timeout_ms: Optional[int]
+
+    def client_options(self) -> dict:
+        """Keyword arguments for ``AsyncIOMotorClient``."""
+        options = {
+            "tz_aware": True,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "w": self.write_concern_w,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.write_concern_journal is not None:
+            options["journal"] = self.write_concern_journal
+        if self.write_concern_timeout_ms is not None:
+            options["wTimeoutMS"] = self.write_concern_timeout_ms
+        return options
+
+    def public_read(self):
+        """Read preference for the public catalog reads."""
+        mode = READ_PREFERENCES[self.public_read_preference]
+        if mode is read_preferences.Primary:
+            return mode()
+        return mode(max_staleness=self.max_staleness_seconds or -1)
+
+
+@lru_cache(maxsize=None)
+def mongo_settings() -> MongoSettings:
+    """Read the MongoDB configuration once, after the .env file has been loaded."""
+    read_preference = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'primary')
+    if read_preference not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGO_PUBLIC_READ_PREFERENCE: {read_preference!r}")
+    max_staleness = _optional_int('MONGO_MAX_STALENESS_SECONDS')
+    if max_staleness is not None and max_staleness < MIN_MAX_STALENESS_SECONDS:
+        # pymongo would only reject it at server selection, failing every secondary read
+        raise ValueError(
+            f"MONGO_MAX_STALENESS_SECONDS must be at least {MIN_MAX_STALENESS_SECONDS}, got {max_staleness}"
+        )
+    write_concern = os.environ.get('MONGO_WRITE_CONCERN', 'majority')
+    journal = os.environ.get('MONGO_WRITE_CONCERN_JOURNAL')
+    return MongoSettings(
+        url=os.environ.get('MONGO_URL', ''),
+        db_name=os.environ.get('DB_NAME', ''),
+        max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '50')),
+        min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', '2')),
+        max_idle_time_ms=_optional_int('MONGO_MAX_IDLE_TIME_MS'),
+        server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        connect_timeout_ms=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        socket_timeout_ms=_optional_int('MONGO_SOCKET_TIMEOUT_MS', '30000'),
+        wait_queue_timeout_ms=_optional_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'),
+        public_read_preference=read_preference,
+        max_staleness_seconds=max_staleness,
+        write_concern_w=int(write_concern) if write_concern.isdigit() else write_concern,
+        write_concern_journal=journal.lower() == 'true' if journal else None,
+        write_concern_timeout_ms=_optional_int('MONGO_WRITE_CONCERN_TIMEOUT_MS'),
+    )
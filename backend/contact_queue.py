@@ -0,0 +1,215 @@
+"""Buffered (write-behind) ingestion of contact form submissions.
+
+Enabled with ``CONTACT_WRITE_MODE=buffered``.  Validated messages are appended
+to a local spool file, then put on a bounded in-process queue that a
+background task drains with ``insert_many`` whenever ``batch_size`` messages
+are waiting or ``flush_interval`` seconds have passed.
+
+The spool is append-only and is only truncated once every queued message has
+been written, so a crash of the process loses nothing: on startup the spool is
+replayed.  Replayed messages that had already reached MongoDB are rejected by
+the unique ``id`` index and ignored.  When ``max_size`` messages are waiting,
+including batches held back by a failed flush, ``enqueue`` raises
+``QueueFull`` and the caller should ask the client to retry later; during a
+database outage the backlog therefore stays bounded.
+
+Spool lines are flushed to the operating system but not fsynced, so they
+survive a crash of the worker, not of the host.  The spool directory
+(``CONTACT_SPOOL_PATH``, ``backend/spool`` by default) must be on a persistent
+volume: on a container's own filesystem the spool is lost with the container.
+
+Each process spools to its own file next to ``spool_path``
+(``contact_messages.<hostname>.<pid>.ndjson``) and holds an exclusive
+``flock`` on it while running, so one worker's truncation never touches
+another's lines.  At startup a worker also replays and removes every spool of
+its own host it can lock: those left behind by workers that have exited.
+Spools of other hosts sharing the volume are left alone, since PIDs repeat
+across containers and ``flock`` is not always honoured across hosts; a host's
+orphans are replayed when a worker with the same hostname starts.
+"""
+import asyncio
+import fcntl
+import glob
+import logging
+import os
+import socket
+from pathlib import Path
+from typing import List, Optional
+
+import json_lines
+from database import insert_new
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ContactWriteQueue:
+    def __init__(
+        self,
+        db,
+        spool_path: Path,
+        max_size: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        collection: str = "contact_messages",
+    ):
+        self.db = db
+        self.collection = collection
+        self.spool_path = Path(spool_path)
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._failed: List[dict] = []
+        self.process_spool_path: Optional[Path] = None
+        self._spool = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._failed)
+
+    def enqueue(self, doc: dict) -> None:
+        """Spool and queue ``doc``; raises ``QueueFull`` when over capacity.
+
+        Deliberately synchronous: nothing can interleave between the spool
+        write and the queue put, which the truncation in ``_flush`` relies on.
+        """
+        # Batches held back by a failed flush count too, so an outage can't grow the backlog
+        if self.pending >= self.max_size:
+            raise QueueFull()
+        self._spool.write(json_lines.encode(doc) + "\n")
+        self._spool.flush()
+        self._queue.put_nowait(doc)
+
+    async def start(self) -> None:
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        # Taken here rather than in __init__: workers may be forked after import
+        self.process_spool_path = self.spool_path.with_name(
+            f"{self._host_prefix()}{os.getpid()}{self.spool_path.suffix}"
+        )
+        self._spool = open(self.process_spool_path, "a+", encoding="utf-8")
+        # Held until the process exits, which marks this spool as in use
+        fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        await self._replay_spool(self._spool)
+        self._spool.truncate(0)
+        await self._replay_orphans()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = False
+        try:
+            while self._failed or not self._queue.empty():
+                await self._flush(self._drain(self.batch_size))
+            flushed = True
+        except Exception as e:
+            logger.error(f"Contact messages left in spool for replay at next startup: {e}")
+        if self._spool is not None:
+            if flushed:
+                # Removed while still locked, so no other worker replays it meanwhile
+                self.process_spool_path.unlink(missing_ok=True)
+            self._spool.close()
+            self._spool = None
+
+    def _drain(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._failed:
+                # Retry a failed batch even if no new message arrives
+                try:
+                    batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+                except asyncio.TimeoutError:
+                    batch = []
+            else:
+                batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.flush_interval
+                while batch and len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Hand the collected messages to stop() for the final flush
+                self._failed.extend(batch)
+                raise
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush contact messages, will retry: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def _flush(self, batch: List[dict]) -> None:
+        batch, self._failed = self._failed + batch, []
+        if batch:
+            try:
+                await self._insert(batch)
+            except BaseException:
+                # Includes cancellation, so stop() can still write the batch
+                self._failed = batch
+                raise
+        # No await between this check and the truncate, so no enqueue can slip in
+        if self._queue.empty() and self._spool is not None:
+            self._spool.truncate(0)
+
+    async def _insert(self, docs: List[dict]) -> None:
+        await insert_new(self.db[self.collection], docs)
+
+    def _host_prefix(self) -> str:
+        return f"{self.spool_path.stem}.{socket.gethostname()}."
+
+    def _orphan_spools(self) -> List[Path]:
+        pattern = f"{glob.escape(self._host_prefix())}*{self.spool_path.suffix}"
+        candidates = [self.spool_path, *self.spool_path.parent.glob(pattern)]
+        return [path for path in candidates if path.exists() and path != self.process_spool_path]
+
+    async def _replay_orphans(self) -> None:
+        for path in self._orphan_spools():
+            try:
+                spool = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue  # Swept by another worker meanwhile
+            with spool:
+                try:
+                    fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # A running worker's spool
+                if os.fstat(spool.fileno()).st_nlink == 0:
+                    continue  # Already replayed and removed by another worker
+                await self._replay_spool(spool)
+                path.unlink()
+
+    async def _replay_spool(self, spool) -> None:
+        spool.seek(0)
+        docs = []
+        for line in spool:
+            if line.strip():
+                try:
+                    docs.append(json_lines.decode(line))
+                except (ValueError, KeyError):
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping unreadable line in contact spool")
+        for i in range(0, len(docs), self.batch_size):
+            await self._insert(docs[i:i + self.batch_size])
+        if docs:
+            logger.info(f"Replayed {len(docs)} spooled contact messages from {spool.name}")
@@ -0,0 +1,33 @@
+"""Chunked CSV encoding for streaming exports.
+
+Rows are written to a small buffer that is yielded every ``ROWS_PER_CHUNK``
+rows, so memory use stays constant whatever the number of documents.
+"""
+import csv
+import io
+from typing import AsyncIterable, AsyncIterator, Callable, List, Optional
+
+ROWS_PER_CHUNK = 200
+
+
+async def iter_csv(
+    docs: AsyncIterable[dict],
+    columns: List[str],
+    transform: Optional[Callable[[dict], dict]] = None,
+) -> AsyncIterator[str]:
+    """A header for ``columns``, then one row per document, passed through ``transform`` first.
+
+    Fields not in ``columns`` are dropped.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for doc in docs:
+        writer.writerow(transform(doc) if transform is not None else doc)
+        rows += 1
+        if rows % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,36 @@
+"""Keyset pagination cursors.
+
+A cursor holds the sort key of the last document of a page, as a JSON list
+in unpadded URL-safe base64, and the next page is everything sorted after
+it.  Values JSON can't represent (datetimes) are converted by the caller.
+"""
+import base64
+import json
+from typing import Any, List, Sequence, Tuple
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Return the ``size`` values of a cursor, raising ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def after_key(sort: Sequence[Tuple[str, int]], values: Sequence[Any]) -> dict:
+    """Filter for the documents sorted by ``sort`` after the key ``values``."""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {name: value for (name, _), value in zip(sort[:i], values)}
+        clause[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
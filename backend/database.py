@@ -0,0 +1,112 @@
+"""Lazily connected MongoDB handle.
+
+``Database`` is created at import time but only opens the Motor client in the
+app lifespan (``connect``), so importing the server needs neither a reachable
+MongoDB nor ``MONGO_URL``.  Until then any collection access raises.
+
+Attribute and item access are forwarded to the primary database, so existing
+code keeps writing ``db.contact_messages`` or ``db[name]``; ``db.public`` is
+the same database with the public read preference for catalog reads.
+
+Command-line tools open theirs with ``cli_connection``.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from config import MongoSettings, mongo_settings
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class Database:
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self._primary = None
+        self._public = None
+
+    async def connect(self, settings: MongoSettings, event_listeners: Iterable = ()) -> None:
+        """Create the client and open ``min_pool_size`` connections before serving."""
+        if not settings.url or not settings.db_name:
+            raise RuntimeError("MONGO_URL and DB_NAME must be set")
+        client = AsyncIOMotorClient(settings.url, event_listeners=list(event_listeners), **settings.client_options())
+        self.bind(
+            client[settings.db_name],
+            client.get_database(settings.db_name, read_preference=settings.public_read()),
+        )
+        self.client = client
+        # Fails within serverSelectionTimeoutMS if MongoDB is unreachable; concurrent
+        # pings make the pool open its connections now rather than on the first requests
+        await asyncio.gather(*(self._primary.command("ping") for _ in range(max(1, settings.min_pool_size))))
+        logger.info(f"Connected to MongoDB database {settings.db_name!r}")
+
+    def bind(self, primary, public=None) -> None:
+        """Use existing database objects (e.g. an in-memory stand-in for benchmarks)."""
+        self._primary = primary
+        self._public = public if public is not None else primary
+
+    @property
+    def connected(self) -> bool:
+        return self._primary is not None
+
+    @property
+    def public(self):
+        self._require()
+        return self._public
+
+    def _require(self):
+        if self._primary is None:
+            raise RuntimeError("MongoDB is not connected yet; it is opened by the app lifespan")
+        return self._primary
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._require(), name)
+
+    def __getitem__(self, name: str):
+        return self._require()[name]
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self._primary = self._public = None
+
+
+@asynccontextmanager
+async def cli_connection(db: Optional[Database] = None) -> AsyncIterator[Database]:
+    """Connect ``db`` (a new ``Database`` by default) for a command-line tool and close it on exit.
+
+    Reads ``backend/.env`` like the server, and uses the same client settings
+    (pool, timeouts, write concern).
+    """
+    load_dotenv(Path(__file__).parent / '.env')
+    db = db if db is not None else Database()
+    await db.connect(mongo_settings())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def insert_new(collection, docs: List[dict]) -> None:
+    """Insert ``docs`` unordered, skipping those whose unique key is already taken.
+
+    For writes that may be repeated after a crash (a replayed spool, an
+    interrupted archive pass): the copy already stored wins.  Any other write
+    error is raised.
+    """
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
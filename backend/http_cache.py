@@ -0,0 +1,46 @@
+"""Conditional GET helpers (ETag / Last-Modified) for cached public responses."""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+
+
+def _http_date(value: datetime) -> datetime:
+    # Motor returns naive UTC datetimes unless the client is tz_aware
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime], max_age: int) -> Dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_http_date(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """True when the request's validators match, so a 304 can be sent.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since`` (RFC 9110 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: a W/ prefix added by a proxy still matches
+        return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return _http_date(last_modified) <= since
+    return False
@@ -0,0 +1,178 @@
+"""Product image storage and responsive variant generation.
+
+Uploaded originals are stored under ``IMAGE_STORAGE_DIR/<digest>/`` where
+``digest`` is derived from the file content, so every URL is immutable and can
+be cached forever.  Resized WebP (and AVIF, when Pillow supports it) variants
+are generated in a process pool without blocking the upload request; until a
+variant exists, the media route redirects to the original.  File checks run in
+a thread, and each image's ``meta.json`` is read once: it never changes.
+
+An image is described to the frontend by a ``srcset``-ready map::
+
+    {"avif": "/api/media/<digest>/320.avif 320w, ...", "webp": "..."}
+"""
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+VARIANT_QUALITY = {"webp": 80, "avif": 55}
+DIGEST_RE = re.compile(r"^[0-9a-f]{20}$")
+FILENAME_RE = re.compile(r"^(original\.(jpg|png|webp)|\d{2,4}\.(webp|avif))$")
+MEDIA_CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "avif": "image/avif"}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def variant_formats() -> List[str]:
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def _inspect(data: bytes):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+        with Image.open(io.BytesIO(data)) as image:
+            fmt = image.format
+            width, height = ImageOps.exif_transpose(image).size
+    except Exception as e:
+        raise InvalidImage("Not a readable image") from e
+    if fmt not in ORIGINAL_FORMATS:
+        raise InvalidImage(f"Unsupported image format {fmt}")
+    return ORIGINAL_FORMATS[fmt], width, height
+
+
+def generate_variants(directory: str, original: str, widths: List[int], formats: List[str]) -> List[str]:
+    """Write every missing ``<width>.<format>`` file; runs in a worker process."""
+    written = []
+    with Image.open(os.path.join(directory, original)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for width in widths:
+            resized = None
+            for fmt in formats:
+                target = os.path.join(directory, f"{width}.{fmt}")
+                if os.path.exists(target):
+                    continue
+                if resized is None:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image.resize((width, height), Image.LANCZOS)
+                tmp = target + ".tmp"
+                resized.save(tmp, format=fmt.upper(), quality=VARIANT_QUALITY[fmt])
+                os.replace(tmp, target)
+                written.append(target)
+    return written
+
+
+class ImageStore:
+    def __init__(self, root: Path, widths: List[int], base_url: str = "/api/media", max_workers: int = 2):
+        self.root = Path(root)
+        self.widths = sorted(widths)
+        self.base_url = base_url.rstrip("/")
+        self.formats = variant_formats()
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, asyncio.Future] = {}
+        # Parsed meta.json per digest, written once with the original
+        self._meta: Dict[str, dict] = {}
+
+    def _widths_for(self, original_width: int) -> List[int]:
+        # Never upscale: keep the widths below the original, plus the original width
+        widths = [w for w in self.widths if w < original_width]
+        return widths + [original_width] if original_width <= self.widths[-1] else widths
+
+    def _read_meta(self, digest: str) -> Optional[dict]:
+        try:
+            return json.loads((self.root / digest / "meta.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    async def meta(self, digest: str) -> Optional[dict]:
+        """The stored ``meta.json`` of ``digest``, or ``None`` if it was never uploaded."""
+        meta = self._meta.get(digest)
+        if meta is None:
+            meta = await asyncio.to_thread(self._read_meta, digest)
+            # Misses aren't cached: the image may be uploaded later
+            if meta is not None:
+                self._meta[digest] = meta
+        return meta
+
+    def describe(self, digest: str, meta: dict) -> dict:
+        widths = self._widths_for(meta["width"])
+        return {
+            "image": f"{self.base_url}/{digest}/original.{meta['ext']}",
+            "image_variants": {
+                fmt: ", ".join(f"{self.base_url}/{digest}/{w}.{fmt} {w}w" for w in widths)
+                for fmt in self.formats
+            },
+        }
+
+    async def store(self, data: bytes) -> dict:
+        """Save an uploaded original and start generating its variants in the background."""
+        ext, width, height = await asyncio.to_thread(_inspect, data)
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        directory = self.root / digest
+        original = f"original.{ext}"
+        meta = await self.meta(digest)
+        if meta is None:
+            await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread((directory / original).write_bytes, data)
+            meta = {"ext": ext, "width": width, "height": height}
+            await asyncio.to_thread((directory / "meta.json").write_text, json.dumps(meta))
+            self._meta[digest] = meta
+        self._schedule(digest, original, self._widths_for(width))
+        return self.describe(digest, meta)
+
+    def _schedule(self, digest: str, original: str, widths: List[int]) -> None:
+        if digest in self._jobs or not self.formats:
+            return
+        if self._pool is None:
+            # Spawned, not forked: Motor and the threadpool already run threads by now,
+            # and a forked child could inherit one of their locks held
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(
+            self._pool, generate_variants, str(self.root / digest), original, widths, self.formats
+        )
+        self._jobs[digest] = job
+        job.add_done_callback(lambda f: self._finished(digest, f))
+
+    def _finished(self, digest: str, future: asyncio.Future) -> None:
+        self._jobs.pop(digest, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Variant generation failed for image {digest}: {future.exception()}")
+
+    async def resolve(self, digest: str, filename: str) -> Optional[Path]:
+        """Path of a stored file, or ``None`` if the name is invalid or not (yet) on disk."""
+        if not DIGEST_RE.match(digest) or not FILENAME_RE.match(filename):
+            return None
+        path = self.root / digest / filename
+        return path if await asyncio.to_thread(path.exists) else None
+
+    async def original(self, digest: str) -> Optional[str]:
+        if not DIGEST_RE.match(digest):
+            return None
+        meta = await self.meta(digest)
+        return f"original.{meta['ext']}" if meta is not None else None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
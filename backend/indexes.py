@@ -0,0 +1,124 @@
+"""Declarative MongoDB index registry.
+
+``INDEXES`` lists every index the API relies on.  ``ensure_indexes`` creates
+whatever is missing (called at application startup) and ``index_drift``
+compares the registry with what the server actually has.
+
+Run standalone from the backend directory::
+
+    python indexes.py           # create missing indexes, then report drift
+    python indexes.py --check   # only report drift, exit 1 if any
+"""
+import asyncio
+import logging
+import sys
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_id():
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "olive_oil_products": [
+        _unique_id(),
+        IndexModel([("active", ASCENDING), ("order", ASCENDING)], name="active_order"),
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_id"),
+        IndexModel([("sku", ASCENDING)], name="sku_unique", unique=True),
+    ],
+    "kitchenware_products": [
+        _unique_id(),
+        IndexModel([("active", ASCENDING), ("order", ASCENDING)], name="active_order"),
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_id"),
+        IndexModel([("reference", ASCENDING)], name="reference_unique", unique=True),
+    ],
+    "contact_messages": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_desc"),
+        IndexModel([("read", ASCENDING), ("created_at", DESCENDING)], name="read_created_at"),
+        IndexModel([("email", ASCENDING), ("created_at", DESCENDING)], name="email_created_at"),
+    ],
+    "contact_messages_archive": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_desc"),
+        IndexModel([("email", ASCENDING), ("created_at", DESCENDING)], name="email_created_at"),
+    ],
+    "site_settings": [
+        _unique_id(),
+    ],
+    "rate_limits": [
+        IndexModel([("expire_at", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+def _normalize(key, unique) -> dict:
+    # The server may report directions as floats (1.0); text/2d keys are strings
+    return {
+        "key": [(field, d if isinstance(d, str) else int(d)) for field, d in key],
+        "unique": bool(unique),
+    }
+
+
+async def index_drift(db) -> Dict[str, dict]:
+    """Compare ``INDEXES`` with the server, per collection.
+
+    Returns only collections with drift, as
+    ``{"missing": [...], "changed": [...], "extra": [...]}`` of index names.
+    """
+    drift = {}
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        existing.pop("_id_", None)
+        missing, changed = [], []
+        for index in indexes:
+            name = index.document["name"]
+            current = existing.pop(name, None)
+            if current is None:
+                missing.append(name)
+            elif (_normalize(index.document["key"].items(), index.document.get("unique"))
+                  != _normalize(current["key"], current.get("unique"))):
+                changed.append(name)
+        if missing or changed or existing:
+            drift[collection] = {"missing": missing, "changed": changed, "extra": sorted(existing)}
+    return drift
+
+
+async def ensure_indexes(db) -> Dict[str, dict]:
+    """Create every registered index, then return the remaining drift.
+
+    A failing index (e.g. duplicate SKUs blocking a unique index) is logged and
+    skipped so that the others are still created.
+    """
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection}.{index.document['name']}: {e}")
+    drift = await index_drift(db)
+    for collection, report in drift.items():
+        logger.warning(f"Index drift on {collection}: {report}")
+    return drift
+
+
+async def _main(argv: List[str]) -> int:
+    from database import cli_connection
+
+    async with cli_connection() as db:
+        drift = await index_drift(db) if "--check" in argv else await ensure_indexes(db)
+    for collection, report in drift.items():
+        print(f"{collection}: {report}")
+    if not drift:
+        print("Indexes are up to date")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,30 @@
+"""JSON encoding of contact messages for the spool, archive segments and exports.
+
+Datetimes are written as ISO 8601 strings, and ``DATE_FIELDS`` are turned
+back into datetimes on decode.  One document per line, never with a newline
+inside since ``json.dumps`` escapes them.
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+DATE_FIELDS = ("created_at", "archived_at")
+
+
+def json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode(doc: dict) -> str:
+    return json.dumps(doc, default=json_default, ensure_ascii=False)
+
+
+def decode(line: str) -> dict:
+    """Parse one line; raises ValueError for a malformed line or date."""
+    doc = json.loads(line)
+    for field in DATE_FIELDS:
+        if doc.get(field):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
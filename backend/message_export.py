@@ -0,0 +1,47 @@
+"""Streaming CSV / NDJSON export of contact messages.
+
+Rows are encoded straight from the Motor cursor and yielded in small chunks,
+so memory use stays constant whatever the size of the inbox.
+"""
+from datetime import datetime
+from typing import AsyncIterator
+
+import csv_chunks
+import json_lines
+from csv_chunks import ROWS_PER_CHUNK
+
+EXPORT_FIELDS = ["id", "created_at", "name", "email", "company", "subject", "message", "read"]
+EXPORT_SORT = [("created_at", 1), ("id", 1)]
+# Cells starting with these are evaluated as formulas by spreadsheet apps
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_row(doc: dict) -> dict:
+    for field, value in doc.items():
+        if isinstance(value, datetime):
+            doc[field] = value.isoformat()
+        elif isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            # Form input is untrusted: keep it as text in Excel/Sheets
+            doc[field] = "'" + value
+    return doc
+
+
+def iter_csv(cursor) -> AsyncIterator[str]:
+    return csv_chunks.iter_csv(cursor, EXPORT_FIELDS, csv_row)
+
+
+async def iter_ndjson(cursor) -> AsyncIterator[str]:
+    lines = []
+    async for doc in cursor:
+        lines.append(json_lines.encode(doc))
+        if len(lines) == ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,77 @@
+"""Query building for the admin contact-message inbox.
+
+Messages are listed newest first and paginated by keyset on
+``(created_at, id)``: the cursor is the sort key of the last message returned,
+so fetching page N costs the same as fetching page 1 and never skips or repeats
+messages when new ones arrive in between.  Messages whose ``created_at`` is
+still a legacy ISO string (before ``python migrations.py created-at``) are
+listed after all the others rather than breaking the inbox.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+import cursors
+
+MESSAGE_SORT = [("created_at", -1), ("id", -1)]
+FULL_PROJECTION = {"_id": 0}
+SUMMARY_PROJECTION = {"_id": 0, "message": 0}
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def build_message_filter(
+    read: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    email: Optional[str] = None,
+) -> dict:
+    query = {}
+    if read is not None:
+        query["read"] = read
+    if since is not None or until is not None:
+        query["created_at"] = {}
+        if since is not None:
+            query["created_at"]["$gte"] = _utc(since)
+        if until is not None:
+            query["created_at"]["$lt"] = _utc(until)
+    if email:
+        query["email"] = email
+    return query
+
+
+def encode_cursor(message: dict) -> str:
+    created_at = message["created_at"]
+    if not isinstance(created_at, datetime):
+        # A legacy string date not converted yet (see migrations.py)
+        return cursors.encode_cursor([{"legacy": str(created_at)}, message["id"]])
+    return cursors.encode_cursor([_utc(created_at).isoformat(), message["id"]])
+
+
+def decode_cursor(cursor: str):
+    """Return ``(created_at, id)`` from a cursor, raising ValueError if malformed.
+
+    ``created_at`` is a string when the cursor points at a legacy message.
+    """
+    created_at, message_id = cursors.decode_cursor(cursor, 2)
+    if isinstance(created_at, dict) and isinstance(created_at.get("legacy"), str):
+        return created_at["legacy"], message_id
+    try:
+        created_at = _utc(datetime.fromisoformat(created_at))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return created_at, message_id
+
+
+def after_cursor(query: dict, cursor: str) -> dict:
+    """Restrict ``query`` to messages sorted after ``cursor``."""
+    created_at, message_id = decode_cursor(cursor)
+    # Range operators only compare values of the same BSON type
+    keyset = cursors.after_key(MESSAGE_SORT, [created_at, message_id])
+    if isinstance(created_at, datetime):
+        # Newest first, legacy string dates sort after every date
+        keyset["$or"].append({"created_at": {"$type": "string"}})
+    return {"$and": [query, keyset]} if query else keyset
@@ -0,0 +1,275 @@
+"""Prometheus-compatible metrics without extra dependencies.
+
+Metrics are kept in plain dicts guarded by a lock (pymongo listeners run on
+Motor's worker threads) and rendered in the text exposition format on scrape.
+Recording a request costs one ``perf_counter`` pair and two dict updates.
+
+This registry is per process: with several uvicorn workers, scrape each
+worker (or run one worker per pod) rather than relying on a shared endpoint.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+
+class CallbackGauge(_Metric):
+    """Value read from ``callback`` at scrape time (e.g. cache statistics)."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], kind: str = "gauge"):
+        super().__init__(name, documentation)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {float(self.callback())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _format_labels(self.labelnames + ("le",), labels + (le,))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+            lines.append(f"{self.name}_sum{label_str} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status.",
+    ("method", "route", "status"),
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"),
+))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+mongo_commands = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time.", ("command", "status"),
+))
+mongo_pool_open = registry.register(Gauge(
+    "mongodb_pool_connections", "Open MongoDB connections per server.", ("address",),
+))
+mongo_pool_in_use = registry.register(Gauge(
+    "mongodb_pool_connections_in_use", "MongoDB connections checked out per server.", ("address",),
+))
+mongo_checkout_failures = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason.", ("address", "reason"),
+))
+
+
+def register_callbacks(callbacks: Iterable[Tuple[str, str, Callable[[], float], str]]) -> None:
+    """Register ``(name, help, callback, kind)`` metrics read at scrape time."""
+    for name, documentation, callback, kind in callbacks:
+        registry.register(CallbackGauge(name, documentation, callback, kind))
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route = scope.get("route")
+            template = getattr(route, "path", "unmatched")
+            http_requests.inc(scope["method"], template, status)
+            http_latency.observe(elapsed, scope["method"], template)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Feeds pymongo command timings into ``mongodb_command_duration_seconds``."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_commands.observe(event.duration_micros / 1e6, event.command_name, "ok")
+
+    def failed(self, event):
+        mongo_commands.observe(event.duration_micros / 1e6, event.command_name, "error")
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage for the metrics endpoint and the readiness probe."""
+
+    DEFAULT_MAX_POOL_SIZE = 100
+
+    def __init__(self):
+        self.max_pool_size: Dict[str, int] = {}
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        size = event.options.get("maxPoolSize", self.DEFAULT_MAX_POOL_SIZE)
+        self.max_pool_size[self._address(event)] = size
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        self.max_pool_size.pop(self._address(event), None)
+
+    def connection_created(self, event):
+        mongo_pool_open.inc(self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_open.dec(self._address(event))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_checkout_failures.inc(self._address(event), str(event.reason))
+
+    def connection_checked_out(self, event):
+        mongo_pool_in_use.inc(self._address(event))
+
+    def connection_checked_in(self, event):
+        mongo_pool_in_use.dec(self._address(event))
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-server ``{open, in_use, max_size, utilization}``."""
+        stats = {}
+        for address, max_size in list(self.max_pool_size.items()):
+            in_use = int(mongo_pool_in_use.value(address))
+            stats[address] = {
+                "open": int(mongo_pool_open.value(address)),
+                "in_use": in_use,
+                "max_size": max_size,
+                "utilization": round(in_use / max_size, 3) if max_size else 0.0,
+            }
+        return stats
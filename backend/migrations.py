@@ -0,0 +1,88 @@
+"""One-shot data migrations.
+
+Run from the backend directory::
+
+    python migrations.py created-at [--batch-size 500] [--dry-run]
+
+``created-at`` converts ``contact_messages.created_at`` from the ISO strings
+written by earlier versions into native BSON dates.  It only ever selects
+documents whose ``created_at`` is still a string, so it can be interrupted and
+re-run at any time and picks up where it stopped.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def parse_created_at(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+async def migrate_created_at(db, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Convert string ``created_at`` values to dates in batches of ``batch_size``."""
+    stats = {"converted": 0, "skipped": 0}
+    last_id = None
+    while True:
+        query = {"created_at": {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await db.contact_messages.find(query, {"_id": 1, "created_at": 1}) \
+            .sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = []
+        for doc in batch:
+            try:
+                created_at = parse_created_at(doc["created_at"])
+            except ValueError:
+                logger.warning(f"Skipping message {doc['_id']}: unparseable created_at {doc['created_at']!r}")
+                stats["skipped"] += 1
+                continue
+            # Match on the original value so a concurrent edit is never overwritten
+            operations.append(UpdateOne(
+                {"_id": doc["_id"], "created_at": doc["created_at"]},
+                {"$set": {"created_at": created_at}},
+            ))
+        if operations and not dry_run:
+            result = await db.contact_messages.bulk_write(operations, ordered=False)
+            stats["converted"] += result.modified_count
+        elif dry_run:
+            stats["converted"] += len(operations)
+        logger.info(f"created_at migration: {stats['converted']} converted, {stats['skipped']} skipped")
+    return stats
+
+
+MIGRATIONS = {
+    "created-at": migrate_created_at,
+}
+
+
+async def _main(argv) -> int:
+    from database import cli_connection
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    async with cli_connection() as db:
+        stats = await MIGRATIONS[args.migration](db, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(f"{args.migration}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,135 @@
+"""Generic product collections.
+
+Both catalogs share the same storage layout (``id``, a unique business key,
+``active``, ``order``) and the same public and admin operations.
+``ProductRepository`` implements those once per ``ProductCategory`` and
+server.py registers identical routes for each category.
+
+Lists are never capped: the public catalog is loaded whole into the catalog
+cache, and admin lists are either returned whole or paginated with a keyset
+cursor on ``(order, id)``.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument, UpdateOne
+
+import cursors
+
+PRODUCT_SORT = [("order", 1), ("id", 1)]
+PROJECTION = {"_id": 0}
+
+
+@dataclass(frozen=True)
+class ProductCategory:
+    slug: str
+    collection: str
+    key_field: str
+    key_label: str
+    model: Type[BaseModel]
+    create_model: Type[BaseModel]
+    update_model: Type[BaseModel]
+    defaults: Callable[[], List[dict]]
+
+
+def encode_cursor(product: dict) -> str:
+    return cursors.encode_cursor([product.get("order", 0), product["id"]])
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Return ``(order, id)`` from a cursor, raising ValueError if malformed."""
+    order, product_id = cursors.decode_cursor(cursor, 2)
+    if not isinstance(order, int) or not isinstance(product_id, str):
+        raise ValueError("Invalid cursor")
+    return order, product_id
+
+
+class ProductRepository:
+    def __init__(self, db, cache, category: ProductCategory):
+        self.db = db
+        self.cache = cache
+        self.category = category
+
+    @property
+    def collection(self):
+        return self.db[self.category.collection]
+
+    async def load_active(self) -> List[dict]:
+        """Every active product, in display order (public read preference)."""
+        cursor = self.db.public[self.category.collection].find({"active": True}, PROJECTION).sort(PRODUCT_SORT)
+        return await cursor.to_list(None)
+
+    async def cached(self):
+        """The catalog cache entry holding ``load_active()``."""
+        return await self.cache.get(self.category.collection, self.load_active)
+
+    async def invalidate(self) -> None:
+        await self.cache.invalidate(self.category.collection)
+
+    async def page(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """All products (active or not) after ``cursor``; the second item is the next cursor."""
+        query = {}
+        if cursor:
+            query = cursors.after_key(PRODUCT_SORT, decode_cursor(cursor))
+        find = self.collection.find(query, PROJECTION).sort(PRODUCT_SORT)
+        if limit is None:
+            return await find.to_list(None), None
+        # Fetch one extra document to know whether another page exists
+        products = await find.limit(limit + 1).to_list(limit + 1)
+        if len(products) > limit:
+            products = products[:limit]
+            return products, encode_cursor(products[-1])
+        return products, None
+
+    async def create(self, product: BaseModel) -> dict:
+        """Insert a ``create_model`` instance; raises ``DuplicateKeyError`` on a taken key."""
+        doc = self.category.model(**product.model_dump()).model_dump()
+        await self.collection.insert_one(doc)
+        doc.pop("_id", None)
+        await self.invalidate()
+        return doc
+
+    async def update(self, product_id: str, fields: Dict) -> Optional[dict]:
+        updated = await self.collection.find_one_and_update(
+            {"id": product_id}, {"$set": fields},
+            projection=PROJECTION, return_document=ReturnDocument.AFTER,
+        )
+        if updated is not None:
+            await self.invalidate()
+        return updated
+
+    async def delete(self, product_id: str) -> bool:
+        result = await self.collection.delete_one({"id": product_id})
+        if result.deleted_count:
+            await self.invalidate()
+        return bool(result.deleted_count)
+
+    async def reorder(self, ids: List[str]):
+        """Set ``order`` to each id's position in ``ids`` with a single bulk_write."""
+        operations = [UpdateOne({"id": product_id}, {"$set": {"order": i}}) for i, product_id in enumerate(ids)]
+        result = await self.collection.bulk_write(operations, ordered=False)
+        await self.invalidate()
+        return result
+
+    async def set_active(self, ids: List[str], active: bool):
+        result = await self.collection.update_many({"id": {"$in": ids}}, {"$set": {"active": active}})
+        await self.invalidate()
+        return result
+
+    async def delete_many(self, ids: List[str]):
+        result = await self.collection.delete_many({"id": {"$in": ids}})
+        await self.invalidate()
+        return result
+
+    async def seed_defaults(self) -> bool:
+        """Insert the default products into an empty collection; returns whether it did."""
+        if await self.collection.count_documents({}, limit=1):
+            return False
+        products = self.category.defaults()
+        for i, product in enumerate(products):
+            product.update(id=str(uuid.uuid4()), order=i, active=True)
+        await self.collection.insert_many(products)
+        await self.invalidate()
+        return True
@@ -0,0 +1,145 @@
+"""Token-bucket rate limiting and duplicate detection for public write routes.
+
+Buckets live in a pluggable backend:
+
+- ``MemoryBackend``: per process, no I/O.
+- ``MongoBackend``: one document per bucket in ``rate_limits``, refilled and
+  debited atomically with a single pipeline ``find_one_and_update``, so every
+  worker shares the same counters.  Idle buckets expire through the TTL index
+  on ``expire_at``.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+@dataclass
+class BucketRule:
+    scope: str          # "ip" or "global"
+    capacity: float     # burst size
+    refill_rate: float  # tokens per second
+
+
+class MemoryBackend:
+    """Per-process buckets, at most ``max_keys`` of them.
+
+    Buckets are kept in least-recently-updated order: at the cap, idle buckets
+    go first, then the least recently active ones, so a flood of new keys
+    cannot grow the dict past ``max_keys``.
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rule: BucketRule, cost: float = 1.0) -> Tuple[bool, float]:
+        now = self.clock()
+        # Re-inserted below, which moves the key to the most recently updated end
+        tokens, updated = self._buckets.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_rate)
+        if len(self._buckets) >= self.max_keys:
+            self._prune(now, rule)
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            return True, 0.0
+        self._buckets[key] = (tokens, now)
+        return False, (cost - tokens) / rule.refill_rate
+
+    def _prune(self, now: float, rule: BucketRule) -> None:
+        # Buckets idle long enough to be full again carry no state; past that, evict the least recent
+        idle = rule.capacity / rule.refill_rate
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < idle and len(self._buckets) < self.max_keys:
+                break
+            del self._buckets[key]
+
+
+class MongoBackend:
+    def __init__(self, db, collection: str = "rate_limits"):
+        self.db = db
+        self.collection = collection
+
+    async def take(self, key: str, rule: BucketRule, cost: float = 1.0) -> Tuple[bool, float]:
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [
+            rule.capacity,
+            {"$add": [{"$ifNull": ["$tokens", rule.capacity]}, {"$multiply": [elapsed, rule.refill_rate]}]},
+        ]}
+        enough = {"$gte": ["$tokens", cost]}
+        idle_ms = int(rule.capacity / rule.refill_rate * 1000) + 1000
+        doc = await self.db[self.collection].find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                {"$set": {
+                    "allowed": enough,
+                    "tokens": {"$cond": [enough, {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expire_at": {"$add": ["$$NOW", idle_ms]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (cost - doc["tokens"]) / rule.refill_rate
+
+
+class RateLimiter:
+    def __init__(self, backend, rules: List[BucketRule], prefix: str):
+        self.backend = backend
+        self.rules = rules
+        self.prefix = prefix
+
+    async def check(self, client_ip: str) -> Optional[float]:
+        """Debit every bucket for ``client_ip``; return seconds to wait if any is empty.
+
+        Per-IP buckets are checked first so that a single flooding client does
+        not drain the global bucket for everyone else.
+        """
+        for rule in sorted(self.rules, key=lambda r: r.scope != "ip"):
+            key = f"{self.prefix}:{rule.scope}"
+            if rule.scope == "ip":
+                key += f":{client_ip}"
+            allowed, retry_after = await self.backend.take(key, rule)
+            if not allowed:
+                return retry_after
+        return None
+
+
+class DuplicateDetector:
+    """Remembers content hashes of recent submissions for ``window`` seconds."""
+
+    def __init__(self, window: float, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._seen: Dict[str, float] = {}
+
+    def seen(self, content: bytes) -> bool:
+        """Record ``content`` and return True if it was already seen in the window.
+
+        Recording before the content is stored also rejects a concurrent double
+        submit; call ``forget`` if storing it then fails.
+        """
+        now = self.clock()
+        digest = self._digest(content)
+        if len(self._seen) > 10_000:
+            self._seen = {k: t for k, t in self._seen.items() if now - t < self.window}
+        previous = self._seen.get(digest)
+        if previous is not None and now - previous < self.window:
+            return True
+        self._seen[digest] = now
+        return False
+
+    def forget(self, content: bytes) -> None:
+        self._seen.pop(self._digest(content), None)
+
+    @staticmethod
+    def _digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
@@ -0,0 +1,324 @@
+"""Retention and archival of contact messages.
+
+``contact_messages`` is kept small for the admin inbox: a background task
+periodically moves old messages out of it, oldest first, ``batch_size`` at a
+time.  A message is archived once it is older than ``max_age_days``, or, if
+it has been read, older than ``read_age_days`` (0 archives read messages at
+the next pass).
+
+Modes (``CONTACT_ARCHIVE_MODE``):
+
+- ``off`` (default): messages stay in ``contact_messages`` forever.
+- ``collection``: moved to ``contact_messages_archive`` in the same database.
+- ``segments``: written to gzip-compressed NDJSON files in
+  ``CONTACT_ARCHIVE_DIR``, one per batch, named after the first and last
+  ``created_at`` they hold so searches can skip files outside a date range.
+
+Each batch is written to the archive before it is deleted from the hot
+collection, so a crash in between only leaves a copy in both places: the next
+pass archives it again, which the archive collection's unique ``id`` index
+ignores and segment searches de-duplicate.  With several uvicorn workers a
+lease in ``job_leases`` lets only one of them run a pass at a time; a pass
+stops early if the lease could not be renewed (another worker took it over).
+
+Archived messages are no longer in ``contact_messages``, so with archival on
+(by default read messages go after 30 days) the inbox, ``/admin/stats`` and
+``/admin/messages/export`` only cover the messages still there.  The stats
+report the archive mode and, in ``collection`` mode, the archived count; the
+export sets ``X-Archive-Mode``.  Archived messages are searched with
+``/admin/messages/archive``.
+"""
+import asyncio
+import gzip
+import logging
+import os
+import re
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+import json_lines
+from database import insert_new
+from message_queries import MESSAGE_SORT, after_cursor, build_message_filter, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MODES = ("off", "collection", "segments")
+LEASES_COLLECTION = "job_leases"
+# Renewed after every batch; lets another worker take over if this one dies mid-pass
+LEASE_SECONDS = 300
+SEARCH_FIELDS = ("name", "email", "company", "subject", "message")
+SEGMENT_PATTERN = re.compile(r"^contact_messages-(\d{8}T\d{6})-(\d{8}T\d{6})-[0-9a-f]+\.ndjson\.gz$")
+SEGMENT_TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def _write_segment(directory: Path, docs: List[dict]) -> Path:
+    """Write ``docs`` (oldest first) to a new segment file, atomically."""
+    first, last = docs[0]["created_at"], docs[-1]["created_at"]
+    name = (f"contact_messages-{first.astimezone(timezone.utc):{SEGMENT_TIME_FORMAT}}-"
+            f"{last.astimezone(timezone.utc):{SEGMENT_TIME_FORMAT}}-{uuid.uuid4().hex[:8]}.ndjson.gz")
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / (name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as segment:
+        for doc in docs:
+            segment.write(json_lines.encode(doc) + "\n")
+    with open(tmp, "rb") as written:
+        os.fsync(written.fileno())
+    os.replace(tmp, directory / name)
+    return directory / name
+
+
+def _segment_range(path: Path) -> Optional[Tuple[datetime, datetime]]:
+    match = SEGMENT_PATTERN.match(path.name)
+    if not match:
+        return None
+    first, last = (datetime.strptime(value, SEGMENT_TIME_FORMAT).replace(tzinfo=timezone.utc)
+                   for value in match.groups())
+    # Names are truncated to the second
+    return first, last + timedelta(seconds=1)
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    """Evaluate the subset of MongoDB filters that ``build_message_filter``,
+    ``after_cursor`` and ``text_filter`` produce."""
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(_matches(doc, sub) for sub in condition):
+                return False
+        elif field == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            for op, operand in condition.items():
+                if op == "$type":
+                    if operand != "string" or not isinstance(value, str):
+                        return False
+                elif op == "$regex":
+                    if not isinstance(value, str) or not re.search(operand, value, re.IGNORECASE):
+                        return False
+                elif op == "$options":
+                    continue
+                elif value is None or not isinstance(value, type(operand)):
+                    # Like MongoDB, ranges only match values of the same type
+                    return False
+                elif op == "$gte" and not value >= operand:
+                    return False
+                elif op == "$gt" and not value > operand:
+                    return False
+                elif op == "$lt" and not value < operand:
+                    return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+def text_filter(q: str) -> dict:
+    """Case-insensitive substring match of ``q`` on any of ``SEARCH_FIELDS``."""
+    pattern = re.escape(q)
+    return {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in SEARCH_FIELDS]}
+
+
+def _search_segments(directory: Path, query: dict, since: Optional[datetime], until: Optional[datetime]) -> List[dict]:
+    """Every archived message matching ``query``, read from the relevant segments (runs in a thread)."""
+    found: Dict[str, dict] = {}
+    if not directory.exists():
+        return []
+    for path in sorted(directory.iterdir()):
+        bounds = _segment_range(path)
+        if bounds is None:
+            continue
+        if (since is not None and bounds[1] < since) or (until is not None and bounds[0] >= until):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as segment:
+            for line in segment:
+                if line.strip():
+                    doc = json_lines.decode(line)
+                    if _matches(doc, query):
+                        found[doc["id"]] = doc
+    return list(found.values())
+
+
+class MessageArchiver:
+    def __init__(
+        self,
+        db,
+        mode: str = "off",
+        max_age_days: float = 180,
+        read_age_days: Optional[float] = 30,
+        batch_size: int = 500,
+        interval: float = 3600,
+        segment_dir: Path = Path("archive"),
+        pause: float = 0.05,
+        collection: str = "contact_messages",
+        archive_collection: str = "contact_messages_archive",
+    ):
+        if mode not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown contact archive mode: {mode!r}")
+        self.db = db
+        self.mode = mode
+        self.max_age = timedelta(days=max_age_days)
+        self.read_age = timedelta(days=read_age_days) if read_age_days is not None else None
+        self.batch_size = batch_size
+        self.interval = interval
+        self.segment_dir = Path(segment_dir)
+        self.pause = pause
+        self.collection = collection
+        self.archive_collection = archive_collection
+        self.lease_name = f"{collection}_retention"
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.archived_total = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.running = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def status(self) -> dict:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "archived_total": self.archived_total,
+            "last_run": self.last_run,
+        }
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def trigger(self) -> None:
+        """Run a pass now instead of at the next interval."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Contact message archival failed, will retry: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _due_filter(self, now: datetime) -> dict:
+        rules = [{"created_at": {"$lt": now - self.max_age}}]
+        if self.read_age is not None:
+            rules.append({"read": True, "created_at": {"$lt": now - self.read_age}})
+        return {"$or": rules}
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db[LEASES_COLLECTION].find_one_and_update(
+                {"_id": self.lease_name, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Held by another worker
+            return False
+        return True
+
+    async def _release_lease(self) -> None:
+        await self.db[LEASES_COLLECTION].update_one(
+            {"_id": self.lease_name, "owner": self.owner},
+            {"$set": {"expires_at": datetime.now(timezone.utc)}},
+        )
+
+    async def run_once(self) -> int:
+        """Archive every message currently due, batch by batch; returns how many were moved."""
+        if not self.enabled or not await self._acquire_lease():
+            return 0
+        started = datetime.now(timezone.utc)
+        self.running = True
+        self.last_run = {"started_at": started, "finished_at": None, "archived": 0, "error": None}
+        try:
+            query = self._due_filter(started)
+            while True:
+                docs = await self.db[self.collection].find(query, {"_id": 0}).sort(
+                    [("created_at", 1), ("id", 1)]
+                ).limit(self.batch_size).to_list(self.batch_size)
+                if not docs:
+                    break
+                await self._archive(docs)
+                await self.db[self.collection].delete_many({"id": {"$in": [doc["id"] for doc in docs]}})
+                self.last_run["archived"] += len(docs)
+                self.archived_total += len(docs)
+                if len(docs) < self.batch_size:
+                    break
+                if not await self._acquire_lease():
+                    logger.warning("Lost the contact archival lease to another worker, stopping this pass")
+                    break
+                # Leave room for request handling between batches
+                await asyncio.sleep(self.pause)
+        except Exception as e:
+            self.last_run["error"] = str(e)
+            raise
+        finally:
+            self.running = False
+            self.last_run["finished_at"] = datetime.now(timezone.utc)
+            await self._release_lease()
+        if self.last_run["archived"]:
+            logger.info(f"Archived {self.last_run['archived']} contact messages to {self.mode}")
+        return self.last_run["archived"]
+
+    async def _archive(self, docs: List[dict]) -> None:
+        archived_at = datetime.now(timezone.utc)
+        for doc in docs:
+            doc["archived_at"] = archived_at
+        if self.mode == "segments":
+            await asyncio.to_thread(_write_segment, self.segment_dir, docs)
+            return
+        # Some may already be archived by an interrupted pass
+        await insert_new(self.db[self.archive_collection], docs)
+
+    async def search(
+        self,
+        q: Optional[str] = None,
+        email: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], bool]:
+        """Archived messages, newest first; the second item tells whether more follow.
+
+        Raises ValueError for a malformed cursor.
+        """
+        query = build_message_filter(since=since, until=until, email=email)
+        lower, upper = query.get("created_at", {}).get("$gte"), query.get("created_at", {}).get("$lt")
+        if q:
+            query = {"$and": [query, text_filter(q)]} if query else text_filter(q)
+        if cursor:
+            query = after_cursor(query, cursor)
+            cursor_created_at = decode_cursor(cursor)[0]
+            if isinstance(cursor_created_at, datetime):
+                # Everything after the cursor is at or before its created_at
+                cursor_upper = cursor_created_at + timedelta(microseconds=1)
+                upper = cursor_upper if upper is None else min(upper, cursor_upper)
+        if self.mode != "segments":
+            docs = await self.db[self.archive_collection].find(query, {"_id": 0}).sort(
+                MESSAGE_SORT
+            ).limit(limit + 1).to_list(limit + 1)
+            return docs[:limit], len(docs) > limit
+        docs = await asyncio.to_thread(_search_segments, self.segment_dir, query, lower, upper)
+        docs.sort(key=lambda doc: (doc["created_at"], doc["id"]), reverse=True)
+        return docs[:limit], len(docs) > limit
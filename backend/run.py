@@ -0,0 +1,113 @@
+"""Production entry point: ``python run.py`` from the backend directory.
+
+Runs ``server:app`` under uvicorn with several worker processes and a
+graceful shutdown sequence for rolling deploys.  On SIGTERM each worker:
+
+1. starts failing ``/api/health/ready`` (503 ``draining``) while still serving,
+   for ``DRAIN_SECONDS``, so the load balancer stops sending new requests;
+2. stops accepting connections and waits up to ``GRACEFUL_SHUTDOWN_SECONDS``
+   for in-flight requests to finish;
+3. runs the lifespan shutdown: flushes buffered contact messages, stops the
+   cache watcher and closes the MongoDB client.
+
+Each worker warms its caches in the lifespan startup before uvicorn lets it
+accept connections, so new pods start hot.  The MongoDB pool is per worker:
+keep ``WEB_CONCURRENCY`` x ``MONGO_MAX_POOL_SIZE`` within the server's limits.
+
+Admin tokens must verify on every worker, so with more than one worker the
+signing key (``ADMIN_JWT_SECRET`` or ``ADMIN_JWT_SECRET_FILE``, see auth.py)
+is resolved here before forking, and the server refuses to start without one.
+
+Configuration (flags override the environment): ``HOST`` (default 0.0.0.0),
+``PORT`` (8001), ``WEB_CONCURRENCY`` (number of workers, default 2),
+``DRAIN_SECONDS`` (5), ``GRACEFUL_SHUTDOWN_SECONDS`` (30), ``LOG_LEVEL`` (info).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+from dotenv import load_dotenv
+from uvicorn.supervisors import Multiprocess
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class DrainingServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, drain_seconds: float = 0.0):
+        super().__init__(config)
+        self.drain_seconds = drain_seconds
+        self.draining = False
+
+    def handle_exit(self, sig, frame) -> None:
+        # A second signal, or no drain delay, shuts down right away
+        if self.draining or self.drain_seconds <= 0:
+            super().handle_exit(sig, frame)
+            return
+        self.draining = True
+        # Loaded by this worker from "server:app"
+        server_module = sys.modules.get("server")
+        if server_module is not None:
+            server_module.begin_draining()
+        asyncio.get_event_loop().call_later(self.drain_seconds, super().handle_exit, sig, frame)
+
+
+class Supervisor(Multiprocess):
+    def shutdown(self) -> None:
+        # Signal every worker before waiting, so they drain in parallel rather than in turn
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logger.info(f"Stopping parent process [{self.pid}]")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API with several uvicorn workers")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--drain-seconds", type=float, default=float(os.environ.get("DRAIN_SECONDS", "5")))
+    parser.add_argument("--graceful-timeout", type=int,
+                        default=int(os.environ.get("GRACEFUL_SHUTDOWN_SECONDS", "30")))
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        # Same .env as server.py, which the workers load after forking
+        load_dotenv(Path(__file__).parent / '.env')
+        from auth import jwt_secret
+        try:
+            if not (os.environ.get("ADMIN_JWT_SECRET") or os.environ.get("ADMIN_JWT_SECRET_FILE")):
+                # An ephemeral development key would differ on every worker
+                raise RuntimeError("ADMIN_JWT_SECRET is not set")
+            jwt_secret()
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.error(f"No admin token key shared by the {args.workers} workers: {e}. "
+                         "Set ADMIN_JWT_SECRET, fix ADMIN_JWT_SECRET_FILE or run with --workers 1.")
+            return 1
+
+    config = uvicorn.Config(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+    server = DrainingServer(config, drain_seconds=args.drain_seconds)
+    if config.workers > 1:
+        Supervisor(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+    # Same exit status as the uvicorn CLI when a single worker fails to start
+    return 0 if server.started or config.workers > 1 else 3
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,198 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, Query, UploadFile, File
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
-import secrets
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Literal, NamedTuple, Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+from auth import auth_settings, check_credentials, create_access_token, verify_admin
+from catalog_cache import CacheEntry, CatalogCache
+from config import mongo_settings
+from database import Database
+from compression import CompressionMiddleware
+from metrics import CommandTimer, MetricsMiddleware, PoolMonitor, register_callbacks, registry
+from indexes import ensure_indexes
+from http_cache import cache_headers, is_not_modified
+from snapshots import BROTLI_QUALITY, LANGUAGES, build_snapshot, localize_products
+from singleflight import SingleFlight
+from static_export import ExportSources, StaticExporter, read_manifest
+from search import SearchIndex
+from products import ProductCategory, ProductRepository
+import catalog_io
+from images import MEDIA_CONTENT_TYPES, ImageStore, InvalidImage
+from ttl_cache import TTLCache
+from message_export import EXPORT_FIELDS, EXPORT_FORMATS, EXPORT_SORT
+from contact_queue import ContactWriteQueue, QueueFull
+from retention import MessageArchiver
+from rate_limit import BucketRule, DuplicateDetector, MemoryBackend, MongoBackend, RateLimiter
+from message_queries import (
+    FULL_PROJECTION, MESSAGE_SORT, SUMMARY_PROJECTION,
+    after_cursor, build_message_filter, encode_cursor,
+)
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened by the lifespan handler (see config.py for the settings)
+pool_monitor = PoolMonitor()
+db = Database()
+PUBLIC_READS_ON_PRIMARY = mongo_settings().public_read_preference == 'primary'
+
+# Public catalog cache, invalidated by the admin write routes
+catalog_cache = CatalogCache(
+    db,
+    mode=os.environ.get('CATALOG_CACHE_MODE', 'version'),
+    poll_seconds=float(os.environ.get('CATALOG_CACHE_POLL_SECONDS', '2')),
+    max_age=float(os.environ.get('CATALOG_CACHE_MAX_AGE', '0' if PUBLIC_READS_ON_PRIMARY else '60')),
+    load_timeout=float(os.environ.get('CATALOG_LOAD_TIMEOUT', '10')) or None,
+)
+CATALOG_COLLECTIONS = ("olive_oil_products", "kitchenware_products", "site_settings")
+# Optional write-behind buffering of contact form submissions; put the spool on a
+# persistent volume (see contact_queue.py)
+contact_queue = None
+if os.environ.get('CONTACT_WRITE_MODE', 'direct') == 'buffered':
+    contact_queue = ContactWriteQueue(
+        db,
+        spool_path=Path(os.environ.get('CONTACT_SPOOL_PATH', ROOT_DIR / 'spool' / 'contact_messages.ndjson')),
+        max_size=int(os.environ.get('CONTACT_QUEUE_MAX_SIZE', '1000')),
+        batch_size=int(os.environ.get('CONTACT_QUEUE_BATCH_SIZE', '100')),
+        flush_interval=float(os.environ.get('CONTACT_QUEUE_FLUSH_SECONDS', '1')),
+    )
+# Background archival of old or read contact messages (see retention.py); an
+# empty CONTACT_RETENTION_READ_DAYS archives read messages by age only
+CONTACT_RETENTION_READ_DAYS = os.environ.get('CONTACT_RETENTION_READ_DAYS', '30')
+message_archiver = MessageArchiver(
+    db,
+    mode=os.environ.get('CONTACT_ARCHIVE_MODE', 'off'),
+    max_age_days=float(os.environ.get('CONTACT_RETENTION_DAYS', '180')),
+    read_age_days=float(CONTACT_RETENTION_READ_DAYS) if CONTACT_RETENTION_READ_DAYS else None,
+    batch_size=int(os.environ.get('CONTACT_ARCHIVE_BATCH_SIZE', '500')),
+    interval=float(os.environ.get('CONTACT_ARCHIVE_INTERVAL_SECONDS', '3600')),
+    segment_dir=Path(os.environ.get('CONTACT_ARCHIVE_DIR', ROOT_DIR / 'archive')),
+)
+
+# Contact form abuse protection
+contact_rate_limiter = RateLimiter(
+    MongoBackend(db) if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'mongo' else MemoryBackend(),
+    rules=[
+        BucketRule("ip", float(os.environ.get('CONTACT_IP_BURST', '5')),
+                   float(os.environ.get('CONTACT_IP_PER_MINUTE', '5')) / 60),
+        BucketRule("global", float(os.environ.get('CONTACT_GLOBAL_BURST', '100')),
+                   float(os.environ.get('CONTACT_GLOBAL_PER_MINUTE', '300')) / 60),
+    ],
+    prefix="contact",
+)
+contact_duplicates = DuplicateDetector(float(os.environ.get('CONTACT_DUPLICATE_WINDOW', '60')))
+# Number of reverse proxies (ingress, load balancer) in front of the API.  The
+# per-IP bucket keys on the address the outermost of them saw, taken from
+# X-Forwarded-For; entries further left are set by the client and can be forged.
+# With 0 the socket peer is used, which behind a proxy puts every visitor in the
+# same per-IP bucket (CONTACT_IP_BURST / CONTACT_IP_PER_MINUTE for the whole site).
+# Only use 0 when clients connect directly.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+# Uploaded product images and their responsive variants
+image_store = ImageStore(
+    Path(os.environ.get('IMAGE_STORAGE_DIR', ROOT_DIR / 'media')),
+    widths=[int(w) for w in os.environ.get('IMAGE_WIDTHS', '320,640,1024,1600').split(',')],
+    base_url=os.environ.get('MEDIA_BASE_URL', '/api/media'),
+    max_workers=int(os.environ.get('IMAGE_WORKERS', '2')),
+)
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', str(15 * 1024 * 1024)))
+CATALOG_IMPORT_MAX_BYTES = int(os.environ.get('CATALOG_IMPORT_MAX_BYTES', str(5 * 1024 * 1024)))
+CATALOG_IMPORT_BATCH_SIZE = int(os.environ.get('CATALOG_IMPORT_BATCH_SIZE', '500'))
+
+admin_stats_cache = TTLCache(float(os.environ.get('ADMIN_STATS_TTL', '30')))
+# Readiness results are reused briefly, and concurrent probes share one ping, so
+# frequent probes don't load the database
+readiness_cache = TTLCache(float(os.environ.get('READINESS_CACHE_SECONDS', '2')))
+READINESS_PING_TIMEOUT = float(os.environ.get('READINESS_PING_TIMEOUT', '1'))
+PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', '60'))
+SNAPSHOT_COMPRESSION = os.environ.get('SNAPSHOT_COMPRESSION', 'true').lower() == 'true'
+SNAPSHOT_BROTLI_QUALITY = int(os.environ.get('SNAPSHOT_BROTLI_QUALITY', str(BROTLI_QUALITY)))
+# Concurrent requests for a snapshot that is not built yet wait for the same build
+snapshot_flights = SingleFlight()
+
+# Static copies of the public responses for CDN hosting (see static_export.py)
+static_exporter = StaticExporter(
+    os.environ.get('STATIC_EXPORT_DIR') or None,
+    lambda: export_sources(),
+    debounce_seconds=float(os.environ.get('STATIC_EXPORT_DEBOUNCE_SECONDS', '5')),
+    keep_versions=int(os.environ.get('STATIC_EXPORT_KEEP_VERSIONS', '3')),
+)
+# Regenerated after any admin write to the catalog or settings
+catalog_cache.listeners.append(lambda name: static_exporter.schedule())
+
+register_callbacks([
+    ("catalog_cache_hits_total", "Catalog cache lookups served from memory.", lambda: catalog_cache.hits, "counter"),
+    ("catalog_cache_misses_total", "Catalog cache lookups that hit MongoDB.", lambda: catalog_cache.misses, "counter"),
+    ("catalog_cache_loads_total", "Catalog loads issued to MongoDB after coalescing concurrent misses.",
+     lambda: catalog_cache.loads, "counter"),
+    ("contact_queue_pending", "Buffered contact messages not yet written.",
+     lambda: contact_queue.pending if contact_queue is not None else 0, "gauge"),
+    ("contact_messages_archived_total", "Contact messages moved to the archive by this process.",
+     lambda: message_archiver.archived_total, "counter"),
+])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hashes ADMIN_PASSWORD and loads the token key now rather than on the first login
+    auth_settings()
+    if not db.connected:
+        await db.connect(mongo_settings(), event_listeners=[CommandTimer(), pool_monitor])
+    if os.environ.get('ENSURE_INDEXES', 'true').lower() == 'true':
+        await ensure_indexes(db)
+    if await db.contact_messages.find_one({"created_at": {"$type": "string"}}, {"_id": 1}):
+        logger.error("Some contact messages still have string created_at values: they are listed last "
+                     "and skipped by date filters until you run `python migrations.py created-at`")
+    catalog_cache.start(CATALOG_COLLECTIONS)
+    if contact_queue is not None:
+        await contact_queue.start()
+    message_archiver.start()
+    # uvicorn only starts accepting connections once this has returned
+    if os.environ.get('WARM_CACHES', 'true').lower() == 'true':
+        try:
+            await warm_caches()
+        except Exception as e:
+            logger.warning(f"Cache warm-up failed, serving cold: {e}")
+    static_exporter.schedule()
+    app.state.draining = False
+    try:
+        yield
+    finally:
+        await static_exporter.stop()
+        await message_archiver.stop()
+        if contact_queue is not None:
+            await contact_queue.stop()
+        await catalog_cache.stop()
+        image_store.shutdown()
+        db.close()
 
 # Create the main app without a prefix
-app = FastAPI(title="Tunisia Olive Oil API", version="1.0.0")
+app = FastAPI(title="Tunisia Olive Oil API", version="1.0.0", lifespan=lifespan)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+def begin_draining():
+    """Fail readiness from now on so load balancers stop routing here (see run.py)."""
+    app.state.draining = True
+
+# Create a router with the /api prefix; orjson encodes every JSON response
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 # Security
 security = HTTPBasic()
 
-# Admin credentials (in production, use environment variables)
-ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
-ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'TunisiaOlive2024!')
-
-
-def verify_admin(credentials: HTTPBasicCredentials = Depends(security)):
-    correct_username = secrets.compare_digest(credentials.username, ADMIN_USERNAME)
-    correct_password = secrets.compare_digest(credentials.password, ADMIN_PASSWORD)
-    if not (correct_username and correct_password):
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid credentials",
-            headers={"WWW-Authenticate": "Basic"},
-        )
-    return credentials.username
-
 
 # ==================== MODELS ====================
 
@@ -60,6 +207,33 @@ class ContactMessage(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     read: bool = False
 
+class ContactMessageListItem(BaseModel):
+    """Inbox list entry; ``message`` is omitted in the summary view."""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    name: str
+    email: str
+    company: Optional[str] = None
+    subject: str
+    message: Optional[str] = None
+    created_at: datetime
+    read: bool = False
+
+class ArchivedMessage(ContactMessageListItem):
+    archived_at: Optional[datetime] = None
+
+class ArchiveRun(BaseModel):
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    archived: int
+    error: Optional[str] = None
+
+class ArchiveStatus(BaseModel):
+    mode: str
+    running: bool
+    archived_total: int
+    last_run: Optional[ArchiveRun] = None
+
 class ContactMessageCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     email: str = Field(..., min_length=5, max_length=255)
@@ -83,6 +257,7 @@ class OliveOilProduct(BaseModel):
     description_en: str
     description_fr: str
     image: str
+    image_variants: Optional[Dict[str, str]] = None
     active: bool = True
     order: int = 0
 
@@ -94,6 +269,7 @@ class OliveOilProductCreate(BaseModel):
     description_en: str
     description_fr: str
     image: str
+    image_variants: Optional[Dict[str, str]] = None
     active: bool = True
     order: int = 0
 
@@ -105,6 +281,7 @@ class OliveOilProductUpdate(BaseModel):
     description_en: Optional[str] = None
     description_fr: Optional[str] = None
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None
     active: Optional[bool] = None
     order: Optional[int] = None
 
@@ -119,6 +296,7 @@ class KitchenwareProduct(BaseModel):
     description_en: str
     description_fr: str
     image: str
+    image_variants: Optional[Dict[str, str]] = None
     active: bool = True
     order: int = 0
 
@@ -130,6 +308,7 @@ class KitchenwareProductCreate(BaseModel):
     description_en: str
     description_fr: str
     image: str
+    image_variants: Optional[Dict[str, str]] = None
     active: bool = True
     order: int = 0
 
@@ -141,6 +320,7 @@ class KitchenwareProductUpdate(BaseModel):
     description_en: Optional[str] = None
     description_fr: Optional[str] = None
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None
     active: Optional[bool] = None
     order: Optional[int] = None
 
@@ -160,6 +340,80 @@ class SiteSettingsUpdate(BaseModel):
     company_name: Optional[str] = None
 
 
+class BulkIdsRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+class BulkActiveRequest(BulkIdsRequest):
+    active: bool
+
+class BulkReadRequest(BulkIdsRequest):
+    read: bool = True
+
+class BulkResult(BaseModel):
+    success: bool = True
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    received: int
+    valid: int
+    inserted: int
+    updated: int
+    unchanged: int
+    dry_run: bool
+    errors_total: int
+    errors: List[ImportRowError]
+
+
+class ImageUploadResponse(BaseModel):
+    image: str
+    image_variants: Dict[str, str]
+
+class ProductStats(BaseModel):
+    total: int
+    active: int
+
+class DailyCount(BaseModel):
+    date: str
+    count: int
+
+class MessageStats(BaseModel):
+    """Counts of the inbox (``contact_messages``): archived messages are not included."""
+    total: int
+    unread: int
+    per_day: List[DailyCount]
+    archive_mode: str
+    # Messages moved to contact_messages_archive; None unless archive_mode is "collection"
+    archived: Optional[int] = None
+
+class AdminStats(BaseModel):
+    olive_oil: ProductStats
+    kitchenware: ProductStats
+    messages: MessageStats
+
+
+# Product catalogs: one repository, and one set of routes, per category
+OLIVE_OIL = ProductCategory(
+    slug="olive-oil", collection="olive_oil_products", key_field="sku", key_label="SKU",
+    model=OliveOilProduct, create_model=OliveOilProductCreate, update_model=OliveOilProductUpdate,
+    defaults=lambda: get_default_olive_oil_products(),
+)
+KITCHENWARE = ProductCategory(
+    slug="kitchenware", collection="kitchenware_products", key_field="reference", key_label="Reference",
+    model=KitchenwareProduct, create_model=KitchenwareProductCreate, update_model=KitchenwareProductUpdate,
+    defaults=lambda: get_default_kitchenware_products(),
+)
+product_repos: Dict[str, ProductRepository] = {
+    category.slug: ProductRepository(db, catalog_cache, category) for category in (OLIVE_OIL, KITCHENWARE)
+}
+
+
 # ==================== PUBLIC API ROUTES ====================
 
 @api_router.get("/")
@@ -170,15 +424,89 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "Tunisia Olive Oil API"}
 
+@api_router.get("/health/live")
+async def liveness():
+    # The event loop answering is all liveness means; never touch dependencies here
+    return {"status": "alive"}
+
+async def check_readiness() -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_PING_TIMEOUT)
+        database = {"status": "up", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    except asyncio.TimeoutError:
+        database = {"status": "down", "error": f"ping timed out after {READINESS_PING_TIMEOUT}s"}
+    except Exception as e:
+        database = {"status": "down", "error": str(e)}
+    return {
+        "status": "ready" if database["status"] == "up" else "unavailable",
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "database": database,
+        "pool": pool_monitor.stats(),
+    }
+
+@api_router.get("/health/ready")
+async def readiness():
+    if getattr(app.state, "draining", False):
+        return ORJSONResponse({"status": "draining"}, status_code=503)
+    result = await readiness_cache.get_or_set("ready", check_readiness)
+    return ORJSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
 
 # Contact Form
-@api_router.post("/contact", response_model=ContactMessageResponse)
-async def submit_contact_form(input: ContactMessageCreate):
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS:
+        # Each proxy appends the address it received the request from
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if forwarded:
+            return forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+async def contact_guard(request: Request):
+    """Rejects floods and resubmissions before the body is validated or stored.
+
+    A body only stays recorded as seen if the submission succeeds, so a
+    client retrying after a 503, 500 or 422 is not turned away as a duplicate.
+    """
+    retry_after = await contact_rate_limiter.check(client_ip(request))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+    body = await request.body()
+    if contact_duplicates.seen(body):
+        raise HTTPException(status_code=409, detail="Duplicate submission")
+    # Set by submit_contact_form once the message is stored or spooled
+    request.state.contact_stored = False
+    try:
+        yield
+    finally:
+        if not request.state.contact_stored:
+            contact_duplicates.forget(body)
+
+@api_router.post("/contact", response_model=ContactMessageResponse, dependencies=[Depends(contact_guard)])
+async def submit_contact_form(input: ContactMessageCreate, request: Request):
+    contact_obj = ContactMessage(**input.model_dump())
+    if contact_queue is not None:
+        try:
+            contact_queue.enqueue(contact_obj.model_dump())
+        except QueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many submissions, please try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        request.state.contact_stored = True
+        return ContactMessageResponse(
+            success=True,
+            message="Thank you for your message. We will get back to you soon!",
+            id=contact_obj.id
+        )
     try:
-        contact_obj = ContactMessage(**input.model_dump())
-        doc = contact_obj.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.contact_messages.insert_one(doc)
+        await db.contact_messages.insert_one(contact_obj.model_dump())
+        request.state.contact_stored = True
         return ContactMessageResponse(
             success=True,
             message="Thank you for your message. We will get back to you soon!",
@@ -190,50 +518,361 @@ async def submit_contact_form(input: ContactMessageCreate):
 
 
 # Public Products API
-@api_router.get("/products/olive-oil")
-async def get_olive_oil_products():
-    products = await db.olive_oil_products.find({"active": True}, {"_id": 0}).sort("order", 1).to_list(100)
-    if not products:
-        # Return default products if none in DB
-        return {"products": get_default_olive_oil_products()}
-    return {"products": products}
-
-@api_router.get("/products/kitchenware")
-async def get_kitchenware_products():
-    products = await db.kitchenware_products.find({"active": True}, {"_id": 0}).sort("order", 1).to_list(100)
-    if not products:
-        # Return default products if none in DB
-        return {"products": get_default_kitchenware_products()}
-    return {"products": products}
+async def entry_snapshot(entry, key: str, build_payload):
+    """The pre-serialized snapshot ``key`` of a cache entry, built once in a worker thread."""
+    snapshot = entry.snapshots.get(key)
+    if snapshot is None:
+        snapshot = await snapshot_flights.do((id(entry), key), lambda: build_entry_snapshot(entry, key, build_payload))
+    return snapshot
+
+async def build_entry_snapshot(entry, key: str, build_payload):
+    snapshot = await asyncio.to_thread(
+        lambda: build_snapshot(build_payload(), compress=SNAPSHOT_COMPRESSION, brotli_quality=SNAPSHOT_BROTLI_QUALITY)
+    )
+    entry.snapshots[key] = snapshot
+    return snapshot
+
+async def snapshot_response(request: Request, entry, key: str, build_payload) -> Response:
+    """Serve the snapshot ``key`` of a cache entry with conditional-request handling."""
+    snapshot = await entry_snapshot(entry, key, build_payload)
+    body, encoding, etag = snapshot.variant(request.headers.get("accept-encoding"))
+    headers = cache_headers(etag, entry.updated_at, PUBLIC_CACHE_MAX_AGE)
+    headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, etag, entry.updated_at):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def products_payload(products, lang: Optional[str]):
+    if lang is None:
+        return {"products": products}
+    return {"lang": lang, "products": localize_products(products, lang)}
+
+async def load_site_settings():
+    return await db.public.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
+
+async def site_settings_entry():
+    return await catalog_cache.get("site_settings", load_site_settings)
+
+def active_products(repo: ProductRepository, entry) -> List[dict]:
+    # Return default products if none in DB
+    return entry.value or repo.category.defaults()
+
+class PublicResource(NamedTuple):
+    url: str
+    path: str  # In the static export
+    entry: CacheEntry
+    key: str
+    build_payload: Callable[[], Any]
+
+async def public_resources() -> List[PublicResource]:
+    """Every cacheable public response, with its cache entry and snapshot key."""
+    resources = []
+    for repo in product_repos.values():
+        slug = repo.category.slug
+        entry = await repo.cached()
+        for lang in (None, *LANGUAGES):
+            # Default arguments bind this iteration's values
+            def build_payload(repo=repo, entry=entry, lang=lang):
+                return products_payload(active_products(repo, entry), lang)
+            if lang is None:
+                url, path = f"/api/products/{slug}", f"products/{slug}.json"
+            else:
+                url, path = f"/api/products/{slug}?lang={lang}", f"products/{slug}.{lang}.json"
+            resources.append(PublicResource(url, path, entry, lang or "all", build_payload))
+    settings = await site_settings_entry()
+    resources.append(PublicResource(
+        "/api/settings", "settings.json", settings, "all", lambda: settings.value or SiteSettings().model_dump(),
+    ))
+    return resources
+
+async def export_sources() -> ExportSources:
+    return {resource.url: (resource.path, resource.build_payload) for resource in await public_resources()}
+
+async def warm_caches():
+    """Load the catalog and settings and build their snapshots before serving traffic."""
+    resources = await public_resources()
+    await asyncio.gather(
+        *(entry_snapshot(resource.entry, resource.key, resource.build_payload) for resource in resources),
+        get_search_index(),
+        get_catalog_entry(),
+    )
+
+def entries_changed(state: dict, entries) -> bool:
+    """Whether any cache entry a derived value was built from has been replaced."""
+    return len(state["entries"]) != len(entries) or any(a is not b for a, b in zip(entries, state["entries"]))
+
+def add_public_product_route(repo: ProductRepository):
+    @api_router.get(f"/products/{repo.category.slug}", name=f"get_{repo.category.collection}")
+    async def get_products(request: Request, lang: Optional[str] = Query(None, pattern="^(en|fr)$")):
+        entry = await repo.cached()
+        return await snapshot_response(
+            request, entry, lang or "all", lambda: products_payload(active_products(repo, entry), lang),
+        )
+
+for _repo in product_repos.values():
+    add_public_product_route(_repo)
+
+# Both catalogs and the site settings in one response, rebuilt whenever any of them changes
+catalog_state = {"entries": (), "entry": None}
+
+async def get_catalog_entry() -> CacheEntry:
+    repos = list(product_repos.values())
+    entries = await asyncio.gather(*(repo.cached() for repo in repos), site_settings_entry())
+    if entries_changed(catalog_state, entries):
+        *products, settings = entries
+        modified = [entry.updated_at for entry in entries if entry.updated_at is not None]
+        catalog_state["entry"] = CacheEntry(
+            value={
+                "products": {repo.category.slug: active_products(repo, entry) for repo, entry in zip(repos, products)},
+                "settings": settings.value or SiteSettings().model_dump(),
+            },
+            revision=0,
+            loaded_at=time.monotonic(),
+            updated_at=max(modified, default=None),
+        )
+        catalog_state["entries"] = tuple(entries)
+    return catalog_state["entry"]
+
+@api_router.get("/catalog")
+async def get_catalog(request: Request, lang: Optional[str] = Query(None, pattern="^(en|fr)$")):
+    entry = await get_catalog_entry()
+
+    def build_payload():
+        catalog = entry.value
+        products = catalog["products"]
+        if lang is not None:
+            products = {slug: localize_products(items, lang) for slug, items in products.items()}
+        return {**({"lang": lang} if lang else {}), "products": products, "settings": catalog["settings"]}
+
+    return await snapshot_response(request, entry, lang or "all", build_payload)
+
+# Search index over both catalogs, rebuilt whenever either cache entry changes
+search_state = {"entries": (), "index": None}
+
+async def get_search_index() -> SearchIndex:
+    repos = list(product_repos.values())
+    entries = await asyncio.gather(*(repo.cached() for repo in repos))
+    if entries_changed(search_state, entries):
+        search_state["index"] = SearchIndex([
+            (repo.category.slug, active_products(repo, entry)) for repo, entry in zip(repos, entries)
+        ])
+        search_state["entries"] = tuple(entries)
+    return search_state["index"]
+
+@api_router.get("/products/search")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    lang: Optional[str] = Query(None, pattern="^(en|fr)$"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    index = await get_search_index()
+    hits = index.search(q, lang=lang, limit=limit)
+    return {
+        "query": q,
+        "lang": lang,
+        "results": [
+            {
+                "category": hit.category,
+                "score": hit.score,
+                "product": localize_products([hit.product], lang)[0] if lang else hit.product,
+            }
+            for hit in hits
+        ],
+    }
 
 @api_router.get("/settings")
-async def get_site_settings():
-    settings = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
-    if not settings:
-        return SiteSettings().model_dump()
-    return settings
+async def get_site_settings(request: Request):
+    entry = await site_settings_entry()
+    return await snapshot_response(request, entry, "all", lambda: entry.value or SiteSettings().model_dump())
+
+
+# Product Media: content-addressed, so every file can be cached forever
+@api_router.get("/media/{digest}/{filename}")
+async def get_media(digest: str, filename: str):
+    path = await image_store.resolve(digest, filename)
+    if path is not None:
+        return FileResponse(
+            path,
+            media_type=MEDIA_CONTENT_TYPES[path.suffix.lstrip(".")],
+            headers={"Cache-Control": "public, max-age=31536000, immutable"},
+        )
+    original = await image_store.original(digest)
+    if original is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Variant still being generated: serve the original, but don't let it be cached here
+    return RedirectResponse(
+        f"{image_store.base_url}/{digest}/{original}",
+        status_code=307,
+        headers={"Cache-Control": "no-store"},
+    )
 
 
 # ==================== ADMIN API ROUTES ====================
 
-# Admin Login Check
+# Admin Login: the only route that checks the password, returns a bearer token
 @api_router.post("/admin/login")
-async def admin_login(username: str = Depends(verify_admin)):
-    return {"success": True, "message": "Login successful", "username": username}
+async def admin_login(credentials: HTTPBasicCredentials = Depends(security)):
+    if not await check_credentials(credentials.username, credentials.password):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid credentials",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    return {
+        "success": True,
+        "message": "Login successful",
+        "username": credentials.username,
+        "access_token": create_access_token(credentials.username),
+        "token_type": "bearer",
+        "expires_in": int(auth_settings().token_ttl.total_seconds()),
+    }
 
 @api_router.get("/admin/verify")
 async def verify_admin_session(username: str = Depends(verify_admin)):
     return {"authenticated": True, "username": username}
 
 
+# Admin - Dashboard Stats
+async def product_stats(collection_name: str) -> ProductStats:
+    total, active = await asyncio.gather(
+        db[collection_name].count_documents({}),
+        db[collection_name].count_documents({"active": True}),
+    )
+    return ProductStats(total=total, active=active)
+
+async def messages_per_day(days: int) -> List[DailyCount]:
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    since = datetime(first_day.year, first_day.month, first_day.day, tzinfo=timezone.utc)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "count": {"$sum": 1},
+        }},
+    ]
+    counts = {doc["_id"]: doc["count"] async for doc in db.contact_messages.aggregate(pipeline)}
+    return [
+        DailyCount(date=day.isoformat(), count=counts.get(day.isoformat(), 0))
+        for day in (first_day + timedelta(days=i) for i in range(days))
+    ]
+
+async def archived_count() -> Optional[int]:
+    if message_archiver.mode != "collection":
+        return None
+    return await db[message_archiver.archive_collection].count_documents({})
+
+async def compute_admin_stats(days: int) -> AdminStats:
+    olive_oil, kitchenware, total, unread, per_day, archived = await asyncio.gather(
+        product_stats("olive_oil_products"),
+        product_stats("kitchenware_products"),
+        db.contact_messages.count_documents({}),
+        db.contact_messages.count_documents({"read": False}),
+        messages_per_day(days),
+        archived_count(),
+    )
+    return AdminStats(
+        olive_oil=olive_oil,
+        kitchenware=kitchenware,
+        messages=MessageStats(
+            total=total, unread=unread, per_day=per_day, archive_mode=message_archiver.mode, archived=archived,
+        ),
+    )
+
+@api_router.get("/admin/stats", response_model=AdminStats)
+async def get_admin_stats(days: int = Query(14, ge=1, le=90), username: str = Depends(verify_admin)):
+    return await admin_stats_cache.get_or_set(days, lambda: compute_admin_stats(days))
+
+
 # Admin - Contact Messages
-@api_router.get("/admin/messages", response_model=List[ContactMessage])
-async def get_all_messages(username: str = Depends(verify_admin)):
-    messages = await db.contact_messages.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for msg in messages:
-        if isinstance(msg.get('created_at'), str):
-            msg['created_at'] = datetime.fromisoformat(msg['created_at'])
-    return messages
+@api_router.get("/admin/messages", response_model=List[ContactMessageListItem])
+async def get_all_messages(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    read: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    email: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    username: str = Depends(verify_admin),
+):
+    query = build_message_filter(read=read, since=since, until=until, email=email)
+    if cursor:
+        try:
+            query = after_cursor(query, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    projection = SUMMARY_PROJECTION if view == "summary" else FULL_PROJECTION
+    # Fetch one extra document to know whether another page exists
+    messages = await db.contact_messages.find(query, projection).sort(MESSAGE_SORT).to_list(limit + 1)
+    headers = {}
+    if len(messages) > limit:
+        messages = messages[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(messages[-1])
+    # Documents come straight from our own collection: skip response_model re-validation
+    return ORJSONResponse(messages, headers=headers)
+
+@api_router.get("/admin/messages/export")
+async def export_messages(
+    format: Literal["csv", "ndjson"] = "csv",
+    read: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    username: str = Depends(verify_admin),
+):
+    query = build_message_filter(read=read, since=since, until=until)
+    projection = {"_id": 0, **{field: 1 for field in EXPORT_FIELDS}}
+    cursor = db.contact_messages.find(query, projection).sort(EXPORT_SORT).batch_size(500)
+    encode, media_type = EXPORT_FORMATS[format]
+    filename = f"contact_messages-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(
+        encode(cursor),
+        media_type=media_type,
+        # Archived messages are not exported; they are searched with /admin/messages/archive
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Archive-Mode": message_archiver.mode},
+    )
+
+@api_router.get("/admin/messages/archive", response_model=List[ArchivedMessage])
+async def search_archived_messages(
+    q: Optional[str] = Query(None, min_length=2, max_length=200),
+    email: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    username: str = Depends(verify_admin),
+):
+    try:
+        messages, more = await message_archiver.search(
+            q=q, email=email, since=since, until=until, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": encode_cursor(messages[-1])} if more else {}
+    return ORJSONResponse(messages, headers=headers)
+
+@api_router.get("/admin/messages/archive/status", response_model=ArchiveStatus)
+async def archive_status(username: str = Depends(verify_admin)):
+    return message_archiver.status()
+
+@api_router.post("/admin/messages/archive/run", response_model=ArchiveStatus, status_code=202)
+async def run_archive(username: str = Depends(verify_admin)):
+    if not message_archiver.enabled:
+        raise HTTPException(status_code=409, detail="Contact message archival is disabled")
+    message_archiver.trigger()
+    return message_archiver.status()
+
+@api_router.post("/admin/messages/bulk-read", response_model=BulkResult)
+async def bulk_mark_messages_read(request: BulkReadRequest, username: str = Depends(verify_admin)):
+    result = await db.contact_messages.update_many({"id": {"$in": request.ids}}, {"$set": {"read": request.read}})
+    return BulkResult(matched=result.matched_count, modified=result.modified_count)
+
+@api_router.post("/admin/messages/bulk-delete", response_model=BulkResult)
+async def bulk_delete_messages(request: BulkIdsRequest, username: str = Depends(verify_admin)):
+    result = await db.contact_messages.delete_many({"id": {"$in": request.ids}})
+    return BulkResult(deleted=result.deleted_count)
 
 @api_router.put("/admin/messages/{message_id}/read")
 async def mark_message_read(message_id: str, username: str = Depends(verify_admin)):
@@ -250,66 +889,126 @@ async def delete_message(message_id: str, username: str = Depends(verify_admin))
     return {"success": True}
 
 
-# Admin - Olive Oil Products
-@api_router.get("/admin/olive-oil", response_model=List[OliveOilProduct])
-async def admin_get_olive_oil(username: str = Depends(verify_admin)):
-    products = await db.olive_oil_products.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    return products
-
-@api_router.post("/admin/olive-oil", response_model=OliveOilProduct)
-async def admin_create_olive_oil(product: OliveOilProductCreate, username: str = Depends(verify_admin)):
-    product_obj = OliveOilProduct(**product.model_dump())
-    await db.olive_oil_products.insert_one(product_obj.model_dump())
-    return product_obj
-
-@api_router.put("/admin/olive-oil/{product_id}", response_model=OliveOilProduct)
-async def admin_update_olive_oil(product_id: str, product: OliveOilProductUpdate, username: str = Depends(verify_admin)):
-    update_data = {k: v for k, v in product.model_dump().items() if v is not None}
-    if not update_data:
-        raise HTTPException(status_code=400, detail="No data to update")
-    result = await db.olive_oil_products.update_one({"id": product_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    updated = await db.olive_oil_products.find_one({"id": product_id}, {"_id": 0})
-    return updated
-
-@api_router.delete("/admin/olive-oil/{product_id}")
-async def admin_delete_olive_oil(product_id: str, username: str = Depends(verify_admin)):
-    result = await db.olive_oil_products.delete_one({"id": product_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return {"success": True}
-
+# Admin - Products: the same routes for every category
+def add_admin_product_routes(repo: ProductRepository):
+    category = repo.category
+    prefix = f"/admin/{category.slug}"
+    conflict = f"{category.key_label} already exists"
+
+    @api_router.get(prefix, response_model=List[category.model], name=f"admin_list_{category.collection}")
+    async def list_products(
+        limit: Optional[int] = Query(None, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        username: str = Depends(verify_admin),
+    ):
+        try:
+            products, next_cursor = await repo.page(limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return ORJSONResponse(products, headers=headers)
+
+    @api_router.post(prefix, response_model=category.model, name=f"admin_create_{category.collection}")
+    async def create_product(product: category.create_model, username: str = Depends(verify_admin)):
+        try:
+            return await repo.create(product)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail=conflict)
+
+    # One round trip per bulk request; declared before the /{product_id} routes
+    @api_router.post(f"{prefix}/reorder", response_model=BulkResult, name=f"admin_reorder_{category.collection}")
+    async def reorder_products(request: BulkIdsRequest, username: str = Depends(verify_admin)):
+        result = await repo.reorder(request.ids)
+        return BulkResult(matched=result.matched_count, modified=result.modified_count)
+
+    @api_router.post(f"{prefix}/bulk-active", response_model=BulkResult, name=f"admin_bulk_active_{category.collection}")
+    async def bulk_set_active(request: BulkActiveRequest, username: str = Depends(verify_admin)):
+        result = await repo.set_active(request.ids, request.active)
+        return BulkResult(matched=result.matched_count, modified=result.modified_count)
+
+    @api_router.post(f"{prefix}/bulk-delete", response_model=BulkResult, name=f"admin_bulk_delete_{category.collection}")
+    async def bulk_delete(request: BulkIdsRequest, username: str = Depends(verify_admin)):
+        result = await repo.delete_many(request.ids)
+        return BulkResult(deleted=result.deleted_count)
+
+    @api_router.post(f"{prefix}/import", response_model=ImportResult, name=f"admin_import_{category.collection}")
+    async def import_catalog(
+        file: UploadFile = File(...),
+        format: Optional[Literal["csv", "json"]] = None,
+        dry_run: bool = False,
+        username: str = Depends(verify_admin),
+    ):
+        data = await file.read(CATALOG_IMPORT_MAX_BYTES + 1)
+        if len(data) > CATALOG_IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="File too large")
+        fmt = format or catalog_io.detect_format(file.filename or "", file.content_type or "")
+        try:
+            return await catalog_io.import_products(
+                repo, catalog_io.parse_rows(data, fmt), CATALOG_IMPORT_BATCH_SIZE, dry_run
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @api_router.get(f"{prefix}/export", name=f"admin_export_{category.collection}")
+    async def export_catalog(format: Literal["csv", "json"] = "csv", username: str = Depends(verify_admin)):
+        filename = f"{category.slug}-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+        return StreamingResponse(
+            catalog_io.iter_export(repo, format),
+            media_type=catalog_io.MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
 
-# Admin - Kitchenware Products
-@api_router.get("/admin/kitchenware", response_model=List[KitchenwareProduct])
-async def admin_get_kitchenware(username: str = Depends(verify_admin)):
-    products = await db.kitchenware_products.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    return products
+    @api_router.put(f"{prefix}/{{product_id}}", response_model=category.model, name=f"admin_update_{category.collection}")
+    async def update_product(product_id: str, product: category.update_model, username: str = Depends(verify_admin)):
+        update_data = {k: v for k, v in product.model_dump().items() if v is not None}
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No data to update")
+        try:
+            updated = await repo.update(product_id, update_data)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail=conflict)
+        if updated is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return updated
+
+    @api_router.delete(f"{prefix}/{{product_id}}", name=f"admin_delete_{category.collection}")
+    async def delete_product(product_id: str, username: str = Depends(verify_admin)):
+        if not await repo.delete(product_id):
+            raise HTTPException(status_code=404, detail="Product not found")
+        return {"success": True}
+
+for _repo in product_repos.values():
+    add_admin_product_routes(_repo)
+
+
+# Admin - Product Images
+@api_router.post("/admin/images", response_model=ImageUploadResponse)
+async def admin_upload_image(file: UploadFile = File(...), username: str = Depends(verify_admin)):
+    data = await file.read(IMAGE_MAX_BYTES + 1)
+    if len(data) > IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Image too large")
+    try:
+        return await image_store.store(data)
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@api_router.post("/admin/kitchenware", response_model=KitchenwareProduct)
-async def admin_create_kitchenware(product: KitchenwareProductCreate, username: str = Depends(verify_admin)):
-    product_obj = KitchenwareProduct(**product.model_dump())
-    await db.kitchenware_products.insert_one(product_obj.model_dump())
-    return product_obj
 
-@api_router.put("/admin/kitchenware/{product_id}", response_model=KitchenwareProduct)
-async def admin_update_kitchenware(product_id: str, product: KitchenwareProductUpdate, username: str = Depends(verify_admin)):
-    update_data = {k: v for k, v in product.model_dump().items() if v is not None}
-    if not update_data:
-        raise HTTPException(status_code=400, detail="No data to update")
-    result = await db.kitchenware_products.update_one({"id": product_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    updated = await db.kitchenware_products.find_one({"id": product_id}, {"_id": 0})
-    return updated
+# Admin - Static Export
+@api_router.get("/admin/static-export")
+async def static_export_status(username: str = Depends(verify_admin)):
+    manifest = await asyncio.to_thread(read_manifest, static_exporter.output) if static_exporter.enabled else None
+    return {
+        "enabled": static_exporter.enabled,
+        "exports": static_exporter.exports,
+        "last_error": static_exporter.last_error,
+        "manifest": manifest,
+    }
 
-@api_router.delete("/admin/kitchenware/{product_id}")
-async def admin_delete_kitchenware(product_id: str, username: str = Depends(verify_admin)):
-    result = await db.kitchenware_products.delete_one({"id": product_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return {"success": True}
+@api_router.post("/admin/static-export")
+async def run_static_export(username: str = Depends(verify_admin)):
+    if not static_exporter.enabled:
+        raise HTTPException(status_code=409, detail="Static export is disabled (set STATIC_EXPORT_DIR)")
+    return await static_exporter.export()
 
 
 # Admin - Site Settings
@@ -325,38 +1024,23 @@ async def admin_update_settings(settings: SiteSettingsUpdate, username: str = De
     update_data = {k: v for k, v in settings.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
-    await db.site_settings.update_one(
-        {"id": "site_settings"}, 
-        {"$set": update_data}, 
-        upsert=True
+    updated = await db.site_settings.find_one_and_update(
+        {"id": "site_settings"},
+        {"$set": update_data},
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
-    updated = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
+    await catalog_cache.invalidate("site_settings")
     return updated
 
 
 # Admin - Initialize Default Products
 @api_router.post("/admin/init-products")
 async def init_default_products(username: str = Depends(verify_admin)):
-    # Check if products already exist
-    oil_count = await db.olive_oil_products.count_documents({})
-    kitchen_count = await db.kitchenware_products.count_documents({})
-    
-    if oil_count == 0:
-        default_oil = get_default_olive_oil_products()
-        for i, p in enumerate(default_oil):
-            p['id'] = str(uuid.uuid4())
-            p['order'] = i
-            p['active'] = True
-        await db.olive_oil_products.insert_many(default_oil)
-    
-    if kitchen_count == 0:
-        default_kitchen = get_default_kitchenware_products()
-        for i, p in enumerate(default_kitchen):
-            p['id'] = str(uuid.uuid4())
-            p['order'] = i
-            p['active'] = True
-        await db.kitchenware_products.insert_many(default_kitchen)
-    
+    # Only empty collections are seeded
+    for repo in product_repos.values():
+        await repo.seed_defaults()
     return {"success": True, "message": "Default products initialized"}
 
 
@@ -533,15 +1217,27 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Archive-Mode"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')),
+    gzip_level=int(os.environ.get('GZIP_LEVEL', '6')),
+    brotli_quality=int(os.environ.get('BROTLI_QUALITY', '4')),
+)
+
+# Outermost, so latency includes compression and CORS handling
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
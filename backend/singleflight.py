@@ -0,0 +1,54 @@
+"""Request coalescing for concurrent identical reads.
+
+``SingleFlight.do(key, fn)`` runs ``fn()`` once for all callers that ask for
+the same ``key`` while a call is in flight: the first caller starts it as a
+task, later callers await the same task, and everyone gets its result or its
+exception.  Nothing is remembered once the call finishes, so the next miss
+after that starts a new call; caching stays the caller's job.
+
+A ``timeout`` only bounds how long one caller waits: the shared call keeps
+running for the others and is not cancelled when a waiter gives up or is
+cancelled itself.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Return the result of ``fn()``, sharing a call already in flight for ``key``.
+
+        ``timeout`` (default: the instance's) raises ``asyncio.TimeoutError``
+        for this caller only.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        timeout = self.timeout if timeout is None else timeout
+        # shield: a waiter timing out or being cancelled must not cancel the shared call
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def forget(self, key: Hashable) -> None:
+        """Make the next ``do(key, ...)`` start a new call; current waiters keep theirs."""
+        self._calls.pop(key, None)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so it isn't reported as unhandled when every waiter gave up
+        if not task.cancelled():
+            task.exception()
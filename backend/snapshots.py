@@ -0,0 +1,86 @@
+"""Pre-serialized, pre-compressed response bodies for cached public data.
+
+A snapshot is built once per cache entry and variant (``all``, ``en``,
+``fr``), so serving a public catalog request is a dictionary lookup plus a
+write of ready-made bytes: no ``jsonable_encoder`` pass, no ``json.dumps`` and
+no per-request compression.
+
+Building one is CPU-bound (serialization, gzip and brotli grow with the
+catalog), so the server builds them in a worker thread.  Brotli defaults to a
+moderate quality: quality 11 costs hundreds of milliseconds on a large catalog
+for a few percent of size, which only pays off for files built once, like the
+static export.
+"""
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+LANGUAGES = ("en", "fr")
+LOCALIZED_FIELDS = ("name", "description")
+COMPRESSED_MIN_SIZE = 512
+BROTLI_QUALITY = 5
+
+
+@dataclass
+class Snapshot:
+    body: bytes
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, accept_encoding: Optional[str]):
+        """Return ``(body, content_encoding, etag)`` for the client's Accept-Encoding."""
+        encoding = pick_encoding(accept_encoding, self.encoded)
+        if encoding is None:
+            return self.body, None, self.etag
+        return self.encoded[encoding], encoding, self.etag[:-1] + "-" + encoding + '"'
+
+
+def pick_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    accepted, refused = set(), set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            # An explicit refusal also holds against "*"
+            refused.add(token.strip().lower())
+            continue
+        accepted.add(token.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and encoding not in refused and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def localize_products(products: List[dict], lang: str) -> List[dict]:
+    """Keep only ``lang``'s name/description, renamed to ``name``/``description``."""
+    localized = []
+    for product in products:
+        item = {}
+        for key, value in product.items():
+            base, _, suffix = key.rpartition("_")
+            if base in LOCALIZED_FIELDS and suffix in LANGUAGES:
+                if suffix == lang:
+                    item[base] = value
+            else:
+                item[key] = value
+        localized.append(item)
+    return localized
+
+
+def build_snapshot(payload: Any, compress: bool = True, brotli_quality: int = BROTLI_QUALITY) -> Snapshot:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    snapshot = Snapshot(body, etag)
+    if compress and len(body) >= COMPRESSED_MIN_SIZE:
+        snapshot.encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            snapshot.encoded["br"] = brotli.compress(body, quality=brotli_quality)
+    return snapshot
@@ -0,0 +1,240 @@
+"""Static export of the public catalog for CDN hosting.
+
+Writes the exact bodies of ``/api/products/{category}`` (every language) and
+``/api/settings`` to ``STATIC_EXPORT_DIR``, with their gzip/brotli copies, so
+the frontend can fetch them from a CDN and use the API only as a fallback::
+
+    manifest.json
+    3f2a9c1e0b7d/products/olive-oil.json      (+ .json.gz, .json.br)
+    3f2a9c1e0b7d/products/olive-oil.en.json
+    3f2a9c1e0b7d/settings.json
+
+The version directory is named after a hash of the contents, so its files
+never change and can be cached forever; only ``manifest.json``, which maps
+each API URL to its file, must be revalidated.  The last
+``STATIC_EXPORT_KEEP_VERSIONS`` versions (default 3) are kept for clients
+still holding an older manifest.
+
+An export is scheduled at startup and whenever an admin write invalidates a
+catalog cache entry, ``STATIC_EXPORT_DEBOUNCE_SECONDS`` (default 5) after the
+last edit, so a burst of edits produces one export.  The standalone
+``catalog_io.py import`` exports right after importing instead; after any
+other write made outside the server, run this module by hand.  The files are
+on this host's disk: with several hosts, upload from the one that runs the
+export.
+
+The bodies are serialized and compressed in the export's worker thread, not
+taken from the server's snapshots: brotli runs at its highest quality, which
+is too slow per request but worth it for files served many times from a CDN.
+
+Run standalone from the backend directory::
+
+    python static_export.py [--output DIR]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from snapshots import Snapshot, build_snapshot
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+VERSION_PATTERN = re.compile(r"^[0-9a-f]{12}$")
+EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+EXPORT_BROTLI_QUALITY = 11
+
+# API URL -> (path relative to the version directory, builder of the response payload)
+ExportSources = Dict[str, Tuple[str, Callable[[], Any]]]
+# API URL -> (path relative to the version directory, snapshot of the response body)
+ExportFiles = Dict[str, Tuple[str, Snapshot]]
+
+
+def _version(files: ExportFiles) -> str:
+    digest = hashlib.sha1()
+    for url, (_, snapshot) in sorted(files.items()):
+        digest.update(f"{url} {snapshot.etag}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def build_files(sources: ExportSources, brotli_quality: int = EXPORT_BROTLI_QUALITY) -> ExportFiles:
+    return {
+        url: (relative, build_snapshot(build_payload(), brotli_quality=brotli_quality))
+        for url, (relative, build_payload) in sources.items()
+    }
+
+
+def write_export(output: Path, sources: ExportSources, keep_versions: int = 3) -> dict:
+    """Build and write the files for ``sources`` and the manifest, keeping
+    ``keep_versions`` versions; returns the manifest.
+
+    Blocking: run it in a thread from the event loop.
+    """
+    files = build_files(sources)
+    output.mkdir(parents=True, exist_ok=True)
+    version = _version(files)
+    target = output / version
+    if not target.exists():
+        staging = output / f".{version}.{uuid.uuid4().hex[:8]}.tmp"
+        for relative, snapshot in files.values():
+            path = staging / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(snapshot.body)
+            for encoding, body in snapshot.encoded.items():
+                path.with_name(path.name + EXTENSIONS[encoding]).write_bytes(body)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another worker wrote the same version first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not target.exists():
+                raise
+    manifest = {
+        "version": version,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "files": {
+            url: {
+                "path": f"{version}/{relative}",
+                "etag": snapshot.etag,
+                "size": len(snapshot.body),
+                "encodings": {
+                    encoding: f"{version}/{relative}{EXTENSIONS[encoding]}" for encoding in snapshot.encoded
+                },
+            }
+            for url, (relative, snapshot) in sorted(files.items())
+        },
+    }
+    _write_atomic(output / MANIFEST, json.dumps(manifest, indent=2).encode())
+    _prune(output, version, keep_versions)
+    return manifest
+
+
+def _prune(output: Path, current: str, keep_versions: int) -> None:
+    versions = sorted(
+        (path for path in output.iterdir() if path.is_dir() and VERSION_PATTERN.match(path.name)),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    kept = 0
+    for path in versions:
+        if path.name == current:
+            continue
+        kept += 1
+        if kept >= keep_versions:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def read_manifest(output: Path) -> Optional[dict]:
+    try:
+        return json.loads((output / MANIFEST).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class StaticExporter:
+    def __init__(
+        self,
+        output: Optional[Path],
+        collect: Callable[[], Awaitable[ExportSources]],
+        debounce_seconds: float = 5.0,
+        keep_versions: int = 3,
+    ):
+        self.output = Path(output) if output else None
+        self.collect = collect
+        self.debounce_seconds = debounce_seconds
+        self.keep_versions = keep_versions
+        self.exports = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.output is not None
+
+    async def export(self) -> dict:
+        """Export now; returns the manifest."""
+        async with self._lock:
+            sources = await self.collect()
+            manifest = await asyncio.to_thread(write_export, self.output, sources, self.keep_versions)
+        self.exports += 1
+        logger.info(f"Static export {manifest['version']} written to {self.output}")
+        return manifest
+
+    def schedule(self) -> None:
+        """Export ``debounce_seconds`` after the last call."""
+        if not self.enabled:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.debounce_seconds, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        else:
+            # Edits made during a running export are picked up by another one
+            self.schedule()
+
+    async def _run(self) -> None:
+        try:
+            await self.export()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Static export failed: {e}")
+
+    async def stop(self) -> None:
+        """Finish a running export and run a scheduled one now, so no edit goes unexported."""
+        pending = self._timer is not None
+        if pending:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if pending:
+            await self._run()
+
+
+async def _main(argv) -> int:
+    parser = argparse.ArgumentParser(description="Export the public catalog as static JSON files")
+    parser.add_argument("--output", help="Directory to write to (default: STATIC_EXPORT_DIR)")
+    args = parser.parse_args(argv)
+
+    # server.py only connects in its lifespan, so importing it here is cheap
+    import server
+    from database import cli_connection
+
+    exporter = server.static_exporter
+    if args.output:
+        exporter.output = Path(args.output)
+    if not exporter.enabled:
+        parser.error("set STATIC_EXPORT_DIR or pass --output")
+    async with cli_connection(server.db):
+        manifest = await exporter.export()
+    print(f"Wrote version {manifest['version']} ({len(manifest['files'])} files) to {exporter.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,32 @@
+"""Small time-based cache for expensive, slightly-stale-tolerant results.
+
+Concurrent misses for the same key share one ``factory()`` call (see
+singleflight.py), so a burst of requests after expiry costs one computation.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from singleflight import SingleFlight
+
+
+class TTLCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._flights = SingleFlight()
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, awaiting ``factory()`` once it has expired."""
+        cached = self._values.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return await self._flights.do(key, lambda: self._load(key, factory))
+
+    async def _load(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        value = await factory()
+        self._values[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self) -> None:
+        self._values.clear()
@@ -14,19 +14,15 @@ export default function AdminDashboard() {
   });
 
   useEffect(() => {
-    const auth = localStorage.getItem('adminAuth');
-    const config = { headers: { Authorization: `Basic ${auth}` } };
+    const token = localStorage.getItem('adminToken');
+    const config = { headers: { Authorization: `Bearer ${token}` } };
 
-    Promise.all([
-      axios.get(`${API}/admin/olive-oil`, config),
-      axios.get(`${API}/admin/kitchenware`, config),
-      axios.get(`${API}/admin/messages`, config)
-    ]).then(([oilRes, kitchenRes, msgRes]) => {
+    axios.get(`${API}/admin/stats`, config).then(({ data }) => {
       setStats({
-        oliveOil: oilRes.data.length,
-        kitchenware: kitchenRes.data.length,
-        messages: msgRes.data.length,
-        unreadMessages: msgRes.data.filter(m => !m.read).length
+        oliveOil: data.olive_oil.total,
+        kitchenware: data.kitchenware.total,
+        messages: data.messages.total,
+        unreadMessages: data.messages.unread
       });
     }).catch(console.error);
   }, []);
@@ -21,23 +21,23 @@ export default function AdminLayout() {
 
   useEffect(() => {
     // Check authentication
-    const auth = localStorage.getItem('adminAuth');
-    if (!auth) {
+    const token = localStorage.getItem('adminToken');
+    if (!token) {
       navigate('/admin');
       return;
     }
 
     // Verify with server
     axios.get(`${API}/admin/verify`, {
-      headers: { Authorization: `Basic ${auth}` }
+      headers: { Authorization: `Bearer ${token}` }
     }).catch(() => {
-      localStorage.removeItem('adminAuth');
+      localStorage.removeItem('adminToken');
       navigate('/admin');
     });
   }, [navigate]);
 
   const handleLogout = () => {
-    localStorage.removeItem('adminAuth');
+    localStorage.removeItem('adminToken');
     navigate('/admin');
   };
 
@@ -15,8 +15,8 @@ export default function AdminLogin() {
 
   useEffect(() => {
     // Check if already logged in
-    const auth = localStorage.getItem('adminAuth');
-    if (auth) {
+    const token = localStorage.getItem('adminToken');
+    if (token) {
       navigate('/admin/dashboard');
     }
   }, [navigate]);
@@ -27,13 +27,12 @@ export default function AdminLogin() {
     setLoading(true);
 
     try {
-      await axios.post(`${API}/admin/login`, {}, {
+      const { data } = await axios.post(`${API}/admin/login`, {}, {
         auth: { username, password }
       });
       
-      // Store credentials (base64 encoded)
-      const auth = btoa(`${username}:${password}`);
-      localStorage.setItem('adminAuth', auth);
+      // Store the short-lived session token, never the password
+      localStorage.setItem('adminToken', data.access_token);
       navigate('/admin/dashboard');
     } catch (err) {
       setError('Identifiants invalides / Invalid credentials');
@@ -0,0 +1,79 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend runs as flat modules from its own directory (uvicorn server:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def mongo_db():
+    """A fresh in-memory Motor database."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)["test"]
+
+
+@pytest.fixture
+def server_db(mongo_db):
+    """``mongo_db``, bound as the server's database with an empty catalog cache."""
+    import server
+
+    server.db.bind(mongo_db)
+    server.catalog_cache.clear()
+    yield mongo_db
+    server.catalog_cache.clear()
+    server.db.close()
+
+
+class ApiClient:
+    """Sends requests to an ASGI app from synchronous tests.
+
+    ``get``/``post``/``request`` each run one request; inside an
+    ``asyncio.run`` scenario, ``async with client.session() as http`` sends
+    several on one event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def with_app(self, app) -> "ApiClient":
+        return ApiClient(app)
+
+    def session(self):
+        import httpx
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test")
+
+    def request(self, method: str, url: str, **kwargs):
+        async def send():
+            async with self.session() as http:
+                return await http.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+@pytest.fixture
+def api_client():
+    """An ``ApiClient`` for the API server; ``with_app`` targets another app."""
+    pytest.importorskip("httpx")
+    import server
+
+    return ApiClient(server.app)
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    """A bearer token for the configured admin, signed with a test key."""
+    import server
+
+    monkeypatch.setenv("ADMIN_JWT_SECRET", "test-secret-" + "x" * 32)
+    server.auth_settings.cache_clear()
+    yield {"Authorization": f"Bearer {server.create_access_token(server.auth_settings().username)}"}
+    server.auth_settings.cache_clear()
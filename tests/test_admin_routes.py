@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from retention import MessageArchiver
+from ttl_cache import TTLCache
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def admin(server_db, api_client, admin_headers, monkeypatch):
+    """Sends authenticated admin requests against the in-memory database."""
+    monkeypatch.setattr(server, "admin_stats_cache", TTLCache(60))
+
+    def request(method, url, **kwargs):
+        return api_client.request(method, url, headers=admin_headers, **kwargs)
+
+    return request
+
+
+def message(i, days_old=0, read=False):
+    return {"id": f"m{i}", "email": "a@example.com", "subject": "Order", "message": "Ten bottles please.",
+            "name": "Ana", "created_at": NOW - timedelta(days=days_old), "read": read}
+
+
+def test_stats_counts(admin, mongo_db):
+    asyncio.run(mongo_db.olive_oil_products.insert_many([
+        {"id": "o1", "active": True}, {"id": "o2", "active": False},
+    ]))
+    asyncio.run(mongo_db.contact_messages.insert_many([
+        message(1), message(2, read=True), message(3, days_old=1), message(4, days_old=20),
+    ]))
+    response = admin("GET", "/api/admin/stats", params={"days": 3})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["olive_oil"] == {"total": 2, "active": 1}
+    assert stats["kitchenware"] == {"total": 0, "active": 0}
+    messages = stats["messages"]
+    assert (messages["total"], messages["unread"]) == (4, 3)
+    today = NOW.date()
+    assert messages["per_day"] == [
+        {"date": (today - timedelta(days=2)).isoformat(), "count": 0},
+        {"date": (today - timedelta(days=1)).isoformat(), "count": 1},
+        {"date": today.isoformat(), "count": 2},
+    ]
+    assert (messages["archive_mode"], messages["archived"]) == ("off", None)
+
+
+def test_stats_report_archived_messages(admin, mongo_db, monkeypatch):
+    monkeypatch.setattr(server, "message_archiver", MessageArchiver(mongo_db, mode="collection"))
+    asyncio.run(mongo_db.contact_messages.insert_one(message(1)))
+    asyncio.run(mongo_db.contact_messages_archive.insert_many([message(2, 40, read=True), message(3, 200)]))
+    messages = admin("GET", "/api/admin/stats").json()["messages"]
+    assert (messages["total"], messages["archive_mode"], messages["archived"]) == (1, "collection", 2)
+
+
+def test_stats_require_a_token(api_client):
+    assert api_client.get("/api/admin/stats").status_code == 401
+
+
+def test_bulk_mark_read_and_unread(admin, mongo_db):
+    asyncio.run(mongo_db.contact_messages.insert_many([message(1), message(2, read=True), message(3)]))
+    response = admin("POST", "/api/admin/messages/bulk-read", json={"ids": ["m1", "m2", "missing"]})
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "matched": 2, "modified": 1, "deleted": 0}
+    response = admin("POST", "/api/admin/messages/bulk-read", json={"ids": ["m2"], "read": False})
+    assert response.json()["modified"] == 1
+
+    async def read_flags():
+        return {doc["id"]: doc["read"] async for doc in mongo_db.contact_messages.find()}
+
+    assert asyncio.run(read_flags()) == {"m1": True, "m2": False, "m3": False}
+
+
+def test_bulk_delete_messages(admin, mongo_db):
+    asyncio.run(mongo_db.contact_messages.insert_many([message(i) for i in range(3)]))
+    response = admin("POST", "/api/admin/messages/bulk-delete", json={"ids": ["m0", "m2", "missing"]})
+    assert response.json() == {"success": True, "matched": 0, "modified": 0, "deleted": 2}
+    assert asyncio.run(mongo_db.contact_messages.distinct("id")) == ["m1"]
+
+
+@pytest.mark.parametrize("body", [{"ids": []}, {"ids": [f"m{i}" for i in range(1001)]}, {}])
+def test_bulk_requests_are_bounded(admin, body):
+    assert admin("POST", "/api/admin/messages/bulk-delete", json=body).status_code == 422
+
+
+def test_bulk_product_routes(admin, mongo_db):
+    asyncio.run(mongo_db.kitchenware_products.insert_many([
+        {"id": f"k{i}", "reference": f"R{i}", "active": True, "order": i} for i in range(3)
+    ]))
+    response = admin("POST", "/api/admin/kitchenware/bulk-active", json={"ids": ["k0", "k1"], "active": False})
+    assert response.json()["modified"] == 2
+    response = admin("POST", "/api/admin/kitchenware/reorder", json={"ids": ["k2", "k0", "k1"]})
+    assert response.json()["matched"] == 3
+    response = admin("POST", "/api/admin/kitchenware/bulk-delete", json={"ids": ["k1"]})
+    assert response.json()["deleted"] == 1
+
+    async def stored():
+        cursor = mongo_db.kitchenware_products.find({}, {"_id": 0, "id": 1, "active": 1}).sort("order")
+        return await cursor.to_list(None)
+
+    assert asyncio.run(stored()) == [{"id": "k2", "active": True}, {"id": "k0", "active": False}]
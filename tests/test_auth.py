@@ -0,0 +1,102 @@
+import asyncio
+import os
+import stat
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    monkeypatch.delenv("ADMIN_JWT_SECRET", raising=False)
+    monkeypatch.setenv("ADMIN_JWT_SECRET_FILE", str(tmp_path / "secret"))
+    monkeypatch.setenv("ADMIN_PASSWORD_HASH", "$2b$04$abcdefghijklmnopqrstuu5Z5pUqXHz7Jj1ZKfZpZLl1UGq2v6j7C")
+    auth.auth_settings.cache_clear()
+    yield
+    auth.auth_settings.cache_clear()
+
+
+def test_secret_is_generated_once_and_private(tmp_path):
+    path = tmp_path / "keys" / "secret"
+    secret = auth.load_or_create_secret(path)
+    assert len(secret) >= 32
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert auth.load_or_create_secret(path) == secret
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_concurrent_workers_share_one_secret(tmp_path):
+    path = tmp_path / "secret"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(auth.load_or_create_secret(path))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8 and len(set(results)) == 1
+
+
+def test_empty_secret_file_is_an_error(tmp_path):
+    path = tmp_path / "secret"
+    path.write_text("\n")
+    with pytest.raises(ValueError):
+        auth.load_or_create_secret(path)
+
+
+def test_secret_is_not_derived_from_password_hash(settings, tmp_path):
+    secret = auth.auth_settings().jwt_secret
+    assert secret == (tmp_path / "secret").read_text().strip()
+    auth.auth_settings.cache_clear()
+    os.remove(tmp_path / "secret")
+    assert auth.auth_settings().jwt_secret != secret
+
+
+def test_explicit_secret_wins(settings, monkeypatch, tmp_path):
+    monkeypatch.setenv("ADMIN_JWT_SECRET", "configured")
+    assert auth.auth_settings().jwt_secret == "configured"
+    assert not (tmp_path / "secret").exists()
+
+
+def test_secret_is_required(settings, monkeypatch):
+    monkeypatch.delenv("ADMIN_JWT_SECRET_FILE")
+    monkeypatch.delenv("ADMIN_ALLOW_EPHEMERAL_SECRET", raising=False)
+    with pytest.raises(RuntimeError, match="ADMIN_JWT_SECRET"):
+        auth.auth_settings()
+
+
+def test_ephemeral_secret_only_when_allowed(settings, monkeypatch, tmp_path):
+    monkeypatch.delenv("ADMIN_JWT_SECRET_FILE")
+    monkeypatch.setenv("ADMIN_ALLOW_EPHEMERAL_SECRET", "true")
+    first = auth.auth_settings().jwt_secret
+    auth.auth_settings.cache_clear()
+    assert auth.auth_settings().jwt_secret != first
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_verify_admin(settings):
+    token = auth.create_access_token("admin")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    assert asyncio.run(auth.verify_admin(credentials)) == "admin"
+    forged = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token[:-2] + "xx")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(auth.verify_admin(forged))
+    assert error.value.status_code == 401
+    with pytest.raises(HTTPException):
+        asyncio.run(auth.verify_admin(None))
+
+
+@pytest.mark.parametrize("value", ["not-a-hash", "$2b$12$tooshort", "TunisiaOlive2024!"])
+def test_malformed_password_hash_fails_at_startup(settings, monkeypatch, value):
+    monkeypatch.setenv("ADMIN_PASSWORD_HASH", value)
+    with pytest.raises(ValueError, match="ADMIN_PASSWORD_HASH"):
+        auth.auth_settings()
+
+
+def test_configured_password_hash_is_checked(settings, monkeypatch):
+    monkeypatch.setenv("ADMIN_PASSWORD_HASH", auth.bcrypt.hashpw(b"s3cret", auth.bcrypt.gensalt(4)).decode())
+    assert asyncio.run(auth.check_credentials("admin", "s3cret"))
+    assert not asyncio.run(auth.check_credentials("admin", "wrong"))
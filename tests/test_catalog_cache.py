@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from catalog_cache import CatalogCache
+
+
+class Loader:
+    def __init__(self, values):
+        self.values = iter(values)
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return next(self.values)
+
+
+def test_concurrent_misses_share_one_load(mongo_db):
+    async def scenario():
+        cache = CatalogCache(mongo_db, mode="local")
+        loader = Loader(["v1"])
+        loader.release.clear()
+        gets = [asyncio.ensure_future(cache.get("products", loader)) for _ in range(10)]
+        await asyncio.sleep(0.01)
+        loader.release.set()
+        entries = await asyncio.gather(*gets)
+        return cache, loader, entries
+
+    cache, loader, entries = asyncio.run(scenario())
+    assert loader.calls == 1 and cache.loads == 1
+    assert all(entry is entries[0] and entry.value == "v1" for entry in entries)
+
+
+def test_load_started_before_invalidate_is_not_stored(mongo_db):
+    async def scenario():
+        cache = CatalogCache(mongo_db, mode="local")
+        loader = Loader(["stale", "fresh"])
+        loader.release.clear()
+        before = asyncio.ensure_future(cache.get("products", loader))
+        await asyncio.sleep(0.01)
+        await cache.invalidate("products")
+        # Requests after the write start their own load instead of joining the old one
+        after = asyncio.ensure_future(cache.get("products", loader))
+        await asyncio.sleep(0.01)
+        loader.release.set()
+        stale, fresh = await before, await after
+        cached = await cache.get("products", loader)
+        return stale, fresh, cached, loader
+
+    stale, fresh, cached, loader = asyncio.run(scenario())
+    assert stale.value == "stale" and fresh.value == "fresh"
+    assert cached is fresh and loader.calls == 2
+
+
+def test_version_mode_reloads_after_another_worker_writes(mongo_db):
+    async def scenario():
+        cache = CatalogCache(mongo_db, mode="version", poll_seconds=0)
+        other_worker = CatalogCache(mongo_db, mode="version", poll_seconds=0)
+        loader = Loader(["v1", "v2"])
+        first = await cache.get("products", loader)
+        assert await cache.get("products", loader) is first
+        await other_worker.invalidate("products")
+        second = await cache.get("products", loader)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first.value, second.value) == ("v1", "v2")
+    assert second.revision == first.revision + 1
+
+
+def test_invalidate_notifies_listeners(mongo_db):
+    cache = CatalogCache(mongo_db, mode="local")
+    notified = []
+    cache.listeners.append(notified.append)
+    asyncio.run(cache.invalidate("site_settings"))
+    assert notified == ["site_settings"]
+
+
+def test_load_timeout(mongo_db):
+    async def scenario():
+        cache = CatalogCache(mongo_db, mode="local", load_timeout=0.01)
+        loader = Loader(["v1"])
+        loader.release.clear()
+        with pytest.raises(asyncio.TimeoutError):
+            await cache.get("products", loader)
+        loader.release.set()
+        # The timed-out request's load still completes and is cached for the next one
+        await asyncio.sleep(0.01)
+        return await cache.get("products", loader), loader.calls
+
+    entry, calls = asyncio.run(scenario())
+    assert entry.value == "v1" and calls == 1
+
+
+def test_failed_revision_check_keeps_serving_the_cached_entry(mongo_db, monkeypatch):
+    async def scenario():
+        cache = CatalogCache(mongo_db, mode="version", poll_seconds=60)
+        loader = Loader(["v1", "v2"])
+        warm = await cache.get("products", loader)
+        checks = []
+
+        async def unreachable(name):
+            checks.append(name)
+            raise TimeoutError("No servers found yet")
+
+        monkeypatch.setattr(cache, "_read_revision", unreachable)
+        warm.checked_at -= 60
+        served = [await cache.get("products", loader) for _ in range(3)]
+        return warm, served, checks, loader.calls
+
+    warm, served, checks, calls = asyncio.run(scenario())
+    assert all(entry is warm for entry in served)
+    # One failed check, then the normal interval applies again
+    assert checks == ["products"] and calls == 1
@@ -0,0 +1,124 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+import catalog_io
+import server
+import static_export
+from catalog_cache import CatalogCache
+from products import ProductRepository
+
+
+def row(reference, **fields):
+    return {
+        "reference": reference, "name_en": f"Board {reference}", "name_fr": f"Planche {reference}",
+        "description_en": "Olive wood", "description_fr": "Bois d'olivier", "image": f"/{reference}.jpg",
+        **fields,
+    }
+
+
+@pytest.fixture
+def repo(mongo_db):
+    asyncio.run(mongo_db.kitchenware_products.create_index("reference", unique=True))
+    return ProductRepository(mongo_db, CatalogCache(mongo_db, mode="local"), server.KITCHENWARE)
+
+
+def run_import(repo, rows, **options):
+    return asyncio.run(catalog_io.import_products(repo, rows, **options))
+
+
+def stored(repo):
+    async def read():
+        return await repo.collection.find({}, {"_id": 0}).sort("reference").to_list(None)
+    return asyncio.run(read())
+
+
+def export(repo, fmt):
+    async def collect():
+        return "".join([chunk async for chunk in catalog_io.iter_export(repo, fmt)])
+    return asyncio.run(collect())
+
+
+def test_insert_then_update(repo):
+    report = run_import(repo, [row("K1", dimensions="30cm"), row("K2")])
+    assert (report["received"], report["valid"], report["inserted"], report["errors_total"]) == (2, 2, 2, 0)
+    products = stored(repo)
+    assert all(product["id"] and product["active"] and product["order"] == 0 for product in products)
+
+    report = run_import(repo, [row("K1", name_en="Board one"), row("K2")])
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (0, 1, 1)
+    first = stored(repo)[0]
+    assert first["name_en"] == "Board one" and first["id"] == products[0]["id"]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_export_import_round_trip_is_unchanged(repo, fmt):
+    run_import(repo, [row("K1", dimensions="30cm", image_variants={"webp": "/k1.webp 480w"}), row("K2", order=3)])
+    before = stored(repo)
+    report = run_import(repo, catalog_io.parse_rows(export(repo, fmt).encode(), fmt))
+    assert (report["valid"], report["inserted"], report["updated"], report["unchanged"]) == (2, 0, 0, 2)
+    assert stored(repo) == before
+
+
+def test_empty_csv_cell_keeps_stored_value(repo):
+    run_import(repo, [row("K1", dimensions="30cm")])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[*row("K1"), "dimensions"])
+    writer.writeheader()
+    writer.writerow({**row("K1", name_en="Renamed"), "dimensions": ""})
+    report = run_import(repo, catalog_io.parse_rows(buffer.getvalue().encode(), "csv"))
+    assert report["updated"] == 1
+    product = stored(repo)[0]
+    assert product["dimensions"] == "30cm" and product["name_en"] == "Renamed"
+
+
+def test_invalid_and_repeated_rows_are_reported(repo):
+    rows = [row("K1"), {"reference": "K2"}, row("K1", name_en="Again"), "not an object"]
+    report = run_import(repo, rows, batch_size=2)
+    assert report["valid"] == 1 and report["inserted"] == 1 and report["errors_total"] == 3
+    errors = {error["row"]: error["errors"] for error in report["errors"]}
+    assert set(errors) == {2, 3, 4}
+    assert errors[3] == ["reference: duplicate of row 1"]
+    assert any(message.startswith("name_en") for message in errors[2])
+    assert stored(repo)[0]["name_en"] == "Board K1"
+
+
+def test_write_errors_map_back_to_rows(repo):
+    asyncio.run(repo.collection.create_index("image", unique=True))
+    report = run_import(repo, [row("K1"), row("K2", image="/K1.jpg"), row("K3")])
+    assert report["valid"] == 2 and report["inserted"] == 2
+    assert [error["row"] for error in report["errors"]] == [2]
+
+
+def test_dry_run_writes_nothing(repo):
+    notified = []
+    repo.cache.listeners.append(notified.append)
+    report = run_import(repo, [row("K1"), {"reference": "K2"}], dry_run=True)
+    assert report["dry_run"] and report["valid"] == 1 and report["errors_total"] == 1
+    assert report["inserted"] == 0 and stored(repo) == [] and notified == []
+
+
+def test_parse_rows_rejects_unreadable_files():
+    with pytest.raises(ValueError):
+        list(catalog_io.parse_rows(b"\xff\xfe", "csv"))
+    with pytest.raises(ValueError):
+        list(catalog_io.parse_rows(b'{"items": []}', "json"))
+
+
+def test_cli_import_refreshes_the_static_export(mongo_db, monkeypatch, tmp_path):
+    async def connect(settings):
+        server.db.bind(mongo_db)
+
+    monkeypatch.setattr(server.db, "connect", connect)
+    monkeypatch.setattr(server.static_exporter, "output", tmp_path / "static")
+    source = tmp_path / "kitchenware.json"
+    source.write_text(json.dumps([row("T99")]))
+
+    assert asyncio.run(catalog_io._main(["import", "kitchenware", str(source)])) == 0
+    manifest = static_export.read_manifest(tmp_path / "static")
+    exported = manifest["files"]["/api/products/kitchenware"]["path"]
+    products = json.loads((tmp_path / "static" / exported).read_text())["products"]
+    assert [product["reference"] for product in products] == ["T99"]
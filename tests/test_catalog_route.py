@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def product(i, **fields):
+    return {"id": f"p{i}", "order": i, "active": True, "name_en": f"Product {i}", "name_fr": f"Produit {i}",
+            "description_en": "In English", "description_fr": "En français", **fields}
+
+
+@pytest.fixture
+def catalog(server_db):
+    async def seed():
+        await server_db.olive_oil_products.insert_many([product(1), product(2), product(3, active=False)])
+        await server_db.kitchenware_products.insert_one(product(4, reference="K-4"))
+        await server_db.site_settings.insert_one({"id": "site_settings", "email": "shop@example.com"})
+
+    asyncio.run(seed())
+    return server_db
+
+
+def test_catalog_holds_both_categories_and_the_settings(catalog, api_client):
+    response = api_client.get("/api/catalog")
+    assert response.status_code == 200
+    payload = response.json()
+    assert "lang" not in payload
+    assert {slug: [item["id"] for item in items] for slug, items in payload["products"].items()} == {
+        "olive-oil": ["p1", "p2"], "kitchenware": ["p4"],
+    }
+    assert payload["products"]["olive-oil"][0]["name_fr"] == "Produit 1"
+    assert payload["settings"]["email"] == "shop@example.com"
+    assert response.headers["vary"] == "Accept-Encoding" and response.headers["etag"]
+
+
+@pytest.mark.parametrize("lang, name, description", [("en", "Product 1", "In English"), ("fr", "Produit 1", "En français")])
+def test_catalog_is_localized(catalog, api_client, lang, name, description):
+    payload = api_client.get("/api/catalog", params={"lang": lang}).json()
+    assert payload["lang"] == lang
+    first = payload["products"]["olive-oil"][0]
+    assert (first["name"], first["description"]) == (name, description)
+    assert not any(key.endswith(("_en", "_fr")) for items in payload["products"].values() for item in items
+                   for key in item)
+    # Settings are not localized
+    assert payload["settings"]["email"] == "shop@example.com"
+
+
+def test_catalog_is_rebuilt_when_one_entry_is_invalidated(catalog, api_client):
+    async def scenario():
+        async with api_client.session() as http:
+            first = await http.get("/api/catalog")
+            entry = server.catalog_state["entry"]
+            unchanged = await http.get("/api/catalog")
+            reused = server.catalog_state["entry"] is entry
+            await catalog.kitchenware_products.insert_one(product(5, reference="K-5"))
+            await server.product_repos["kitchenware"].invalidate()
+            changed = await http.get("/api/catalog")
+        return first, unchanged, reused, changed
+
+    first, unchanged, reused, changed = asyncio.run(scenario())
+    assert reused and unchanged.headers["etag"] == first.headers["etag"]
+    assert changed.headers["etag"] != first.headers["etag"]
+    products = changed.json()["products"]
+    assert [item["id"] for item in products["kitchenware"]] == ["p4", "p5"]
+    assert products["olive-oil"] == first.json()["products"]["olive-oil"]
@@ -0,0 +1,142 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from compression import CompressionMiddleware
+from snapshots import brotli
+
+BODY = b'{"products": [' + b'{"name": "Extra virgin olive oil"},' * 100 + b"{}]}"
+
+
+async def json_body(request):
+    return Response(BODY, media_type="application/json")
+
+
+async def tagged(request):
+    return Response(BODY, media_type="application/json", headers={"ETag": request.query_params["etag"]})
+
+
+async def small(request):
+    return Response(b'{"ok": true}', media_type="application/json")
+
+
+async def image(request):
+    return Response(BODY, media_type="image/png")
+
+
+async def encoded(request):
+    return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+
+async def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"x"'})
+
+
+async def stream(request):
+    async def rows():
+        for i in range(3):
+            yield f"row {i}\n" * 50
+
+    return StreamingResponse(rows(), media_type="text/csv")
+
+
+def make_app(**options):
+    app = Starlette(routes=[
+        Route("/json", json_body), Route("/small", small), Route("/image", image),
+        Route("/encoded", encoded), Route("/tagged", tagged), Route("/304", not_modified), Route("/stream", stream),
+        Route("/text", lambda request: PlainTextResponse("hello " * 500)),
+    ])
+    return CompressionMiddleware(app, **options)
+
+
+@pytest.fixture
+def get(api_client):
+    client = api_client.with_app(make_app())
+
+    def send(path, accept_encoding="gzip"):
+        return client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    return send
+
+
+def test_gzip(get):
+    response = get("/json")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.content == BODY
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli not installed")
+def test_brotli_preferred(get):
+    response = get("/json", "gzip, deflate, br")
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("etag, expected", [('"v1"', 'W/"v1"'), ('W/"v1"', 'W/"v1"')])
+def test_compressed_responses_get_a_weak_etag(get, etag, expected):
+    assert get(f"/tagged?etag={etag}").headers["etag"] == expected
+    # The identity body keeps its strong validator
+    assert get(f"/tagged?etag={etag}", "identity").headers["etag"] == etag
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "", "gzip;q=0"])
+def test_not_accepted(get, accept_encoding):
+    response = get("/json", accept_encoding)
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/304"])
+def test_passthrough(get, path):
+    response = get(path)
+    assert "content-encoding" not in response.headers
+
+
+def test_already_encoded_is_not_compressed_twice(get):
+    response = get("/encoded")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BODY
+
+
+def test_text_types_are_compressed(get):
+    assert get("/text").headers["content-encoding"] == "gzip"
+
+
+def test_stream_flushes_each_chunk():
+    messages = []
+
+    async def scenario():
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # The client never disconnects
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream", "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")], "http_version": "1.1", "scheme": "http",
+            "server": ("test", 80), "client": ("127.0.0.1", 1234), "root_path": "",
+        }
+        await make_app()(scope, receive, send)
+
+    asyncio.run(scenario())
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip" and b"content-length" not in headers
+    decompressor = zlib.decompressobj(31)
+    # Every chunk decompresses on arrival, without waiting for the end of the stream
+    for i in range(3):
+        assert decompressor.decompress(bodies[i]["body"]) == f"row {i}\n".encode() * 50
+    assert bodies[-1]["more_body"] is False
+    assert decompressor.decompress(bodies[-1]["body"]) == b"" and decompressor.eof
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from pymongo import read_preferences
+
+from config import mongo_settings
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Reads the configuration from only the variables a test sets."""
+    for name in list(os.environ):
+        if name.startswith("MONGO_"):
+            monkeypatch.delenv(name)
+    mongo_settings.cache_clear()
+
+    def read(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        mongo_settings.cache_clear()
+        return mongo_settings()
+
+    yield read
+    mongo_settings.cache_clear()
+
+
+def test_defaults(settings):
+    options = settings().client_options()
+    assert options["w"] == "majority"
+    assert (options["maxPoolSize"], options["minPoolSize"]) == (50, 2)
+    assert (options["socketTimeoutMS"], options["waitQueueTimeoutMS"]) == (30000, 5000)
+    assert "maxIdleTimeMS" not in options and "journal" not in options and "wTimeoutMS" not in options
+    assert isinstance(settings().public_read(), read_preferences.Primary)
+
+
+def test_numeric_write_concern_and_its_options(settings):
+    options = settings(
+        MONGO_WRITE_CONCERN="2", MONGO_WRITE_CONCERN_JOURNAL="true", MONGO_WRITE_CONCERN_TIMEOUT_MS="2500",
+    ).client_options()
+    assert (options["w"], options["journal"], options["wTimeoutMS"]) == (2, True, 2500)
+
+
+def test_optional_timeouts_can_be_disabled_or_set(settings):
+    options = settings(
+        MONGO_SOCKET_TIMEOUT_MS="", MONGO_WAIT_QUEUE_TIMEOUT_MS="", MONGO_MAX_IDLE_TIME_MS="60000",
+    ).client_options()
+    assert options["socketTimeoutMS"] is None and options["waitQueueTimeoutMS"] is None
+    assert options["maxIdleTimeMS"] == 60000
+
+
+def test_secondary_reads_with_max_staleness(settings):
+    preference = settings(
+        MONGO_PUBLIC_READ_PREFERENCE="secondaryPreferred", MONGO_MAX_STALENESS_SECONDS="120",
+    ).public_read()
+    assert isinstance(preference, read_preferences.SecondaryPreferred)
+    assert preference.max_staleness == 120
+
+
+def test_unknown_read_preference(settings):
+    with pytest.raises(ValueError, match="MONGO_PUBLIC_READ_PREFERENCE"):
+        settings(MONGO_PUBLIC_READ_PREFERENCE="secondaries")
+
+
+def test_max_staleness_below_the_server_minimum(settings):
+    with pytest.raises(ValueError, match="at least 90"):
+        settings(MONGO_PUBLIC_READ_PREFERENCE="secondaryPreferred", MONGO_MAX_STALENESS_SECONDS="30")
@@ -0,0 +1,241 @@
+import asyncio
+import fcntl
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+
+import contact_queue
+from contact_queue import ContactWriteQueue, QueueFull
+
+
+def message(**fields):
+    return {"id": str(uuid.uuid4()), "name": "n", "created_at": datetime.now(timezone.utc), **fields}
+
+
+def spool_line(doc):
+    return json.dumps({**doc, "created_at": doc["created_at"].isoformat()}) + "\n"
+
+
+def make_queue(db, tmp_path, **options):
+    options = {"batch_size": 10, "flush_interval": 0.01, **options}
+    return ContactWriteQueue(db, tmp_path / "contact_messages.ndjson", **options)
+
+
+def test_spooled_then_flushed_and_truncated(mongo_db, tmp_path):
+    async def scenario():
+        queue = make_queue(mongo_db, tmp_path, flush_interval=60)
+        await queue.start()
+        docs = [message() for _ in range(3)]
+        for doc in docs:
+            queue.enqueue(doc)
+        assert len(queue.process_spool_path.read_text().splitlines()) == 3
+        await queue._flush(queue._drain(10))
+        assert queue.process_spool_path.read_text() == ""
+        assert await mongo_db.contact_messages.count_documents({}) == 3
+        await queue.stop()
+        assert not queue.process_spool_path.exists()
+
+    asyncio.run(scenario())
+
+
+def test_stop_flushes_everything(mongo_db, tmp_path):
+    async def scenario():
+        queue = make_queue(mongo_db, tmp_path, batch_size=2, flush_interval=60)
+        await queue.start()
+        for _ in range(5):
+            queue.enqueue(message())
+        await queue.stop()
+        assert await mongo_db.contact_messages.count_documents({}) == 5
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects(mongo_db, tmp_path):
+    async def scenario():
+        queue = make_queue(mongo_db, tmp_path, max_size=2, flush_interval=60)
+        await queue.start()
+        queue.enqueue(message())
+        queue.enqueue(message())
+        try:
+            queue.enqueue(message())
+        except QueueFull:
+            pass
+        else:
+            raise AssertionError("expected QueueFull")
+        assert len(queue.process_spool_path.read_text().splitlines()) == 2
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_replays_own_spool_after_crash(mongo_db, tmp_path):
+    async def scenario():
+        crashed = make_queue(mongo_db, tmp_path, flush_interval=60)
+        await crashed.start()
+        docs = [message() for _ in range(3)]
+        for doc in docs:
+            crashed.enqueue(doc)
+        # A crash: the flusher dies and the lock is released with nothing written
+        crashed._task.cancel()
+        crashed._spool.close()
+
+        restarted = make_queue(mongo_db, tmp_path)
+        await restarted.start()
+        stored = {doc["id"] async for doc in mongo_db.contact_messages.find()}
+        assert stored == {doc["id"] for doc in docs}
+        assert restarted.process_spool_path.read_text() == ""
+        await restarted.stop()
+
+    asyncio.run(scenario())
+
+
+def test_replays_and_removes_orphaned_spools(mongo_db, tmp_path):
+    async def scenario():
+        orphan = tmp_path / f"contact_messages.{socket.gethostname()}.999999.ndjson"
+        legacy = tmp_path / "contact_messages.ndjson"
+        docs = [message() for _ in range(4)]
+        orphan.write_text("".join(spool_line(doc) for doc in docs[:3]) + '{"torn')
+        legacy.write_text(spool_line(docs[3]))
+        # Already stored before the crash: rejected by the unique id index, not an error
+        await mongo_db.contact_messages.create_index("id", unique=True)
+        await mongo_db.contact_messages.insert_one(dict(docs[0]))
+
+        queue = make_queue(mongo_db, tmp_path)
+        await queue.start()
+        assert await mongo_db.contact_messages.count_documents({}) == 4
+        assert not orphan.exists() and not legacy.exists()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_leaves_spools_of_running_workers_alone(mongo_db, tmp_path):
+    async def scenario():
+        other = tmp_path / f"contact_messages.{socket.gethostname()}.424242.ndjson"
+        doc = message()
+        other.write_text(spool_line(doc))
+        with open(other) as held:
+            fcntl.flock(held.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            queue = make_queue(mongo_db, tmp_path, flush_interval=60)
+            await queue.start()
+            queue.enqueue(message())
+            await queue._flush(queue._drain(10))
+            await queue.stop()
+            assert other.read_text() == spool_line(doc)
+            assert await mongo_db.contact_messages.count_documents({"id": doc["id"]}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_workers_truncate_only_their_own_spool(mongo_db, tmp_path, monkeypatch):
+    async def scenario():
+        queues = []
+        for pid in (1001, 1002):
+            monkeypatch.setattr(contact_queue.os, "getpid", lambda pid=pid: pid)
+            queue = make_queue(mongo_db, tmp_path, flush_interval=60)
+            await queue.start()
+            queues.append(queue)
+        monkeypatch.undo()
+        first, second = queues
+        first.enqueue(message())
+        second.enqueue(message())
+        await first._flush(first._drain(10))
+        assert first.process_spool_path.read_text() == ""
+        assert len(second.process_spool_path.read_text().splitlines()) == 1
+        await first.stop()
+        await second.stop()
+        assert await mongo_db.contact_messages.count_documents({}) == 2
+        assert os.listdir(tmp_path) == []
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_retried_without_new_messages(mongo_db, tmp_path, monkeypatch):
+    async def scenario():
+        queue = make_queue(mongo_db, tmp_path)
+        real_insert = queue._insert
+        failures = []
+
+        async def flaky_insert(docs):
+            if not failures:
+                failures.append(len(docs))
+                raise RuntimeError("not primary")
+            await real_insert(docs)
+
+        monkeypatch.setattr(queue, "_insert", flaky_insert)
+        await queue.start()
+        queue.enqueue(message())
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if failures:
+                break
+        assert queue.pending == 1
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if await mongo_db.contact_messages.count_documents({}):
+                break
+        written = await mongo_db.contact_messages.count_documents({})
+        pending = queue.pending
+        await queue.stop()
+        return failures, written, pending
+
+    assert asyncio.run(scenario()) == ([1], 1, 0)
+
+
+def test_backlog_stays_bounded_while_flushes_fail(mongo_db, tmp_path, monkeypatch):
+    async def scenario():
+        queue = make_queue(mongo_db, tmp_path, max_size=10, batch_size=5)
+
+        async def failing_insert(docs):
+            raise RuntimeError("no primary")
+
+        monkeypatch.setattr(queue, "_insert", failing_insert)
+        await queue.start()
+        accepted = rejected = 0
+        for _ in range(200):
+            try:
+                queue.enqueue(message())
+                accepted += 1
+            except QueueFull:
+                rejected += 1
+            await asyncio.sleep(0.001)
+        pending = queue.pending
+        monkeypatch.undo()
+        await queue.stop()
+        stored = await mongo_db.contact_messages.count_documents({})
+        return accepted, rejected, pending, stored
+
+    accepted, rejected, pending, stored = asyncio.run(scenario())
+    # At most one batch is between the queue and the retry list when enqueue checks
+    assert accepted <= 10 + 5 and rejected == 200 - accepted
+    assert pending <= 10
+    assert stored == accepted
+
+
+def test_hosts_sharing_a_volume_keep_to_their_own_spools(mongo_db, tmp_path, monkeypatch):
+    async def scenario():
+        # Containers on two hosts, both running as PID 7
+        monkeypatch.setattr(contact_queue.os, "getpid", lambda: 7)
+        queues = {}
+        for host in ("pod-a", "pod-b"):
+            monkeypatch.setattr(contact_queue.socket, "gethostname", lambda host=host: host)
+            queues[host] = make_queue(mongo_db, tmp_path, flush_interval=60)
+            await queues[host].start()
+        pod_a, pod_b = queues["pod-a"], queues["pod-b"]
+        assert pod_a.process_spool_path != pod_b.process_spool_path
+        pod_b.enqueue(message())
+        # Also without a working flock between hosts: pod-a's sweep skips pod-b's files
+        fcntl.flock(pod_b._spool.fileno(), fcntl.LOCK_UN)
+        monkeypatch.setattr(contact_queue.socket, "gethostname", lambda: "pod-a")
+        await pod_a._replay_orphans()
+        pod_a.enqueue(message())
+        await pod_a._flush(pod_a._drain(10))
+        assert len(pod_b.process_spool_path.read_text().splitlines()) == 1
+        assert await mongo_db.contact_messages.count_documents({}) == 1
+        await pod_a.stop()
+        await pod_b.stop()
+        assert await mongo_db.contact_messages.count_documents({}) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+
+SUBMISSION = {"name": "Ana", "email": "ana@example.com", "subject": "Order", "message": "Ten bottles please."}
+
+
+@pytest.fixture
+def client(server_db, api_client, monkeypatch):
+    monkeypatch.setattr(server, "contact_queue", None)
+    monkeypatch.setattr(server, "contact_duplicates", server.DuplicateDetector(60))
+    monkeypatch.setattr(server, "contact_rate_limiter", server.RateLimiter(
+        server.MemoryBackend(), rules=[server.BucketRule("ip", 100, 1)], prefix="contact",
+    ))
+    return api_client
+
+
+def post(client, body, headers=None):
+    return client.post("/api/contact", content=json.dumps(body), headers=headers or {})
+
+
+def test_duplicate_rejected(client):
+    assert post(client, SUBMISSION).status_code == 200
+    assert post(client, SUBMISSION).status_code == 409
+
+
+def test_retry_after_failed_insert_is_not_a_duplicate(client, mongo_db, monkeypatch):
+    async def failing_insert(*args, **kwargs):
+        raise RuntimeError("primary stepped down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(type(mongo_db.contact_messages), "insert_one", failing_insert)
+        assert post(client, SUBMISSION).status_code == 500
+    assert post(client, SUBMISSION).status_code == 200
+
+
+def test_retry_after_full_queue_is_not_a_duplicate(client, monkeypatch):
+    class FullQueue:
+        def enqueue(self, doc):
+            raise server.QueueFull()
+
+    monkeypatch.setattr(server, "contact_queue", FullQueue())
+    response = post(client, SUBMISSION)
+    assert response.status_code == 503 and response.headers["retry-after"] == "5"
+    monkeypatch.setattr(server, "contact_queue", None)
+    assert post(client, SUBMISSION).status_code == 200
+
+
+def test_invalid_body_can_be_corrected_and_resent(client):
+    invalid = {**SUBMISSION, "message": "short"}
+    assert post(client, invalid).status_code == 422
+    assert post(client, invalid).status_code == 422
+    assert post(client, SUBMISSION).status_code == 200
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (1, "6.6.6.6, 10.0.0.1", "10.0.0.1"),
+    (2, "6.6.6.6, 10.0.0.1, 10.0.0.2", "10.0.0.1"),
+    (3, "10.0.0.1", "10.0.0.1"),
+    (0, "6.6.6.6", "127.0.0.1"),
+])
+def test_client_ip(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", hops)
+    request = server.Request({
+        "type": "http", "headers": [(b"x-forwarded-for", forwarded.encode())], "client": ("127.0.0.1", 1234),
+    })
+    assert server.client_ip(request) == expected
+
+
+def test_inbox_pages_through_legacy_string_dates(client, mongo_db, admin_headers):
+    headers = admin_headers
+
+    async def scenario():
+        await mongo_db.contact_messages.insert_many([
+            {"id": "a", "email": "a@b.c", "created_at": "2024-01-01T00:00:00"},
+            {"id": "b", "email": "a@b.c", "created_at": "not a date"},
+        ])
+        async with client.session() as http:
+            first = await http.get("/api/admin/messages", params={"limit": 1}, headers=headers)
+            second = await http.get(
+                "/api/admin/messages", params={"limit": 1, "cursor": first.headers["x-next-cursor"]}, headers=headers,
+            )
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 200 and second.status_code == 200
+    assert [m["id"] for m in first.json() + second.json()] == ["b", "a"]
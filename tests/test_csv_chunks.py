@@ -0,0 +1,36 @@
+import asyncio
+import csv
+import io
+
+import csv_chunks
+
+
+async def documents(n):
+    for i in range(n):
+        yield {"id": f"p{i}", "name": f"Product {i}", "internal": "dropped"}
+
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(run())
+
+
+def test_rows_are_yielded_in_chunks():
+    chunks = collect(csv_chunks.iter_csv(documents(csv_chunks.ROWS_PER_CHUNK + 1), ["id", "name"]))
+    assert len(chunks) == 2
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert len(rows) == csv_chunks.ROWS_PER_CHUNK + 1
+    assert rows[0] == {"id": "p0", "name": "Product 0"}
+
+
+def test_transform_is_applied_to_each_row():
+    def upper_name(doc):
+        return {**doc, "name": doc["name"].upper()}
+
+    text = "".join(collect(csv_chunks.iter_csv(documents(2), ["id", "name"], upper_name)))
+    assert text.splitlines() == ["id,name", "p0,PRODUCT 0", "p1,PRODUCT 1"]
+
+
+def test_empty_input_is_just_the_header():
+    assert collect(csv_chunks.iter_csv(documents(0), ["id", "name"])) == ["id,name\r\n"]
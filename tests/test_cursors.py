@@ -0,0 +1,26 @@
+import pytest
+
+from cursors import after_key, decode_cursor, encode_cursor
+
+
+def test_round_trip_without_padding():
+    cursor = encode_cursor(["2024-01-01T00:00:00+00:00", "a"])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == ["2024-01-01T00:00:00+00:00", "a"]
+
+
+@pytest.mark.parametrize("cursor", ["", "%%%", encode_cursor([1]), encode_cursor({"a": 1}), "bm90IGpzb24"])
+def test_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_after_key_follows_sort_directions():
+    assert after_key([("order", 1), ("id", 1)], [3, "b"]) == {"$or": [
+        {"order": {"$gt": 3}},
+        {"order": 3, "id": {"$gt": "b"}},
+    ]}
+    assert after_key([("created_at", -1), ("id", -1)], ["t", "b"]) == {"$or": [
+        {"created_at": {"$lt": "t"}},
+        {"created_at": "t", "id": {"$lt": "b"}},
+    ]}
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from config import mongo_settings
+from database import Database, cli_connection, insert_new
+
+
+def test_insert_new_skips_existing_documents(mongo_db):
+    async def scenario():
+        await mongo_db.items.create_index("id", unique=True)
+        await mongo_db.items.insert_one({"id": "a", "copy": "stored"})
+        await insert_new(mongo_db.items, [{"id": "a", "copy": "replayed"}, {"id": "b", "copy": "replayed"}])
+        return await mongo_db.items.find({}, {"_id": 0}).sort("id").to_list(None)
+
+    assert asyncio.run(scenario()) == [{"id": "a", "copy": "stored"}, {"id": "b", "copy": "replayed"}]
+
+
+def test_insert_new_raises_other_write_errors(mongo_db, monkeypatch):
+    async def failing_insert(docs, ordered):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}, {"index": 1, "code": 121}]})
+
+    collection = mongo_db.items
+    monkeypatch.setattr(collection, "insert_many", failing_insert)
+    with pytest.raises(BulkWriteError):
+        asyncio.run(insert_new(collection, [{"id": "a"}, {"id": "b"}]))
+
+
+def test_cli_connection_closes_on_error(mongo_db, monkeypatch):
+    connected, closed = [], []
+
+    async def connect(self, settings):
+        connected.append(settings)
+        self.bind(mongo_db)
+
+    monkeypatch.setattr(Database, "connect", connect)
+    monkeypatch.setattr(Database, "close", lambda self: closed.append(self))
+    monkeypatch.setenv("MONGO_URL", "mongodb://cli.example:27017")
+    mongo_settings.cache_clear()
+
+    async def fail():
+        async with cli_connection() as db:
+            assert db.connected and db.items is not None
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(fail())
+    mongo_settings.cache_clear()
+    assert connected[0].url == "mongodb://cli.example:27017" and len(closed) == 1
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import server
+from ttl_cache import TTLCache
+
+
+class FakeDatabase:
+    """Stands in for MongoDB in the readiness probe."""
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"ok": 1.0}
+
+
+@pytest.fixture
+def probe(api_client, monkeypatch):
+    monkeypatch.setattr(server, "readiness_cache", TTLCache(60))
+    monkeypatch.setattr(server, "READINESS_PING_TIMEOUT", 0.5)
+    monkeypatch.setattr(server.app.state, "draining", False, raising=False)
+
+    def get_ready(database, concurrency=1):
+        server.db.bind(database)
+
+        async def scenario():
+            async with api_client.session() as http:
+                return await asyncio.gather(*(http.get("/api/health/ready") for _ in range(concurrency)))
+
+        try:
+            return asyncio.run(scenario())
+        finally:
+            server.db.close()
+
+    return get_ready
+
+
+def test_ready_with_database_latency(probe, mongo_db):
+    (response,) = probe(mongo_db)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready" and body["database"]["status"] == "up"
+    assert body["database"]["latency_ms"] >= 0 and isinstance(body["pool"], dict)
+
+
+def test_unavailable_when_mongo_is_down(probe):
+    (response,) = probe(FakeDatabase(error=ConnectionError("No servers found yet")))
+    assert response.status_code == 503
+    assert response.json()["database"] == {"status": "down", "error": "No servers found yet"}
+
+
+def test_unavailable_when_ping_times_out(probe):
+    (response,) = probe(FakeDatabase(delay=2))
+    assert response.status_code == 503
+    assert response.json()["database"]["error"] == "ping timed out after 0.5s"
+
+
+def test_concurrent_probes_share_one_ping(probe):
+    database = FakeDatabase(delay=0.05)
+    responses = probe(database, concurrency=20)
+    assert {response.status_code for response in responses} == {200}
+    assert database.pings == 1
+
+
+def test_draining_fails_readiness_but_not_liveness(probe, api_client, monkeypatch):
+    monkeypatch.setattr(server.app.state, "draining", True)
+    database = FakeDatabase()
+    (response,) = probe(database)
+    assert response.status_code == 503 and response.json() == {"status": "draining"}
+    assert database.pings == 0
+    assert api_client.get("/api/health/live").status_code == 200
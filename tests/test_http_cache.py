@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from starlette.requests import Request
+
+from http_cache import cache_headers, is_not_modified
+
+ETAG = '"abc123"'
+MODIFIED = datetime(2026, 3, 4, 5, 6, 7, 890000, tzinfo=timezone.utc)
+HTTP_MODIFIED = "Wed, 04 Mar 2026 05:06:07 GMT"
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_cache_headers():
+    headers = cache_headers(ETAG, MODIFIED, 60)
+    assert headers == {
+        "ETag": ETAG,
+        "Cache-Control": "public, max-age=60, must-revalidate",
+        "Last-Modified": HTTP_MODIFIED,
+    }
+    assert "Last-Modified" not in cache_headers(ETAG, None, 60)
+    # Naive datetimes from Motor are UTC
+    assert cache_headers(ETAG, MODIFIED.replace(tzinfo=None), 60)["Last-Modified"] == HTTP_MODIFIED
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (ETAG, True),
+    ('"other", ' + ETAG, True),
+    ("W/" + ETAG, True),
+    ("*", True),
+    ('"other"', False),
+    ("abc123", False),
+])
+def test_if_none_match(if_none_match, expected):
+    assert is_not_modified(request(if_none_match=if_none_match), ETAG, MODIFIED) is expected
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    assert not is_not_modified(request(if_none_match='"other"', if_modified_since=HTTP_MODIFIED), ETAG, MODIFIED)
+    assert is_not_modified(
+        request(if_none_match=ETAG, if_modified_since="Thu, 01 Jan 2026 00:00:00 GMT"), ETAG, MODIFIED,
+    )
+
+
+@pytest.mark.parametrize("since, expected", [
+    # Last-Modified has whole seconds, so the sub-second part must not count as a change
+    (HTTP_MODIFIED, True),
+    ("Wed, 04 Mar 2026 05:06:08 GMT", True),
+    ("Wed, 04 Mar 2026 05:06:06 GMT", False),
+    ("not a date", False),
+    # Without a zone the date can't be compared
+    ("2026-03-04T05:06:07", False),
+])
+def test_if_modified_since(since, expected):
+    assert is_not_modified(request(if_modified_since=since), ETAG, MODIFIED) is expected
+
+
+def test_no_validators():
+    assert not is_not_modified(request(), ETAG, MODIFIED)
+    assert not is_not_modified(request(if_modified_since=HTTP_MODIFIED), ETAG, None)
+    assert not is_not_modified(request(if_modified_since=HTTP_MODIFIED), ETAG, MODIFIED + timedelta(seconds=1))
+
+
+def test_catalog_route_revalidates(server_db, api_client):
+    async def scenario():
+        async with api_client.session() as http:
+            first = await http.get("/api/products/olive-oil")
+            etag = first.headers["etag"]
+            again = await http.get("/api/products/olive-oil", headers={"If-None-Match": etag})
+            weak = await http.get("/api/products/olive-oil", headers={"If-None-Match": "W/" + etag})
+            stale = await http.get("/api/products/olive-oil", headers={"If-None-Match": '"stale"'})
+        return first, again, weak, stale
+
+    first, again, weak, stale = asyncio.run(scenario())
+    assert first.status_code == 200 and first.json()["products"]
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == first.headers["etag"]
+    assert weak.status_code == 304
+    assert stale.status_code == 200
@@ -0,0 +1,97 @@
+import asyncio
+import io
+import json
+
+import pytest
+from PIL import Image
+
+import server
+from images import ImageStore, InvalidImage, generate_variants
+
+
+def image_bytes(size=(800, 400), fmt="PNG", mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, "olive").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_variants_are_resized_per_width_and_format(tmp_path):
+    (tmp_path / "original.png").write_bytes(image_bytes(mode="P"))
+    written = generate_variants(str(tmp_path), "original.png", [320, 640], ["webp"])
+    assert sorted(written) == [str(tmp_path / "320.webp"), str(tmp_path / "640.webp")]
+    with Image.open(tmp_path / "320.webp") as variant:
+        assert variant.format == "WEBP" and variant.size == (320, 160)
+    # Existing variants are kept
+    assert generate_variants(str(tmp_path), "original.png", [320, 640], ["webp"]) == []
+
+
+def test_store_describes_variants_without_upscaling(tmp_path):
+    store = ImageStore(tmp_path, widths=[320, 640, 1024], max_workers=1)
+    store.formats = ["webp"]
+
+    async def scenario():
+        described = await store.store(image_bytes(fmt="JPEG"))
+        await asyncio.gather(*store._jobs.values())
+        return described
+
+    try:
+        described = asyncio.run(scenario())
+    finally:
+        store.shutdown()
+    digest = described["image"].split("/")[-2]
+    assert described["image"] == f"/api/media/{digest}/original.jpg"
+    assert described["image_variants"] == {
+        "webp": f"/api/media/{digest}/320.webp 320w, /api/media/{digest}/640.webp 640w, "
+                f"/api/media/{digest}/800.webp 800w",
+    }
+    assert json.loads((tmp_path / digest / "meta.json").read_text()) == {"ext": "jpg", "width": 800, "height": 400}
+    for width in (320, 640, 800):
+        assert asyncio.run(store.resolve(digest, f"{width}.webp")) is not None
+    assert asyncio.run(store.resolve(digest, "1024.webp")) is None
+
+
+def test_non_image_is_rejected(tmp_path):
+    store = ImageStore(tmp_path, widths=[320])
+    with pytest.raises(InvalidImage):
+        asyncio.run(store.store(b"GIF89a definitely not an image"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_route_rejects_non_images(api_client, admin_headers, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "image_store", ImageStore(tmp_path, widths=[320]))
+    response = api_client.post(
+        "/api/admin/images", files={"file": ("photo.jpg", b"%PDF-1.4 not an image", "image/jpeg")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Not a readable image"}
+
+
+def test_media_route_redirects_to_the_original_until_the_variant_exists(api_client, monkeypatch, tmp_path):
+    store = ImageStore(tmp_path, widths=[320])
+    monkeypatch.setattr(server, "image_store", store)
+    digest = "0123456789abcdef0123"
+    (tmp_path / digest).mkdir()
+    (tmp_path / digest / "original.png").write_bytes(image_bytes())
+    (tmp_path / digest / "meta.json").write_text(json.dumps({"ext": "png", "width": 800, "height": 400}))
+    reads = []
+    read_meta = store._read_meta
+    monkeypatch.setattr(store, "_read_meta", lambda digest: reads.append(digest) or read_meta(digest))
+
+    async def scenario():
+        async with api_client.session() as http:
+            pending = [await http.get(f"/api/media/{digest}/320.webp") for _ in range(2)]
+            (tmp_path / digest / "320.webp").write_bytes(b"RIFF....WEBP")
+            ready = await http.get(f"/api/media/{digest}/320.webp")
+            missing = await http.get("/api/media/ffffffffffffffffffff/320.webp")
+        return pending, ready, missing
+
+    pending, ready, missing = asyncio.run(scenario())
+    for response in pending:
+        assert response.status_code == 307 and response.headers["cache-control"] == "no-store"
+        assert response.headers["location"] == f"/api/media/{digest}/original.png"
+    # meta.json never changes, so it is read once
+    assert reads == [digest, "ffffffffffffffffffff"]
+    assert ready.status_code == 200 and ready.headers["content-type"] == "image/webp"
+    assert ready.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert missing.status_code == 404
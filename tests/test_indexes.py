@@ -0,0 +1,71 @@
+import asyncio
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+import indexes
+from database import Database
+from indexes import INDEXES, ensure_indexes, index_drift
+
+
+def test_ensure_indexes_leaves_no_drift(mongo_db):
+    async def scenario():
+        first = await ensure_indexes(mongo_db)
+        # Idempotent: a second startup finds everything in place
+        second = await ensure_indexes(mongo_db)
+        names = set(await mongo_db.contact_messages.index_information())
+        return first, second, names
+
+    first, second, names = asyncio.run(scenario())
+    assert first == second == {}
+    assert names == {"_id_", *(index.document["name"] for index in INDEXES["contact_messages"])}
+
+
+def test_drift_reports_missing_changed_and_extra_indexes(mongo_db, monkeypatch):
+    monkeypatch.setattr(indexes, "INDEXES", {
+        "contact_messages": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_desc"),
+            IndexModel([("email", ASCENDING)], name="email"),
+        ],
+        "site_settings": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    })
+
+    async def scenario():
+        messages = mongo_db.contact_messages
+        await messages.create_index([("id", ASCENDING)], name="id_unique", unique=True)
+        # Same name, different key: changed
+        await messages.create_index([("created_at", ASCENDING)], name="created_at_desc")
+        await messages.create_index([("subject", ASCENDING)], name="subject")
+        await mongo_db.site_settings.create_index([("id", ASCENDING)], name="id_unique", unique=True)
+        return await index_drift(mongo_db)
+
+    assert asyncio.run(scenario()) == {
+        "contact_messages": {"missing": ["email"], "changed": ["created_at_desc"], "extra": ["subject"]},
+    }
+
+
+def test_uniqueness_change_is_drift(mongo_db, monkeypatch):
+    monkeypatch.setattr(indexes, "INDEXES", {
+        "olive_oil_products": [IndexModel([("sku", ASCENDING)], name="sku_unique", unique=True)],
+    })
+
+    async def scenario():
+        await mongo_db.olive_oil_products.create_index([("sku", ASCENDING)], name="sku_unique")
+        return await index_drift(mongo_db)
+
+    assert asyncio.run(scenario()) == {
+        "olive_oil_products": {"missing": [], "changed": ["sku_unique"], "extra": []},
+    }
+
+
+def test_cli_connects_like_the_server(mongo_db, monkeypatch):
+    connected = []
+
+    async def connect(self, settings):
+        connected.append(settings)
+        self.bind(mongo_db)
+
+    monkeypatch.setattr(Database, "connect", connect)
+    assert asyncio.run(indexes._main(["--check"])) == 1
+    assert asyncio.run(indexes._main([])) == 0
+    assert len(connected) == 2 and asyncio.run(index_drift(mongo_db)) == {}
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+import pytest
+
+import json_lines
+
+CREATED = datetime(2026, 3, 4, 5, 6, 7, 123456, tzinfo=timezone.utc)
+
+
+def test_round_trip():
+    doc = {"id": "m1", "name": "Émilie\nDupont", "created_at": CREATED, "archived_at": CREATED, "read": False}
+    line = json_lines.encode(doc)
+    assert "\n" not in line and "Émilie" in line
+    assert json_lines.decode(line) == doc
+
+
+def test_other_values_are_strings():
+    assert json_lines.decode(json_lines.encode({"id": UUID(int=1)})) == {"id": str(UUID(int=1))}
+
+
+@pytest.mark.parametrize("line", ['{"id": "m1", "created_at": "not a date"}', '{"id": "m1", "crea'])
+def test_malformed_lines(line):
+    with pytest.raises(ValueError):
+        json_lines.decode(line)
@@ -0,0 +1,105 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from message_export import EXPORT_FIELDS, csv_row
+
+MESSAGES = [
+    {"id": "m1", "created_at": datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc), "name": "Ana",
+     "email": "ana@example.com", "subject": "Order", "message": "Ten bottles, please.", "read": True},
+    {"id": "m2", "created_at": datetime(2026, 3, 2, 14, 0, tzinfo=timezone.utc), "name": "=HYPERLINK(\"x\")",
+     "email": "bo@example.com", "company": "@Bo Foods", "subject": "+33 quote", "message": "-5%?", "read": False},
+    {"id": "m3", "created_at": datetime(2026, 3, 3, 18, 15, tzinfo=timezone.utc), "name": "Chloé",
+     "email": "chloe@example.com", "subject": "Line one\nline two", "message": "Merci", "read": False},
+]
+
+
+@pytest.fixture
+def export(server_db, api_client, admin_headers):
+    """GET the export with ``params``, the inbox holding ``MESSAGES`` (in reverse insertion order)."""
+    asyncio.run(server_db.contact_messages.insert_many([dict(doc) for doc in reversed(MESSAGES)]))
+
+    def get(**params):
+        response = api_client.get("/api/admin/messages/export", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        return response
+
+    return get
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=1+1", "'=1+1"),
+    ("+33 1 23", "'+33 1 23"),
+    ("-2", "'-2"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\t=cmd", "'\t=cmd"),
+    ("Plain text = fine", "Plain text = fine"),
+    ("", ""),
+])
+def test_csv_row_escapes_formulas(value, expected):
+    assert csv_row({"message": value})["message"] == expected
+
+
+def test_csv_row_formats_dates():
+    row = csv_row({"created_at": datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc), "read": True})
+    assert row == {"created_at": "2026-03-01T09:30:00+00:00", "read": True}
+
+
+def test_csv_export(export):
+    response = export()
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"].startswith('attachment; filename="contact_messages-')
+    assert response.headers["x-archive-mode"] == "off"
+    text = response.text
+    assert text.splitlines()[0] == ",".join(EXPORT_FIELDS)
+    rows = list(csv.DictReader(io.StringIO(text)))
+    # Oldest first
+    assert [row["id"] for row in rows] == ["m1", "m2", "m3"]
+    assert rows[0] == {
+        "id": "m1", "created_at": "2026-03-01T09:30:00+00:00", "name": "Ana", "email": "ana@example.com",
+        "company": "", "subject": "Order", "message": "Ten bottles, please.", "read": "True",
+    }
+    assert (rows[1]["name"], rows[1]["company"], rows[1]["subject"], rows[1]["message"]) == (
+        "'=HYPERLINK(\"x\")", "'@Bo Foods", "'+33 quote", "'-5%?",
+    )
+    # Quoted by the csv module, not split into two rows
+    assert rows[2]["subject"] == "Line one\nline two" and rows[2]["name"] == "Chloé"
+
+
+def test_ndjson_export(export):
+    response = export(format="ndjson")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    docs = [json.loads(line) for line in response.text.splitlines()]
+    assert [doc["id"] for doc in docs] == ["m1", "m2", "m3"]
+    assert set(docs[1]) == set(EXPORT_FIELDS)
+    # Values are exported as stored: escaping is only for spreadsheets
+    assert docs[1]["name"] == "=HYPERLINK(\"x\")" and docs[1]["read"] is False
+    assert docs[0]["created_at"] == "2026-03-01T09:30:00+00:00"
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"read": "true"}, ["m1"]),
+    ({"read": "false"}, ["m2", "m3"]),
+    ({"since": "2026-03-02T00:00:00Z"}, ["m2", "m3"]),
+    ({"until": "2026-03-02T14:00:00Z"}, ["m1"]),
+    ({"since": "2026-03-02T00:00:00Z", "until": "2026-03-03T00:00:00Z", "read": "false"}, ["m2"]),
+    ({"since": "2027-01-01T00:00:00Z"}, []),
+])
+def test_export_filters(export, params, expected):
+    docs = [json.loads(line) for line in export(format="ndjson", **params).text.splitlines()]
+    assert [doc["id"] for doc in docs] == expected
+    assert [row["id"] for row in csv.DictReader(io.StringIO(export(**params).text))] == expected
+
+
+def test_export_requires_a_token(api_client):
+    assert api_client.get("/api/admin/messages/export").status_code == 401
+
+
+def test_unknown_format_is_rejected(api_client, admin_headers):
+    response = api_client.get("/api/admin/messages/export", params={"format": "xlsx"}, headers=admin_headers)
+    assert response.status_code == 422
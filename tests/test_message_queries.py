@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from message_queries import MESSAGE_SORT, after_cursor, build_message_filter, decode_cursor, encode_cursor
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_messages(count):
+    # Pairs share a created_at, so the id tie-breaker matters
+    return [
+        {"id": f"m{i:03d}", "created_at": START + timedelta(minutes=i // 2), "read": i % 3 == 0, "email": "a@b.c"}
+        for i in range(count)
+    ]
+
+
+async def read_all_pages(collection, query, limit):
+    pages, cursor = [], None
+    while True:
+        page_query = after_cursor(query, cursor) if cursor else query
+        page = await collection.find(page_query, {"_id": 0}).sort(MESSAGE_SORT).limit(limit + 1).to_list(limit + 1)
+        pages.append([doc["id"] for doc in page[:limit]])
+        if len(page) <= limit:
+            return pages
+        cursor = encode_cursor(page[limit - 1])
+
+
+def test_cursor_round_trip():
+    message = {"id": "abc", "created_at": datetime(2026, 3, 4, 5, 6, 7, 123000, tzinfo=timezone.utc)}
+    assert decode_cursor(encode_cursor(message)) == (message["created_at"], "abc")
+
+
+def test_naive_datetimes_are_utc():
+    naive = datetime(2026, 3, 4, 5, 6, 7)
+    assert decode_cursor(encode_cursor({"id": "x", "created_at": naive}))[0] == naive.replace(tzinfo=timezone.utc)
+    assert build_message_filter(since=naive)["created_at"]["$gte"].tzinfo == timezone.utc
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bm90IGpzb24", "WzEsICJhIl0"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_build_message_filter():
+    since, until = START, START + timedelta(days=1)
+    assert build_message_filter() == {}
+    assert build_message_filter(read=False, since=since, until=until, email="a@b.c") == {
+        "read": False,
+        "created_at": {"$gte": since, "$lt": until},
+        "email": "a@b.c",
+    }
+
+
+def test_after_cursor_keeps_the_filter():
+    cursor = encode_cursor({"id": "m1", "created_at": START})
+    assert "$or" in after_cursor({}, cursor)
+    combined = after_cursor({"read": False}, cursor)
+    assert combined["$and"][0] == {"read": False}
+
+
+@pytest.mark.parametrize("query", [{}, {"read": True}])
+def test_pages_cover_every_message_once(mongo_db, query):
+    async def scenario():
+        messages = make_messages(23)
+        await mongo_db.contact_messages.insert_many([dict(m) for m in messages])
+        pages = await read_all_pages(mongo_db.contact_messages, query, limit=4)
+        expected = sorted(
+            (m for m in messages if all(m[k] == v for k, v in query.items())),
+            key=lambda m: (m["created_at"], m["id"]),
+            reverse=True,
+        )
+        assert [i for page in pages for i in page] == [m["id"] for m in expected]
+        assert all(len(page) == 4 for page in pages[:-1])
+
+    asyncio.run(scenario())
+
+
+def test_new_messages_do_not_shift_pages(mongo_db):
+    async def scenario():
+        await mongo_db.contact_messages.insert_many(make_messages(10))
+        first = await mongo_db.contact_messages.find({}, {"_id": 0}).sort(MESSAGE_SORT).limit(5).to_list(5)
+        await mongo_db.contact_messages.insert_one({"id": "new", "created_at": START + timedelta(days=1)})
+        second = await mongo_db.contact_messages.find(
+            after_cursor({}, encode_cursor(first[-1])), {"_id": 0}
+        ).sort(MESSAGE_SORT).limit(5).to_list(5)
+        ids = [m["id"] for m in first + second]
+        assert len(set(ids)) == 10 and "new" not in ids
+
+    asyncio.run(scenario())
+
+
+def test_legacy_string_dates_round_trip():
+    cursor = encode_cursor({"id": "old", "created_at": "not a date"})
+    assert decode_cursor(cursor) == ("not a date", "old")
+
+
+def test_pages_reach_legacy_string_dates(mongo_db):
+    async def scenario():
+        messages = make_messages(5) + [
+            {"id": "s1", "created_at": "2025-06-01T10:00:00"},
+            {"id": "s2", "created_at": "2025-06-01T10:00:00"},
+            {"id": "s3", "created_at": "yesterday"},
+        ]
+        await mongo_db.contact_messages.insert_many(messages)
+        pages = await read_all_pages(mongo_db.contact_messages, {}, limit=2)
+        ids = [i for page in pages for i in page]
+        assert sorted(ids) == sorted(m["id"] for m in messages)
+        # Dates first, newest first, then the legacy strings
+        assert ids[:5] == ["m004", "m003", "m002", "m001", "m000"]
+        assert ids[5:] == ["s3", "s2", "s1"]
+
+    asyncio.run(scenario())
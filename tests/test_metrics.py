@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+import metrics
+from metrics import CallbackGauge, Counter, Gauge, Histogram, MetricsMiddleware, PoolMonitor, Registry
+
+
+def test_counter_and_gauge_rendering():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("route", "status")))
+    in_flight = registry.register(Gauge("in_flight", "In flight."))
+    registry.register(CallbackGauge("cache_hits_total", "Hits.", lambda: 7, "counter"))
+    requests.inc("/api/products", "200")
+    requests.inc("/api/products", "200")
+    requests.inc('/a"b\\c', "500")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    assert registry.render() == "\n".join([
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/api/products",status="200"} 2.0',
+        'requests_total{route="/a\\"b\\\\c",status="500"} 1.0',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 1.0",
+        "# HELP cache_hits_total Hits.",
+        "# TYPE cache_hits_total counter",
+        "cache_hits_total 7.0",
+    ]) + "\n"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/x")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2.0',
+        'latency_seconds_bucket{route="/x",le="1.0"} 3.0',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4.0',
+        'latency_seconds_count{route="/x"} 4.0',
+        'latency_seconds_sum{route="/x"} 3.65',
+    ]
+
+
+def test_middleware_labels_requests_by_route_template(api_client, monkeypatch):
+    requests = Counter("requests", "Requests.", ("method", "route", "status"))
+    latency = Histogram("latency", "Latency.", ("method", "route"))
+    monkeypatch.setattr(metrics, "http_requests", requests)
+    monkeypatch.setattr(metrics, "http_latency", latency)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware)
+
+    client = api_client.with_app(app)
+    for path in ("/items/1", "/items/2", "/missing", "/metrics"):
+        client.get(path)
+    assert requests._values == {("GET", "/items/{item_id}", "200"): 2.0, ("GET", "unmatched", "404"): 1.0}
+    # Bucket counts, without the trailing sum
+    assert sum(latency._values[("GET", "/items/{item_id}")][:-1]) == 2
+
+
+def test_pool_stats():
+    monitor = PoolMonitor()
+    address = ("db.internal", 27017)
+    monitor.pool_created(SimpleNamespace(address=address, options={"maxPoolSize": 4}))
+    for _ in range(2):
+        monitor.connection_created(SimpleNamespace(address=address))
+    monitor.connection_checked_out(SimpleNamespace(address=address))
+    try:
+        assert monitor.stats() == {
+            "db.internal:27017": {"open": 2, "in_use": 1, "max_size": 4, "utilization": 0.25},
+        }
+    finally:
+        monitor.connection_checked_in(SimpleNamespace(address=address))
+        for _ in range(2):
+            monitor.connection_closed(SimpleNamespace(address=address))
+        monitor.pool_closed(SimpleNamespace(address=address))
+    assert monitor.stats() == {}
+
+
+def test_metrics_endpoint_serves_the_text_format(api_client):
+    api_client.get("/api/health")
+    response = api_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/health",status="200"}' in response.text
+    assert "# TYPE catalog_cache_hits_total counter" in response.text
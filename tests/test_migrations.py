@@ -0,0 +1,22 @@
+import asyncio
+from datetime import datetime, timezone
+
+import migrations
+from database import Database
+
+
+def test_cli_converts_string_dates_through_database_connect(mongo_db, monkeypatch):
+    async def connect(self, settings):
+        self.bind(mongo_db)
+
+    monkeypatch.setattr(Database, "connect", connect)
+    asyncio.run(mongo_db.contact_messages.insert_many([
+        {"id": "a", "created_at": "2024-01-02T03:04:05Z"},
+        {"id": "b", "created_at": "not a date"},
+    ]))
+    assert asyncio.run(migrations._main(["created-at"])) == 0
+
+    async def stored():
+        return {doc["id"]: doc["created_at"] async for doc in mongo_db.contact_messages.find()}
+
+    assert asyncio.run(stored()) == {"a": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "b": "not a date"}
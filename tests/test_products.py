@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from products import ProductCategory, ProductRepository, decode_cursor, encode_cursor
+
+
+class Product(BaseModel):
+    id: str
+    sku: str
+    order: int = 0
+    active: bool = True
+
+
+CATEGORY = ProductCategory(
+    slug="olive-oil", collection="olive_oil_products", key_field="sku", key_label="SKU",
+    model=Product, create_model=Product, update_model=Product, defaults=list,
+)
+
+
+@pytest.fixture
+def repo(mongo_db):
+    # Orders repeat so pages must break ties on id
+    docs = [{"id": f"p{i:02d}", "sku": f"S{i}", "order": i // 3, "active": i % 4 != 0} for i in range(20)]
+    asyncio.run(mongo_db.olive_oil_products.insert_many(docs))
+    return ProductRepository(mongo_db, cache=None, category=CATEGORY)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"id": "abc", "order": 7})) == (7, "abc")
+    # Products created before ordering existed sort first
+    assert decode_cursor(encode_cursor({"id": "abc"})) == (0, "abc")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor({"id": 5, "order": 1}), "WzEsMiwzXQ"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_without_limit_returns_everything(repo):
+    products, next_cursor = asyncio.run(repo.page())
+    assert len(products) == 20 and next_cursor is None
+    assert "_id" not in products[0]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 20, 25])
+def test_pages_cover_every_product_once_in_order(repo, limit):
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            products, cursor = await repo.page(limit=limit, cursor=cursor)
+            assert len(products) <= limit
+            seen.extend(products)
+            if cursor is None:
+                return seen
+
+    seen = asyncio.run(walk())
+    keys = [(product["order"], product["id"]) for product in seen]
+    assert keys == sorted(keys) and len(set(keys)) == 20
+
+
+def test_page_stable_when_products_are_added_before_the_cursor(repo, mongo_db):
+    async def scenario():
+        first, cursor = await repo.page(limit=5)
+        await mongo_db.olive_oil_products.insert_one({"id": "p00a", "sku": "new", "order": 0, "active": True})
+        second, _ = await repo.page(limit=5, cursor=cursor)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [product["id"] for product in second] == ["p05", "p06", "p07", "p08", "p09"]
+    assert first[-1]["id"] == "p04"
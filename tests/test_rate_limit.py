@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from rate_limit import BucketRule, DuplicateDetector, MemoryBackend, MongoBackend, RateLimiter
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def take(backend, key, rule):
+    return asyncio.run(backend.take(key, rule))
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    backend = MemoryBackend(clock=clock)
+    rule = BucketRule("ip", capacity=3, refill_rate=0.5)
+    assert [take(backend, "k", rule)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = take(backend, "k", rule)
+    assert not allowed and retry_after == pytest.approx(2.0)
+    clock.now += 1.0
+    allowed, retry_after = take(backend, "k", rule)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    clock.now += 1.0
+    assert take(backend, "k", rule)[0]
+    # Never refills past capacity
+    clock.now += 3600
+    assert [take(backend, "k", rule)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_buckets_are_per_key(clock):
+    backend = MemoryBackend(clock=clock)
+    rule = BucketRule("ip", capacity=1, refill_rate=0.01)
+    assert take(backend, "a", rule)[0]
+    assert not take(backend, "a", rule)[0]
+    assert take(backend, "b", rule)[0]
+
+
+def test_prunes_idle_buckets_at_capacity(clock):
+    backend = MemoryBackend(max_keys=2, clock=clock)
+    rule = BucketRule("ip", capacity=1, refill_rate=1)
+    take(backend, "a", rule)
+    take(backend, "b", rule)
+    clock.now += 10
+    take(backend, "c", rule)
+    assert set(backend._buckets) == {"c"}
+
+
+def test_evicts_least_recently_updated_buckets_at_capacity(clock):
+    backend = MemoryBackend(max_keys=3, clock=clock)
+    rule = BucketRule("ip", capacity=5, refill_rate=0.01)
+    for key in ("a", "b", "c"):
+        take(backend, key, rule)
+        clock.now += 1
+    # "a" is used again, so "b" is now the least recently updated
+    take(backend, "a", rule)
+    take(backend, "d", rule)
+    assert list(backend._buckets) == ["c", "a", "d"]
+    for i in range(100):
+        take(backend, f"flood{i}", rule)
+    assert len(backend._buckets) == 3
+    # An evicted client starts again from a full bucket
+    assert take(backend, "a", rule)[0]
+
+
+def test_per_ip_bucket_checked_before_global(clock):
+    limiter = RateLimiter(
+        MemoryBackend(clock=clock),
+        rules=[BucketRule("global", capacity=3, refill_rate=0.01), BucketRule("ip", capacity=1, refill_rate=0.01)],
+        prefix="contact",
+    )
+    assert asyncio.run(limiter.check("1.1.1.1")) is None
+    # The flooding client is refused without draining the global bucket
+    for _ in range(5):
+        assert asyncio.run(limiter.check("1.1.1.1")) == pytest.approx(100)
+    assert asyncio.run(limiter.check("2.2.2.2")) is None
+    assert asyncio.run(limiter.check("3.3.3.3")) is None
+    assert asyncio.run(limiter.check("4.4.4.4")) is not None
+
+
+def at(expression, now):
+    """``expression`` with ``$$NOW`` replaced by ``now``, and date + milliseconds folded."""
+    if expression == "$$NOW":
+        return now
+    if isinstance(expression, list):
+        return [at(item, now) for item in expression]
+    if isinstance(expression, dict):
+        expression = {key: at(value, now) for key, value in expression.items()}
+        operands = expression.get("$add")
+        if len(expression) == 1 and operands and isinstance(operands[0], datetime):
+            return operands[0] + timedelta(milliseconds=sum(operands[1:]))
+    return expression
+
+
+class PipelineCollection:
+    """Runs update pipelines through mongomock's aggregation at the test clock's time.
+
+    mongomock evaluates neither pipeline updates nor ``$$NOW``.
+    """
+
+    def __init__(self, clock):
+        mongomock = pytest.importorskip("mongomock")
+        self.docs = mongomock.MongoClient(tz_aware=True).db.rate_limits
+        self.clock = clock
+
+    async def find_one_and_update(self, query, pipeline, upsert, return_document):
+        now = datetime.fromtimestamp(self.clock(), timezone.utc)
+        if upsert and self.docs.find_one(query) is None:
+            self.docs.insert_one(dict(query))
+        doc, = self.docs.aggregate([{"$match": query}, *at(pipeline, now)])
+        self.docs.replace_one(query, doc)
+        return doc
+
+
+def test_mongo_bucket_refills_and_denies(clock):
+    collection = PipelineCollection(clock)
+    backend = MongoBackend({"rate_limits": collection})
+    rule = BucketRule("ip", capacity=2, refill_rate=0.5)
+    assert [take(backend, "k", rule) for _ in range(2)] == [(True, 0.0), (True, 0.0)]
+    allowed, retry_after = take(backend, "k", rule)
+    assert not allowed and retry_after == pytest.approx(2.0)
+    # A denied take costs nothing
+    clock.now += 1
+    allowed, retry_after = take(backend, "k", rule)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    clock.now += 1
+    assert take(backend, "k", rule) == (True, 0.0)
+    clock.now += 3600
+    assert [take(backend, "k", rule)[0] for _ in range(3)] == [True, True, False]
+    doc = collection.docs.find_one({"_id": "k"})
+    # Expires once it would be full again, plus a second
+    assert doc["expire_at"] == doc["updated_at"] + timedelta(seconds=2 / 0.5 + 1)
+    assert take(backend, "other", rule)[0]
+
+
+def test_duplicates_within_window(clock):
+    detector = DuplicateDetector(window=60, clock=clock)
+    assert not detector.seen(b"hello")
+    assert detector.seen(b"hello")
+    assert not detector.seen(b"other")
+    clock.now += 61
+    assert not detector.seen(b"hello")
+
+
+def test_forget_allows_resubmission(clock):
+    detector = DuplicateDetector(window=60, clock=clock)
+    assert not detector.seen(b"hello")
+    detector.forget(b"hello")
+    assert not detector.seen(b"hello")
+    detector.forget(b"never seen")
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import retention
+import server
+from message_queries import encode_cursor
+from retention import MessageArchiver
+
+NOW = datetime.now(timezone.utc)
+
+
+def message(i, days_old, read=False):
+    return {"id": f"m{i}", "email": "a@example.com", "message": "hello",
+            "created_at": NOW - timedelta(days=days_old), "read": read}
+
+
+def test_archives_due_messages_and_ignores_already_archived(mongo_db):
+    async def scenario():
+        await mongo_db.contact_messages_archive.create_index("id", unique=True)
+        await mongo_db.contact_messages.insert_many([
+            message(1, 200), message(2, 40, read=True), message(3, 40), message(4, 1, read=True),
+        ])
+        # Left in both collections by a pass interrupted before its delete
+        await mongo_db.contact_messages_archive.insert_one({**message(1, 200), "archived_at": NOW})
+        archiver = MessageArchiver(mongo_db, mode="collection", max_age_days=180, read_age_days=30, batch_size=1)
+        moved = await archiver.run_once()
+        hot = await mongo_db.contact_messages.distinct("id")
+        archived = await mongo_db.contact_messages_archive.distinct("id")
+        return moved, hot, archived
+
+    moved, hot, archived = asyncio.run(scenario())
+    assert moved == 2
+    assert sorted(hot) == ["m3", "m4"]
+    assert sorted(archived) == ["m1", "m2"]
+
+
+def test_pass_stops_when_another_worker_takes_the_lease(mongo_db):
+    async def scenario():
+        await mongo_db.contact_messages.insert_many([message(i, 200) for i in range(3)])
+        archiver = MessageArchiver(mongo_db, mode="collection", batch_size=1, pause=0)
+        archive = archiver._archive
+
+        async def archive_then_lose_lease(docs):
+            await archive(docs)
+            # This worker stalled past the lease expiry and another one took over
+            await mongo_db.job_leases.update_one(
+                {"_id": archiver.lease_name},
+                {"$set": {"owner": "other", "expires_at": NOW + timedelta(minutes=5)}},
+            )
+
+        archiver._archive = archive_then_lose_lease
+        moved = await archiver.run_once()
+        lease = await mongo_db.job_leases.find_one({"_id": archiver.lease_name})
+        return moved, await mongo_db.contact_messages.count_documents({}), lease["owner"]
+
+    assert asyncio.run(scenario()) == (1, 2, "other")
+
+
+def archived_segments(mongo_db, tmp_path, docs):
+    """Archive ``docs`` in segments mode, two messages per segment file."""
+    archiver = MessageArchiver(mongo_db, mode="segments", batch_size=2, pause=0, segment_dir=tmp_path)
+
+    async def archive():
+        await mongo_db.contact_messages.insert_many(docs)
+        await archiver.run_once()
+
+    asyncio.run(archive())
+    return archiver
+
+
+def customer(i, days_old, email="ana@example.com", subject="Order"):
+    return {**message(i, days_old), "name": "Ana", "email": email, "subject": subject}
+
+
+def test_segments_search(mongo_db, tmp_path, monkeypatch):
+    docs = [customer(0, 205), customer(1, 204, email="bo@example.com"), customer(2, 203, subject="Invoice 42"),
+            customer(3, 202), customer(4, 201, email="bo@example.com"), customer(5, 200)]
+    archiver = archived_segments(mongo_db, tmp_path, docs)
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 3
+
+    opened = []
+    open_segment = retention.gzip.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path.name)
+        return open_segment(path, *args, **kwargs)
+
+    monkeypatch.setattr(retention.gzip, "open", counting_open)
+
+    def ids(**filters):
+        opened.clear()
+        found, more = asyncio.run(archiver.search(**filters))
+        assert not more
+        return [doc["id"] for doc in found]
+
+    assert ids() == ["m5", "m4", "m3", "m2", "m1", "m0"] and len(opened) == 3
+    assert ids(q="invoice") == ["m2"]
+    assert ids(email="bo@example.com") == ["m4", "m1"]
+    assert ids(q="order", email="bo@example.com") == ["m4", "m1"]
+    # Only the segment holding m2 and m3 overlaps the range
+    since, until = NOW - timedelta(days=203, hours=1), NOW - timedelta(days=202, hours=1)
+    assert ids(since=since, until=until) == ["m2"] and len(opened) == 1
+    assert ids(since=NOW - timedelta(days=201, hours=1)) == ["m5", "m4"] and len(opened) == 1
+    assert all(isinstance(doc["created_at"], datetime) for doc in asyncio.run(archiver.search())[0])
+
+    # Past the cursor only segments starting at or before it can hold the next page
+    page, more = asyncio.run(archiver.search(limit=4))
+    opened.clear()
+    rest, more_after = asyncio.run(archiver.search(limit=4, cursor=encode_cursor(page[-1])))
+    assert more and not more_after
+    assert [doc["id"] for doc in rest] == ["m1", "m0"] and len(opened) == 2
+
+
+def test_segments_search_ignores_messages_archived_twice(mongo_db, tmp_path):
+    archiver = archived_segments(mongo_db, tmp_path, [customer(0, 201), customer(1, 200)])
+
+    async def archive_again():
+        # A pass interrupted between writing its segment and deleting the batch
+        await mongo_db.contact_messages.insert_one(customer(1, 200))
+        await archiver.run_once()
+        return await archiver.search()
+
+    found, more = asyncio.run(archive_again())
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 2
+    assert [doc["id"] for doc in found] == ["m1", "m0"] and not more
+
+
+def test_archive_route_pages_across_segments(mongo_db, tmp_path, api_client, admin_headers, monkeypatch):
+    archiver = archived_segments(mongo_db, tmp_path, [customer(i, 210 - i) for i in range(5)])
+    monkeypatch.setattr(server, "message_archiver", archiver)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = api_client.get("/api/admin/messages/archive", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        pages.append([doc["id"] for doc in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert pages == [["m4", "m3"], ["m2", "m1"], ["m0"]]
+    assert response.json()[0]["archived_at"]
+
+    response = api_client.get("/api/admin/messages/archive", params={"cursor": "nonsense"}, headers=admin_headers)
+    assert response.status_code == 400
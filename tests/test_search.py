@@ -0,0 +1,80 @@
+import pytest
+
+from search import SearchIndex, fold, tokenize
+
+OLIVE_OIL = [
+    {"sku": "TOO-500", "name_en": "500ml Bottle", "name_fr": "Bouteille 500ml", "size": "500ml",
+     "description_en": "Ideal for cooking", "description_fr": "Idéale pour la cuisine"},
+    {"sku": "TOO-3000", "name_en": "3L Jug", "name_fr": "Bidon 3L", "size": "3L",
+     "description_en": "Family size bottle", "description_fr": "Format familial"},
+]
+KITCHENWARE = [
+    {"reference": "B08", "name_en": "Heart Dish", "name_fr": "Plat Cœur",
+     "description_en": "Heart-shaped serving dish", "description_fr": "Plat en forme de cœur"},
+    {"reference": "M01", "name_en": "Round Mortar", "name_fr": "Mortier Rond",
+     "description_en": "Classic mortar for crushing herbs", "description_fr": "Mortier pour écraser les herbes"},
+    {"reference": "P06", "name_en": "Board", "name_fr": "Planche",
+     "description_en": "Cutting board", "description_fr": "Planche à découper, bouteille non incluse"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex([("olive-oil", OLIVE_OIL), ("kitchenware", KITCHENWARE)])
+
+
+def references(hits):
+    return [hit.product.get("sku") or hit.product.get("reference") for hit in hits]
+
+
+def test_folding():
+    assert fold("Crème Brûlée") == "creme brulee"
+    assert tokenize("Plat Cœur, ÉCRASER!") == ["plat", "coeur", "ecraser"]
+
+
+def test_accents_and_ligatures_are_ignored(index):
+    hits = index.search("coeur")
+    assert references(hits) == ["B08"]
+    assert hits[0].category == "kitchenware"
+    assert references(index.search("ÉCRASER")) == references(index.search("ecraser")) == ["M01"]
+
+
+def test_prefixes_match_but_rank_below_exact_terms(index):
+    assert references(index.search("mort")) == ["M01"]
+    exact, prefix = index.search("mortar")[0], index.search("morta")[0]
+    assert prefix.product is exact.product and prefix.score < exact.score
+    # Single letters only match whole terms
+    assert index.search("m") == []
+
+
+def test_every_term_must_match(index):
+    assert references(index.search("heart dish")) == ["B08"]
+    assert index.search("heart mortar") == []
+
+
+def test_name_outranks_description(index):
+    # "bottle" is the olive oil bottle's name but only in the jug's description
+    assert references(index.search("bottle")) == ["TOO-500", "TOO-3000"]
+
+
+def test_requested_language_outranks_the_other(index):
+    # "bouteille" is the French name of TOO-500 and appears in P06's French description
+    assert references(index.search("bouteille")) == ["TOO-500", "P06"]
+    english, french = index.search("bouteille", lang="en"), index.search("bouteille", lang="fr")
+    assert references(english) == references(french) == ["TOO-500", "P06"]
+    assert english[0].score < french[0].score
+
+
+def test_sku_and_limit(index):
+    assert references(index.search("too 500")) == ["TOO-500"]
+    assert len(index.search("too", limit=1)) == 1
+
+
+@pytest.mark.parametrize("query", ["", "   ", "!!!", "-"])
+def test_empty_queries(index, query):
+    assert index.search(query) == []
+
+
+def test_no_match(index):
+    assert index.search("teapot") == []
+    assert SearchIndex([]).search("bottle") == []
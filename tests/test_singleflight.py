@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        waiters = [asyncio.ensure_future(flights.do("key", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flights.in_flight("key")
+        release.set()
+        assert await asyncio.gather(*waiters) == ["value"] * 5
+        assert not flights.in_flight("key")
+        # Nothing is remembered once the call has finished
+        assert await flights.do("key", fetch) == "value"
+        return calls, flights
+
+    calls, flights = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert (flights.calls, flights.coalesced) == (2, 4)
+
+
+def test_distinct_keys_do_not_share():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.do("a", lambda: fetch(1)), flights.do("b", lambda: fetch(2)))
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_every_waiter_gets_the_exception():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert not flights.in_flight("key")
+        return results
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError] * 3
+
+
+def test_timeout_and_cancellation_only_affect_one_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "value"
+
+        patient = asyncio.ensure_future(flights.do("key", fetch))
+        cancelled = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("key", fetch, timeout=0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert flights.in_flight("key")
+        release.set()
+        return await patient, cancelled.cancelled()
+
+    assert asyncio.run(scenario()) == ("value", True)
+
+
+def test_forget_starts_a_new_call_for_later_callers():
+    async def scenario():
+        flights = SingleFlight()
+        first_release, second_release = asyncio.Event(), asyncio.Event()
+
+        async def fetch(release, value):
+            await release.wait()
+            return value
+
+        before = asyncio.ensure_future(flights.do("key", lambda: fetch(first_release, "stale")))
+        await asyncio.sleep(0)
+        flights.forget("key")
+        after = asyncio.ensure_future(flights.do("key", lambda: fetch(second_release, "fresh")))
+        await asyncio.sleep(0)
+        # The forgotten call finishing must not unregister the new one
+        first_release.set()
+        assert await before == "stale"
+        assert flights.in_flight("key")
+        second_release.set()
+        return await after, flights.calls
+
+    assert asyncio.run(scenario()) == ("fresh", 2)
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from snapshots import COMPRESSED_MIN_SIZE, brotli, build_snapshot, localize_products, pick_encoding
+
+PRODUCT = {
+    "id": "o1", "sku": "EVOO-1", "price": 12.5, "order": 0, "active": True,
+    "name_en": "Extra virgin olive oil", "name_fr": "Huile d'olive vierge extra",
+    "description_en": "Cold pressed in Sfax.", "description_fr": "Pressée à froid à Sfax.",
+}
+
+
+def test_localize_products_keeps_one_language():
+    assert localize_products([PRODUCT], "fr") == [{
+        "id": "o1", "sku": "EVOO-1", "price": 12.5, "order": 0, "active": True,
+        "name": "Huile d'olive vierge extra", "description": "Pressée à froid à Sfax.",
+    }]
+    english = localize_products([PRODUCT], "en")[0]
+    assert (english["name"], english["description"]) == ("Extra virgin olive oil", "Cold pressed in Sfax.")
+    assert not any(key.endswith(("_en", "_fr")) for key in english)
+
+
+def test_localize_products_leaves_other_suffixes_alone():
+    product = {"id": "k1", "name_en": "Pan", "image_url": "/media/pan.jpg", "size_cm": 24, "name_de": "Pfanne"}
+    assert localize_products([product], "fr") == [{"id": "k1", "image_url": "/media/pan.jpg", "size_cm": 24,
+                                                   "name_de": "Pfanne"}]
+    # The input is not modified: the cached products are shared by every request
+    assert product["name_en"] == "Pan"
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("GZIP", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("br; q=0.0, gzip;q=0", None),
+    ("gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+    ("*;q=0", None),
+    ("identity", None),
+    ("deflate", None),
+])
+def test_pick_encoding(accept_encoding, expected):
+    assert pick_encoding(accept_encoding, {"br", "gzip"}) == expected
+
+
+def test_pick_encoding_only_offers_what_was_built():
+    assert pick_encoding("br, gzip", {"gzip"}) == "gzip"
+    assert pick_encoding("*", {"gzip"}) == "gzip"
+    assert pick_encoding("br", {}) is None
+
+
+def test_variants_have_their_own_etag():
+    snapshot = build_snapshot({"products": [PRODUCT] * 10})
+    body, encoding, etag = snapshot.variant("identity")
+    assert (encoding, etag) == (None, snapshot.etag) and json.loads(body)["products"][0] == PRODUCT
+    body, encoding, etag = snapshot.variant("gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == snapshot.body
+    assert etag == snapshot.etag[:-1] + '-gzip"' and etag != snapshot.etag
+    if brotli is not None:
+        body, encoding, br_etag = snapshot.variant("br, gzip")
+        assert encoding == "br" and brotli.decompress(body) == snapshot.body
+        assert br_etag == snapshot.etag[:-1] + '-br"'
+    # Same payload, same validators
+    assert build_snapshot({"products": [PRODUCT] * 10}).variant("gzip")[2] == etag
+
+
+def test_small_or_uncompressed_snapshots_have_no_variants():
+    assert len(build_snapshot({"ok": True}).body) < COMPRESSED_MIN_SIZE
+    assert build_snapshot({"ok": True}).encoded == {}
+    assert build_snapshot({"products": [PRODUCT] * 10}, compress=False).variant("gzip")[1] is None
+
+
+@pytest.fixture
+def catalog(server_db):
+    asyncio.run(server_db.olive_oil_products.insert_many([
+        {**PRODUCT, "id": f"o{i}", "order": i} for i in range(5)
+    ] + [{**PRODUCT, "id": "hidden", "active": False}]))
+    return server_db
+
+
+@pytest.mark.parametrize("lang", ["en", "fr"])
+def test_products_route_localizes(catalog, api_client, lang):
+    response = api_client.get("/api/products/olive-oil", params={"lang": lang}, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["lang"] == lang and [product["id"] for product in payload["products"]] == [f"o{i}" for i in range(5)]
+    expected = localize_products([PRODUCT], lang)[0]
+    assert all((product["name"], product["description"]) == (expected["name"], expected["description"])
+               and not any(key.endswith(("_en", "_fr")) for key in product) for product in payload["products"])
+
+
+def test_products_route_without_lang_keeps_every_language(catalog, api_client):
+    payload = api_client.get("/api/products/olive-oil").json()
+    assert "lang" not in payload and payload["products"][0]["name_fr"] == PRODUCT["name_fr"]
+    assert api_client.get("/api/products/olive-oil", params={"lang": "de"}).status_code == 422
+
+
+def test_products_route_serves_the_precompressed_variant(catalog, api_client):
+    async def scenario():
+        async with api_client.session() as http:
+            plain = await http.get("/api/products/olive-oil?lang=fr", headers={"Accept-Encoding": "identity"})
+            zipped = await http.get("/api/products/olive-oil?lang=fr", headers={"Accept-Encoding": "gzip"})
+            again = await http.get(
+                "/api/products/olive-oil?lang=fr",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]},
+            )
+            # A gzip ETag does not validate the identity body
+            cross = await http.get(
+                "/api/products/olive-oil?lang=fr",
+                headers={"Accept-Encoding": "identity", "If-None-Match": zipped.headers["etag"]},
+            )
+        return plain, zipped, again, cross
+
+    plain, zipped, again, cross = asyncio.run(scenario())
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert plain.headers["vary"] == zipped.headers["vary"] == "Accept-Encoding"
+    # httpx decodes the body: it is the same payload
+    assert zipped.json() == plain.json()
+    assert again.status_code == 304 and again.headers["etag"] == zipped.headers["etag"]
+    assert cross.status_code == 200
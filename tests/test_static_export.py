@@ -0,0 +1,64 @@
+import asyncio
+import gzip
+import json
+
+import static_export
+from static_export import StaticExporter, read_manifest, write_export
+
+PRODUCTS = {"products": [{"id": str(i), "name": f"Olive oil {i}"} for i in range(50)]}
+
+
+def test_write_export_builds_each_file_and_its_encodings(tmp_path):
+    manifest = write_export(tmp_path, {
+        "/api/products/olive-oil": ("products/olive-oil.json", lambda: PRODUCTS),
+        "/api/settings": ("settings.json", lambda: {"phone": "+216"}),
+    })
+    assert read_manifest(tmp_path) == manifest
+    products = manifest["files"]["/api/products/olive-oil"]
+    assert json.loads((tmp_path / products["path"]).read_bytes()) == PRODUCTS
+    assert json.loads(gzip.decompress((tmp_path / products["encodings"]["gzip"]).read_bytes())) == PRODUCTS
+    assert products["path"].startswith(manifest["version"] + "/")
+    # Too small to be worth compressing
+    assert manifest["files"]["/api/settings"]["encodings"] == {}
+
+
+def test_version_changes_with_content_and_old_versions_are_pruned(tmp_path):
+    versions = []
+    for i in range(4):
+        manifest = write_export(tmp_path, {"/api/settings": ("settings.json", lambda: {"i": i})}, keep_versions=2)
+        versions.append(manifest["version"])
+    assert len(set(versions)) == 4
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == sorted(versions[-2:])
+
+
+def test_export_builds_payloads_off_the_event_loop(tmp_path):
+    on_loop = []
+
+    def build_payload():
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return PRODUCTS
+
+    async def collect():
+        return {"/api/products/olive-oil": ("products/olive-oil.json", build_payload)}
+
+    exporter = StaticExporter(tmp_path, collect)
+    manifest = asyncio.run(exporter.export())
+    assert on_loop == [False] and exporter.exports == 1
+    assert "/api/products/olive-oil" in manifest["files"]
+
+
+def test_export_uses_maximum_brotli_quality(tmp_path, monkeypatch):
+    qualities = []
+    real = static_export.build_snapshot
+
+    def build_snapshot(payload, brotli_quality):
+        qualities.append(brotli_quality)
+        return real(payload, brotli_quality=brotli_quality)
+
+    monkeypatch.setattr(static_export, "build_snapshot", build_snapshot)
+    write_export(tmp_path, {"/api/settings": ("settings.json", lambda: PRODUCTS)})
+    assert qualities == [11]